@@ -1,9 +1,16 @@
 from fastapi import FastAPI, APIRouter
 
-from app.api.handlers import router
+from app.api.handlers import router, prometheus
+from app.api.instrumentation import QueryInstrumentationMiddleware, RequestMetricsMiddleware
+from app.db.balance_triggers import check_balance_mode
+from app.db.cache import load_reference_data
+from app.exchange_rate import exchange_rate_client
+from app.jobs import job_scheduler
+from config import QUERY_INSTRUMENTATION, METRICS_ENABLED
 
 
 ROUTERS: tuple[APIRouter] = (router,)
+METRICS_ROUTERS: tuple[APIRouter] = (prometheus.router,)
 
 
 def create_app() -> FastAPI:
@@ -14,4 +21,18 @@ def create_app() -> FastAPI:
     for router in ROUTERS:
         app.include_router(router)
 
+    if QUERY_INSTRUMENTATION:
+        app.add_middleware(QueryInstrumentationMiddleware)
+
+    if METRICS_ENABLED:
+        for metrics_router in METRICS_ROUTERS:
+            app.include_router(metrics_router)
+        app.add_middleware(RequestMetricsMiddleware)
+
+    app.add_event_handler("startup", check_balance_mode)
+    app.add_event_handler("startup", load_reference_data)
+    app.add_event_handler("startup", job_scheduler.start)
+    app.add_event_handler("shutdown", job_scheduler.stop)
+    app.add_event_handler("shutdown", exchange_rate_client.close)
+
     return app
@@ -0,0 +1,66 @@
+from datetime import datetime, date, timedelta
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+from typing import Sequence
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dals import AccrualDAL
+from app.db.models import Deposit, Credit
+from app.db.session import TransactionTypeEnum
+from app.money import CENT, MONEY_SCALE, RATE_SCALE, DAYS_IN_YEAR, accrue_interest
+
+
+PRODUCT_INTEREST_TYPES = {
+    Deposit: TransactionTypeEnum.deposit_interest.value,
+    Credit: TransactionTypeEnum.credit_interest.value,
+}
+
+
+def accrue_interest_reference(principal: Decimal, rate: Decimal, days: int) -> Decimal:
+    """Per-row Decimal implementation accrue_interest is checked against."""
+    with localcontext() as context:
+        context.prec = 50
+        return (principal * rate * days / DAYS_IN_YEAR).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _to_units(values: Sequence[Decimal], scale: int) -> list[int]:
+    return [int(value.scaleb(scale)) for value in values]
+
+
+async def post_interest(session: AsyncSession, product_model, rows: Sequence[Row]) -> None:
+    if not rows:
+        return
+
+    product_ids, account_ids, principals, rates, days, accrue_until = zip(*rows)
+    interests = accrue_interest(_to_units(principals, MONEY_SCALE), _to_units(rates, RATE_SCALE), days)
+
+    await AccrualDAL(session).post_accruals(
+        product_model,
+        transaction_type_id=PRODUCT_INTEREST_TYPES[product_model],
+        product_ids=product_ids,
+        account_ids=account_ids,
+        interests=[Decimal(interest).scaleb(-MONEY_SCALE) for interest in interests],
+        accrued_through=accrue_until
+    )
+
+
+def _accrual_through(due_at: datetime) -> date:
+    # only whole days are accrued: a run at any time today posts interest through yesterday
+    return due_at.date() - timedelta(days=1)
+
+
+async def claim_deposit_accruals(session: AsyncSession, due_at: datetime, limit: int) -> Sequence[Row]:
+    return await AccrualDAL(session).claim_due_accruals(Deposit, through=_accrual_through(due_at), limit=limit)
+
+
+async def post_deposit_interest(session: AsyncSession, rows: Sequence[Row]) -> None:
+    await post_interest(session, Deposit, rows)
+
+
+async def claim_credit_accruals(session: AsyncSession, due_at: datetime, limit: int) -> Sequence[Row]:
+    return await AccrualDAL(session).claim_due_accruals(Credit, through=_accrual_through(due_at), limit=limit)
+
+
+async def post_credit_interest(session: AsyncSession, rows: Sequence[Row]) -> None:
+    await post_interest(session, Credit, rows)
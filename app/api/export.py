@@ -0,0 +1,151 @@
+# Encoders for account statement exports. Both take the partitions of a streamed
+# result and yield one chunk of bytes per partition, so memory is bounded by yield_per.
+#
+# The columnar format is a minimal Parquet-like layout that needs no extra dependency:
+#
+#   header     b"STMT" | version u8 | column count u8 | per column: name length u8, name, type u8
+#   row group  row count u32 | every column's values back to back, little-endian
+#   trailer    row count 0 as u32
+#
+# Column types: UUID is 16 raw bytes (all zeros for null), TIMESTAMP is int64 microseconds
+# since the unix epoch, INT16 is int16, MONEY is int64 minor units (scale MONEY_SCALE).
+import csv
+import io
+import struct
+import sys
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator
+
+from sqlalchemy.engine import Row
+
+from app.money import MONEY_SCALE
+
+
+STATEMENT_COLUMNS = (
+    "id", "created_at", "transaction_type_id", "tag_id", "amount", "signed_amount", "balance"
+)
+
+COLUMNAR_MAGIC = b"STMT"
+COLUMNAR_VERSION = 1
+
+UUID, TIMESTAMP, INT16, MONEY = 1, 2, 3, 4
+COLUMNAR_TYPES = (UUID, TIMESTAMP, INT16, UUID, MONEY, MONEY, MONEY)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+NULL_UUID = bytes(16)
+
+
+async def statement_csv_chunks(
+        partitions: AsyncIterator[list[Row]], opening_balance: Decimal
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STATEMENT_COLUMNS)
+
+    balance = opening_balance
+    async for partition in partitions:
+        for transaction_id, created_at, transaction_type_id, tag_id, amount, signed_amount in partition:
+            balance += signed_amount
+            writer.writerow((
+                transaction_id, created_at.isoformat(), transaction_type_id,
+                tag_id or "", amount, signed_amount, balance
+            ))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _columnar_header() -> bytes:
+    header = bytearray(COLUMNAR_MAGIC)
+    header += struct.pack("<BB", COLUMNAR_VERSION, len(STATEMENT_COLUMNS))
+    for name, column_type in zip(STATEMENT_COLUMNS, COLUMNAR_TYPES):
+        header += struct.pack("<B", len(name)) + name.encode() + struct.pack("<B", column_type)
+    return bytes(header)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _to_minor_units(amount: Decimal) -> int:
+    return int(amount.scaleb(MONEY_SCALE))
+
+
+async def statement_columnar_chunks(
+        partitions: AsyncIterator[list[Row]], opening_balance: Decimal
+) -> AsyncIterator[bytes]:
+    yield _columnar_header()
+
+    balance = _to_minor_units(opening_balance)
+    async for partition in partitions:
+        transaction_ids, created_ats, transaction_type_ids, tag_ids, amounts, signed_amounts = \
+            zip(*partition)
+
+        signed_amounts = array("q", map(_to_minor_units, signed_amounts))
+        balances = array("q")
+        for signed_amount in signed_amounts:
+            balance += signed_amount
+            balances.append(balance)
+
+        yield b"".join((
+            struct.pack("<I", len(partition)),
+            b"".join(transaction_id.bytes for transaction_id in transaction_ids),
+            _little_endian(array("q", ((created_at - EPOCH) // MICROSECOND for created_at in created_ats))),
+            _little_endian(array("h", transaction_type_ids)),
+            b"".join(NULL_UUID if tag_id is None else tag_id.bytes for tag_id in tag_ids),
+            _little_endian(array("q", map(_to_minor_units, amounts))),
+            _little_endian(signed_amounts),
+            _little_endian(balances),
+        ))
+
+    yield struct.pack("<I", 0)
+
+
+def read_statement_columnar(data: bytes) -> list[tuple]:
+    """Decode a columnar statement back into rows, for checks and benchmarks."""
+    if data[:4] != COLUMNAR_MAGIC:
+        raise ValueError("not a columnar statement")
+    offset = 6
+    column_types = []
+    for _ in range(data[5]):
+        name_length = data[offset]
+        offset += 1 + name_length
+        column_types.append(data[offset])
+        offset += 1
+
+    rows = []
+    while True:
+        (row_count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        if row_count == 0:
+            return rows
+
+        columns = []
+        for column_type in column_types:
+            if column_type == UUID:
+                values = [
+                    None if chunk == NULL_UUID else uuid.UUID(bytes=chunk)
+                    for chunk in (data[offset + i*16:offset + (i + 1)*16] for i in range(row_count))
+                ]
+                offset += 16 * row_count
+            else:
+                values = array("h" if column_type == INT16 else "q")
+                values.frombytes(data[offset:offset + values.itemsize * row_count])
+                if sys.byteorder == "big":
+                    values.byteswap()
+                offset += values.itemsize * row_count
+                if column_type == TIMESTAMP:
+                    values = [EPOCH + value * MICROSECOND for value in values]
+                elif column_type == MONEY:
+                    values = [Decimal(value).scaleb(-MONEY_SCALE) for value in values]
+            columns.append(values)
+        rows.extend(zip(*columns))
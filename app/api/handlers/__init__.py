@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from app.api.handlers import transaction, account, user, tag, transfer, credit, deposit
+from app.api.handlers import transaction, account, user, tag, transfer, credit, deposit, metrics, \
+    report
 
 
 router = APIRouter(
@@ -14,3 +15,5 @@ router.include_router(tag.router)
 router.include_router(transfer.router)
 router.include_router(credit.router)
 router.include_router(deposit.router)
+router.include_router(report.router)
+router.include_router(metrics.router)
@@ -1,15 +1,19 @@
 import uuid
-from typing import Sequence
+from datetime import datetime
+from typing import Sequence, AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.account import AccountCreate, ShowAccount, \
-    UpdateAccountRequest, UpdatedAccountResponse, DeletedAccountResponse, CreatedAccountResponse
+    UpdateAccountRequest, UpdatedAccountResponse, DeletedAccountResponse, CreatedAccountResponse, \
+    ReconciledAccountResponse, StatementFormat
 from app.api.schemas.currency import ShowCurrency
-from app.api.schemas.tag import ShowTag
-from app.api.schemas.transaction import ShowTransaction, ShowTransactionType, OrderBy
-from app.db.dals import AccountDAL, CurrencyDAL
+from app.api.schemas.transaction import ShowTransaction, OrderBy
+from app.api.export import statement_csv_chunks, statement_columnar_chunks
+from app.api.serialization import serialize_transaction
+from app.db.dals import AccountDAL, CurrencyDAL, BalanceSnapshotDAL
 from app.db.session import get_db
 
 
@@ -80,13 +84,32 @@ async def _delete_account(account_id: uuid.UUID, db) -> DeletedAccountResponse:
             return DeletedAccountResponse(deleted_account_id=deleted_account_id)
 
 
+async def _reconcile_account(account_id: uuid.UUID, db) -> ReconciledAccountResponse:
+    async with db as session:
+        async with session.begin():
+            snapshot_dal = BalanceSnapshotDAL(session)
+            balance, expected_balance, checkpoint_at, scanned_transactions = \
+                await snapshot_dal.reconcile(account_id=account_id)
+
+            difference = balance - expected_balance
+            return ReconciledAccountResponse(
+                account_id=account_id,
+                balance=balance,
+                expected_balance=expected_balance,
+                difference=difference,
+                is_consistent=difference == 0,
+                checkpoint_at=checkpoint_at,
+                scanned_transactions=scanned_transactions
+            )
+
+
 async def _get_account_transactions(
         account_id: uuid.UUID,
         db,
         transaction_type_id: int | None = None,
         tag_id: uuid.UUID | None = None,
         order_by: OrderBy = OrderBy("id")
-) -> Sequence[ShowTransaction] | None:
+) -> list[dict]:
     async with db as session:
         async with session.begin():
             account_dal = AccountDAL(session)
@@ -97,29 +120,33 @@ async def _get_account_transactions(
                 order_by=order_by
             )
 
-            return tuple(ShowTransaction(
-                id=transaction.id,
-                transaction_type=ShowTransactionType(
-                    id=transaction_type.id,
-                    name=transaction_type.name
-                ),
-                amount=transaction.amount,
-                tag=ShowTag(
-                    id=tag.id,
-                    name=tag.name
-                ) if tag_id is not None else None,
-                account=ShowAccount(
-                    id=account.id,
-                    name=account.name,
-                    balance=account.balance,
-                    currency=ShowCurrency(
-                        id=currency.id,
-                        name=currency.name,
-                    ),
-                    created_at=account.created_at,
-                ),
-                created_at=transaction.created_at
-            ) for transaction, account, tag, transaction_type, currency in account_transactions)
+            return [serialize_transaction(*row) for row in account_transactions]
+
+
+async def _stream_statement(
+        account_id: uuid.UUID,
+        db,
+        statement_format: StatementFormat,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+) -> AsyncIterator[bytes]:
+    async with db as session:
+        async with session.begin():
+            account_dal = AccountDAL(session)
+            await account_dal.check_if_account_exists(account_id=account_id)
+
+            opening_balance = await account_dal.get_balance_before(
+                account_id=account_id, created_at=date_from
+            )
+
+            transactions = await account_dal.stream_statement(
+                account_id=account_id, date_from=date_from, date_to=date_to
+            )
+
+            encode = statement_csv_chunks if statement_format == StatementFormat.csv \
+                else statement_columnar_chunks
+            async for chunk in encode(transactions.partitions(), opening_balance):
+                yield chunk
 
 
 @router.post("/")
@@ -179,12 +206,12 @@ async def delete_account(
     return deleted_account_response
 
 
-@router.get("/transactions/")
+@router.get("/transactions/", response_model=Sequence[ShowTransaction])
 async def get_account_transactions(
         account_id: uuid.UUID, db: AsyncSession = Depends(get_db), order_by:
         OrderBy = OrderBy("id"), tag_id: uuid.UUID | None = None,
         transaction_type_id: int | None = None
-) -> Sequence[ShowTransaction]:
+) -> Response:
     try:
         account_transactions = await _get_account_transactions(
             account_id=account_id,
@@ -196,4 +223,47 @@ async def get_account_transactions(
     except HTTPException as exception:
         raise exception
 
-    return account_transactions
+    return ORJSONResponse(account_transactions)
+
+
+@router.get("/statement/")
+async def export_statement(
+        account_id: uuid.UUID, db: AsyncSession = Depends(get_db),
+        statement_format: StatementFormat = Query(StatementFormat.csv, alias="format"),
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+) -> StreamingResponse:
+    statement = _stream_statement(
+        account_id=account_id, db=db, statement_format=statement_format,
+        date_from=date_from, date_to=date_to
+    )
+    # pull the first chunk here so a missing account is still a 404, not a broken stream
+    try:
+        first_chunk = await anext(statement, b"")
+    except HTTPException as exception:
+        raise exception
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first_chunk
+        async for chunk in statement:
+            yield chunk
+
+    if statement_format == StatementFormat.csv:
+        media_type, extension = "text/csv", "csv"
+    else:
+        media_type, extension = "application/octet-stream", "stmt"
+    return StreamingResponse(body(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="statement-{account_id}.{extension}"'
+    })
+
+
+@router.post("/reconcile/", response_model=ReconciledAccountResponse)
+async def reconcile_account(
+        account_id: uuid.UUID, db: AsyncSession = Depends(get_db)
+) -> ReconciledAccountResponse:
+    try:
+        reconciled_account_response = await _reconcile_account(account_id, db)
+    except HTTPException as exception:
+        raise exception
+
+    return reconciled_account_response
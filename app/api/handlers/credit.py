@@ -2,13 +2,16 @@ import uuid
 from typing import Sequence
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.idempotency import run_idempotent, complete_idempotent, IdempotencyKeyHeader
 from app.api.schemas.account import ShowAccount
 from app.api.schemas.credit import CreateCreditRequest, CreatedCreditResponse, ShowCredit, \
     ClosedCreditResponse, CloseCreditRequest, UpdateCreditRequest, UpdatedCreditResponse
 from app.api.schemas.currency import ShowCurrency
-from app.db.dals import CreditDAL, AccountDAL, CurrencyDAL
+from app.api.serialization import serialize_product
+from app.db.dals import CreditDAL
 from app.db.session import get_db
 
 
@@ -25,37 +28,30 @@ async def _create_new_credit(request_body: CreateCreditRequest, db) -> CreatedCr
                 name=request_body.name,
                 amount=request_body.amount,
                 account_id=request_body.account_id,
-                tag_id=request_body.tag_id
+                tag_id=request_body.tag_id,
+                matures_at=request_body.matures_at,
+                interest_rate=request_body.interest_rate,
+                term_days=request_body.term_days
             )
-            return CreatedCreditResponse(
+            created_credit_response = CreatedCreditResponse(
                 created_credit_id=credit.id,
                 created_credit_transaction_id=transaction.id
             )
+            await complete_idempotent(session, created_credit_response)
+            return created_credit_response
 
 
-async def _get_account_credits(account_id: uuid.UUID, db) -> Sequence[ShowCredit]:
+async def _get_account_credits(account_id: uuid.UUID, db) -> list[dict]:
     async with db as session:
         async with session.begin():
             credit_dal = CreditDAL(session)
 
             account_credits = await credit_dal.get_account_credits(account_id=account_id)
 
-            return tuple(ShowCredit(
-                id=credit.id,
-                name=credit.name,
-                amount=credit.amount,
-                account=ShowAccount(
-                    id=account.id,
-                    name=account.name,
-                    balance=account.balance,
-                    currency=ShowCurrency(
-                        id=currency.id,
-                        name=currency.name
-                    ),
-                    created_at=account.created_at
-                ),
-                is_open=credit.is_open
-            ) for account, credit, currency in account_credits)
+            return [
+                serialize_product(credit, account, currency)
+                for account, credit, currency in account_credits if credit is not None
+            ]
 
 
 async def _get_credit_by_id(credit_id: uuid.UUID, db) -> ShowCredit:
@@ -63,12 +59,12 @@ async def _get_credit_by_id(credit_id: uuid.UUID, db) -> ShowCredit:
         async with session.begin():
             credit_dal = CreditDAL(session)
 
-            credit = await credit_dal.get_credit_by_id(
+            credit = await credit_dal.get_credit_details_by_id(
                 credit_id=credit_id
             )
 
-            account = await AccountDAL(session).get_account_by_id(credit.account_id)
-            currency = await CurrencyDAL(session).get_currency_by_id(account.currency_id)
+            account = credit.account
+            currency = account.currency
 
             return ShowCredit(
                 id=credit.id,
@@ -84,7 +80,11 @@ async def _get_credit_by_id(credit_id: uuid.UUID, db) -> ShowCredit:
                     ),
                     created_at=account.created_at
                 ),
-                is_open=credit.is_open
+                is_open=credit.is_open,
+                matures_at=credit.matures_at,
+                interest_rate=credit.interest_rate,
+                term_days=credit.term_days,
+                accrued_through=credit.accrued_through
             )
 
 
@@ -120,11 +120,12 @@ async def _close_credit(request_body: CloseCreditRequest, db) -> ClosedCreditRes
             )
 
 
-@router.get("/all/")
+@router.get("/all/", response_model=Sequence[ShowCredit])
 async def get_account_credits(
         account_id: uuid.UUID, db: AsyncSession = Depends(get_db)
-) -> Sequence[ShowCredit]:
-    return await _get_account_credits(account_id, db=db)
+) -> Response:
+    account_credits = await _get_account_credits(account_id, db=db)
+    return ORJSONResponse(account_credits)
 
 
 @router.get("/", response_model=ShowCredit)
@@ -138,9 +139,13 @@ async def get_credit(credit_id: uuid.UUID, db: AsyncSession = Depends(get_db)) -
 
 @router.post("/", response_model=CreatedCreditResponse)
 async def create_credit(
-        request_body: CreateCreditRequest, db: AsyncSession = Depends(get_db)
+        request_body: CreateCreditRequest, db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = IdempotencyKeyHeader
 ) -> CreatedCreditResponse:
-    created_credit_response = await _create_new_credit(request_body, db=db)
+    created_credit_response = await run_idempotent(
+        idempotency_key, "POST /api/credit/", request_body, db,
+        lambda: _create_new_credit(request_body, db=db)
+    )
     return created_credit_response
 
 
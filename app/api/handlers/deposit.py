@@ -2,13 +2,16 @@ import uuid
 from typing import Sequence
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.idempotency import run_idempotent, complete_idempotent, IdempotencyKeyHeader
 from app.api.schemas.account import ShowAccount
 from app.api.schemas.deposit import CreateDepositRequest, CreatedDepositResponse, ShowDeposit, \
     ClosedDepositResponse, CloseDepositRequest, UpdateDepositRequest, UpdatedDepositResponse
 from app.api.schemas.currency import ShowCurrency
-from app.db.dals import DepositDAL, AccountDAL, CurrencyDAL
+from app.api.serialization import serialize_product
+from app.db.dals import DepositDAL
 from app.db.session import get_db
 
 
@@ -25,37 +28,30 @@ async def _create_new_deposit(request_body: CreateDepositRequest, db) -> Created
                 name=request_body.name,
                 amount=request_body.amount,
                 account_id=request_body.account_id,
-                tag_id=request_body.tag_id
+                tag_id=request_body.tag_id,
+                matures_at=request_body.matures_at,
+                interest_rate=request_body.interest_rate,
+                term_days=request_body.term_days
             )
-            return CreatedDepositResponse(
+            created_deposit_response = CreatedDepositResponse(
                 created_deposit_id=deposit.id,
                 created_deposit_transaction_id=transaction.id
             )
+            await complete_idempotent(session, created_deposit_response)
+            return created_deposit_response
 
 
-async def _get_account_deposits(account_id: uuid.UUID, db) -> Sequence[ShowDeposit]:
+async def _get_account_deposits(account_id: uuid.UUID, db) -> list[dict]:
     async with db as session:
         async with session.begin():
             deposit_dal = DepositDAL(session)
 
             account_deposits = await deposit_dal.get_account_deposits(account_id=account_id)
 
-            return tuple(ShowDeposit(
-                id=deposit.id,
-                name=deposit.name,
-                amount=deposit.amount,
-                account=ShowAccount(
-                    id=account.id,
-                    name=account.name,
-                    balance=account.balance,
-                    currency=ShowCurrency(
-                        id=currency.id,
-                        name=currency.name
-                    ),
-                    created_at=account.created_at
-                ),
-                is_open=deposit.is_open
-            ) for account, deposit, currency in account_deposits)
+            return [
+                serialize_product(deposit, account, currency)
+                for account, deposit, currency in account_deposits if deposit is not None
+            ]
 
 
 async def _get_deposit_by_id(deposit_id: uuid.UUID, db) -> ShowDeposit:
@@ -63,12 +59,12 @@ async def _get_deposit_by_id(deposit_id: uuid.UUID, db) -> ShowDeposit:
         async with session.begin():
             deposit_dal = DepositDAL(session)
 
-            deposit = await deposit_dal.get_deposit_by_id(
+            deposit = await deposit_dal.get_deposit_details_by_id(
                 deposit_id=deposit_id
             )
 
-            account = await AccountDAL(session).get_account_by_id(deposit.account_id)
-            currency = await CurrencyDAL(session).get_currency_by_id(account.currency_id)
+            account = deposit.account
+            currency = account.currency
 
             return ShowDeposit(
                 id=deposit.id,
@@ -84,7 +80,11 @@ async def _get_deposit_by_id(deposit_id: uuid.UUID, db) -> ShowDeposit:
                     ),
                     created_at=account.created_at
                 ),
-                is_open=deposit.is_open
+                is_open=deposit.is_open,
+                matures_at=deposit.matures_at,
+                interest_rate=deposit.interest_rate,
+                term_days=deposit.term_days,
+                accrued_through=deposit.accrued_through
             )
 
 
@@ -120,11 +120,12 @@ async def _close_deposit(request_body: CloseDepositRequest, db) -> ClosedDeposit
             )
 
 
-@router.get("/all/")
+@router.get("/all/", response_model=Sequence[ShowDeposit])
 async def get_account_deposits(
         account_id: uuid.UUID, db: AsyncSession = Depends(get_db)
-) -> Sequence[ShowDeposit]:
-    return await _get_account_deposits(account_id, db=db)
+) -> Response:
+    account_deposits = await _get_account_deposits(account_id, db=db)
+    return ORJSONResponse(account_deposits)
 
 
 @router.get("/", response_model=ShowDeposit)
@@ -138,9 +139,13 @@ async def get_deposit(deposit_id: uuid.UUID, db: AsyncSession = Depends(get_db))
 
 @router.post("/", response_model=CreatedDepositResponse)
 async def create_deposit(
-        request_body: CreateDepositRequest, db: AsyncSession = Depends(get_db)
+        request_body: CreateDepositRequest, db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = IdempotencyKeyHeader
 ) -> CreatedDepositResponse:
-    created_deposit_response = await _create_new_deposit(request_body, db=db)
+    created_deposit_response = await run_idempotent(
+        idempotency_key, "POST /api/deposit/", request_body, db,
+        lambda: _create_new_deposit(request_body, db=db)
+    )
     return created_deposit_response
 
 
@@ -0,0 +1,131 @@
+import os
+
+from fastapi import APIRouter
+
+from app.api.schemas.metrics import ShowPoolMetrics, ShowCacheMetrics, ShowCacheStats, \
+    ShowTransferMetrics, ShowJobStats, ShowJobMetrics, ShowRouteQueryStats, ShowQueryMetrics
+from app.db.cache import currency_cache, transaction_type_cache, tag_cache, idempotency_cache
+from app.db.session import engine, pool_metrics, query_metrics
+from app.jobs import job_scheduler
+from app.transfer_engine import transfer_stats
+from config import QUERY_INSTRUMENTATION, SLOW_QUERY_THRESHOLD_MS
+
+
+router = APIRouter(
+    prefix="/metrics"
+)
+
+
+def _get_pool_metrics() -> ShowPoolMetrics:
+    pool = engine.pool
+    return ShowPoolMetrics(
+        pid=os.getpid(),
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        max_overflow=pool._max_overflow,
+        waits=pool_metrics.waits,
+        average_wait_ms=pool_metrics.wait_time / pool_metrics.waits * 1000 if pool_metrics.waits else .0,
+        max_wait_ms=pool_metrics.max_wait_time * 1000
+    )
+
+
+def _show_cache_stats(cache) -> ShowCacheStats:
+    return ShowCacheStats(
+        size=len(cache),
+        hits=cache.stats.hits,
+        misses=cache.stats.misses,
+        hit_ratio=cache.stats.hit_ratio
+    )
+
+
+def _get_cache_metrics() -> ShowCacheMetrics:
+    return ShowCacheMetrics(
+        pid=os.getpid(),
+        currency=_show_cache_stats(currency_cache),
+        transaction_type=_show_cache_stats(transaction_type_cache),
+        tag=_show_cache_stats(tag_cache),
+        idempotency=_show_cache_stats(idempotency_cache)
+    )
+
+
+def _get_transfer_metrics() -> ShowTransferMetrics:
+    lock_acquisitions = transfer_stats.lock_acquisitions
+    return ShowTransferMetrics(
+        pid=os.getpid(),
+        transfers=transfer_stats.transfers,
+        retries=transfer_stats.retries,
+        retries_exhausted=transfer_stats.retries_exhausted,
+        lock_acquisitions=lock_acquisitions,
+        average_lock_wait_ms=transfer_stats.lock_wait_time / lock_acquisitions * 1000 if lock_acquisitions else .0,
+        max_lock_wait_ms=transfer_stats.max_lock_wait_time * 1000
+    )
+
+
+def _get_job_metrics() -> ShowJobMetrics:
+    jobs = []
+    for job in job_scheduler.jobs.values():
+        stats = job.stats
+        items = stats.processed + stats.failed
+        jobs.append(ShowJobStats(
+            name=job.name,
+            workers=job.workers,
+            batch_size=job.batch_size,
+            batches=stats.batches,
+            failed_batches=stats.failed_batches,
+            processed=stats.processed,
+            failed=stats.failed,
+            average_batch_ms=stats.batch_time / stats.batches * 1000 if stats.batches else .0,
+            average_item_ms=stats.item_time / items * 1000 if items else .0,
+            max_item_ms=stats.max_item_time * 1000,
+            items_per_second=items / stats.batch_time if stats.batch_time else .0
+        ))
+    return ShowJobMetrics(pid=os.getpid(), jobs=jobs)
+
+
+def _get_query_metrics() -> ShowQueryMetrics:
+    routes = []
+    for route, stats in sorted(query_metrics.routes.items()):
+        routes.append(ShowRouteQueryStats(
+            route=route,
+            requests=stats.requests,
+            queries=stats.queries.sum,
+            db_time_ms=stats.db_time_ms.sum,
+            average_queries=stats.queries.sum / stats.requests,
+            average_db_time_ms=stats.db_time_ms.sum / stats.requests,
+            queries_histogram=stats.queries.cumulative(),
+            db_time_ms_histogram=stats.db_time_ms.cumulative()
+        ))
+    return ShowQueryMetrics(
+        pid=os.getpid(),
+        enabled=QUERY_INSTRUMENTATION,
+        slow_query_threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+        slow_queries=query_metrics.slow_queries,
+        routes=routes
+    )
+
+
+@router.get("/pool/", response_model=ShowPoolMetrics)
+async def get_pool_metrics() -> ShowPoolMetrics:
+    return _get_pool_metrics()
+
+
+@router.get("/cache/", response_model=ShowCacheMetrics)
+async def get_cache_metrics() -> ShowCacheMetrics:
+    return _get_cache_metrics()
+
+
+@router.get("/transfers/", response_model=ShowTransferMetrics)
+async def get_transfer_metrics() -> ShowTransferMetrics:
+    return _get_transfer_metrics()
+
+
+@router.get("/jobs/", response_model=ShowJobMetrics)
+async def get_job_metrics() -> ShowJobMetrics:
+    return _get_job_metrics()
+
+
+@router.get("/queries/", response_model=ShowQueryMetrics)
+async def get_query_metrics() -> ShowQueryMetrics:
+    return _get_query_metrics()
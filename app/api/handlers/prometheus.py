@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.monitoring import generate_metrics
+
+
+router = APIRouter()
+
+
+# a plain def runs in the threadpool, reading the multiprocess files doesn't block the loop
+@router.get("/metrics", include_in_schema=False)
+def get_prometheus_metrics() -> Response:
+    # CONTENT_TYPE_LATEST already carries a charset, media_type would append a second one
+    return Response(generate_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
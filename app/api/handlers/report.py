@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.report import ReportPeriod, ShowReport
+from app.db.dals import ReportDAL
+from app.db.session import get_db
+
+
+router = APIRouter(
+    prefix="/report"
+)
+
+
+async def _get_report(
+        db,
+        period: ReportPeriod,
+        account_id: uuid.UUID | None = None,
+        tag_id: uuid.UUID | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+) -> ShowReport:
+    async with db as session:
+        async with session.begin():
+            report_dal = ReportDAL(session)
+            report_rows = await report_dal.get_report(
+                period=period, account_id=account_id, tag_id=tag_id,
+                date_from=date_from, date_to=date_to
+            )
+
+    # one list per column instead of one object per row
+    bucket, currency_id, tag_id, transaction_type_id, total, count = \
+        map(list, zip(*report_rows)) if report_rows else ([], [], [], [], [], [])
+
+    return ShowReport(
+        period=period,
+        bucket=bucket,
+        currency_id=currency_id,
+        tag_id=tag_id,
+        transaction_type_id=transaction_type_id,
+        total=total,
+        count=count
+    )
+
+
+@router.get("/", response_model=ShowReport)
+async def get_report(
+        db: AsyncSession = Depends(get_db),
+        period: ReportPeriod = ReportPeriod.month,
+        account_id: uuid.UUID | None = None,
+        tag_id: uuid.UUID | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+) -> ShowReport:
+    try:
+        report = await _get_report(
+            db=db, period=period, account_id=account_id, tag_id=tag_id,
+            date_from=date_from, date_to=date_to
+        )
+    except HTTPException as exception:
+        raise exception
+
+    return report
@@ -1,19 +1,25 @@
 import uuid
-from typing import Sequence
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.idempotency import run_idempotent, complete_idempotent, IdempotencyKeyHeader
+from app.api.pagination import encode_cursor, decode_cursor
 from app.api.schemas import OrderBy
+from app.api.serialization import serialize_transaction
 from app.api.schemas.account import ShowAccount
 from app.api.schemas.currency import ShowCurrency
 from app.api.schemas.tag import ShowTag
 from app.api.schemas.transaction import TransactionCreate, ShowTransaction, \
     UpdateTransactionRequest, UpdatedTransactionResponse, DeletedTransactionResponse, \
-    ShowTransactionType, CreatedTransactionResponse
-from app.db.dals import TransactionDAL, AccountDAL, TagDAL, CurrencyDAL
-from app.db.session import get_db, TransactionTypeEnum
-from app.exception import TransactionTypeNotFound
+    ShowTransactionType, CreatedTransactionResponse, TransactionBulkCreate, \
+    CreatedTransactionsBulkResponse, TransactionsPage
+from app.db.dals import TransactionDAL, TransactionTypeDAL
+from app.db.session import get_db
 
 router = APIRouter(
     prefix="/transaction"
@@ -34,7 +40,23 @@ async def _create_new_transaction(
                 tag_id=request_body.tag_id
             )
 
-            return CreatedTransactionResponse(created_transaction_id=transaction.id)
+            created_transaction_response = CreatedTransactionResponse(created_transaction_id=transaction.id)
+            await complete_idempotent(session, created_transaction_response)
+            return created_transaction_response
+
+
+async def _create_new_transactions_bulk(
+        request_body: TransactionBulkCreate, db
+) -> CreatedTransactionsBulkResponse:
+    async with db as session:
+        async with session.begin():
+            transaction_dal = TransactionDAL(session)
+
+            transaction_ids = await transaction_dal.create_transactions_bulk(
+                transactions=[transaction.dict() for transaction in request_body.transactions]
+            )
+
+            return CreatedTransactionsBulkResponse(created_transaction_ids=transaction_ids)
 
 
 async def _get_transaction_by_id(transaction_id: uuid.UUID, db) -> ShowTransaction:
@@ -42,26 +64,26 @@ async def _get_transaction_by_id(transaction_id: uuid.UUID, db) -> ShowTransacti
         async with session.begin():
             transaction_dal = TransactionDAL(session)
 
-            transaction = await transaction_dal.get_transaction_by_id(
+            transaction = await transaction_dal.get_transaction_details_by_id(
                 transaction_id=transaction_id
             )
 
-            tag = await TagDAL(session).get_tag_by_id(transaction.tag_id)
-            account = await AccountDAL(session).get_account_by_id(transaction.account_id)
-            transaction_type_name = TransactionTypeEnum(transaction.transaction_type_id).name
-            currency = await CurrencyDAL(session).get_currency_by_id(account.currency_id)
+            tag = transaction.tag
+            account = transaction.account
+            transaction_type = transaction.transaction_type
+            currency = account.currency
 
             return ShowTransaction(
                 id=transaction.id,
                 transaction_type=ShowTransactionType(
-                    id=transaction.transaction_type_id,
-                    name=transaction_type_name
+                    id=transaction_type.id,
+                    name=transaction_type.name
                 ),
                 amount=transaction.amount,
                 tag=ShowTag(
                     id=tag.id,
                     name=tag.name
-                ),
+                ) if tag is not None else None,
                 account=ShowAccount(
                     id=account.id,
                     name=account.name,
@@ -79,52 +101,56 @@ async def _get_transaction_by_id(transaction_id: uuid.UUID, db) -> ShowTransacti
 async def _get_transaction_type_by_id(transaction_type_id: int, db) -> ShowTransactionType:
     async with db as session:
         async with session.begin():
-            try:
-                transaction_type_enum = TransactionTypeEnum(transaction_type_id)
-            except ValueError:
-                raise TransactionTypeNotFound(transaction_type_id=transaction_type_id)
+            transaction_type_dal = TransactionTypeDAL(session)
+            transaction_type = await transaction_type_dal.get_transaction_type_by_id(
+                transaction_type_id=transaction_type_id
+            )
 
             return ShowTransactionType(
-                id=transaction_type_enum.value,
-                name=transaction_type_enum.name
+                id=transaction_type.id,
+                name=transaction_type.name
             )
 
 
 async def _get_transactions(
         db, transaction_type_id: int | None = None,
-        tag_id: uuid.UUID | None = None, order_by: OrderBy = OrderBy("id")
-) -> Sequence[ShowTransaction]:
+        tag_id: uuid.UUID | None = None, order_by: OrderBy = OrderBy("id"),
+        limit: int = 100, after: str | None = None
+) -> dict:
     async with db as session:
         async with session.begin():
             transaction_dal = TransactionDAL(session)
             transactions = await transaction_dal.get_transactions(
+                transaction_type_id=transaction_type_id,
+                tag_id=tag_id, order_by=order_by, limit=limit,
+                after=decode_cursor(after) if after is not None else None
+            )
+
+        next_cursor = None
+        if len(transactions) == limit:
+            last_transaction = transactions[-1][0]
+            next_cursor = encode_cursor(last_transaction.created_at, last_transaction.id)
+
+        return {
+            "transactions": [serialize_transaction(*row) for row in transactions],
+            "next_cursor": next_cursor,
+        }
+
+
+async def _stream_transactions(
+        db, transaction_type_id: int | None = None,
+        tag_id: uuid.UUID | None = None, order_by: OrderBy = OrderBy("id")
+) -> AsyncIterator[bytes]:
+    async with db as session:
+        async with session.begin():
+            transaction_dal = TransactionDAL(session)
+            transactions = await transaction_dal.stream_transactions(
                 transaction_type_id=transaction_type_id,
                 tag_id=tag_id, order_by=order_by
             )
 
-        return tuple(ShowTransaction(
-            id=transaction.id,
-            transaction_type=ShowTransactionType(
-                id=transaction_type.id,
-                name=transaction_type.name
-            ),
-            amount=transaction.amount,
-            tag=ShowTag(
-                id=tag.id,
-                name=tag.name
-            ) if tag_id is not None else None,
-            account=ShowAccount(
-                id=account.id,
-                name=account.name,
-                balance=account.balance,
-                currency=ShowCurrency(
-                    id=currency.id,
-                    name=currency.name
-                ),
-                created_at=account.created_at
-            ),
-            created_at=transaction.created_at
-        ) for transaction, account, tag, transaction_type, currency in transactions)
+            async for partition in transactions.partitions():
+                yield b"".join(orjson.dumps(serialize_transaction(*row)) + b"\n" for row in partition)
 
 
 async def _update_transaction(
@@ -152,16 +178,32 @@ async def _delete_transaction(transaction_id: uuid.UUID, db) -> DeletedTransacti
 
 @router.post("/")
 async def create_transaction(
-        request_body: TransactionCreate, db: AsyncSession = Depends(get_db)
+        request_body: TransactionCreate, db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = IdempotencyKeyHeader
 ) -> CreatedTransactionResponse:
     try:
-        created_transaction_response = await _create_new_transaction(request_body, db)
+        created_transaction_response = await run_idempotent(
+            idempotency_key, "POST /api/transaction/", request_body, db,
+            lambda: _create_new_transaction(request_body, db)
+        )
     except HTTPException as exception:
         raise exception
 
     return created_transaction_response
 
 
+@router.post("/bulk/")
+async def create_transactions_bulk(
+        request_body: TransactionBulkCreate, db: AsyncSession = Depends(get_db)
+) -> CreatedTransactionsBulkResponse:
+    try:
+        created_transactions_response = await _create_new_transactions_bulk(request_body, db)
+    except HTTPException as exception:
+        raise exception
+
+    return created_transactions_response
+
+
 @router.get("/", response_model=ShowTransaction)
 async def get_transaction(
         transaction_id: uuid.UUID, db: AsyncSession = Depends(get_db)
@@ -224,19 +266,46 @@ async def get_transaction_type(
     return transaction_type
 
 
-@router.get("/all/")
+@router.get("/all/", response_model=TransactionsPage)
 async def get_transactions(
         db: AsyncSession = Depends(get_db),
         transaction_type_id: int | None = None,
         tag_id: uuid.UUID | None = None,
-        order_by: OrderBy = OrderBy("id")
-):
+        order_by: OrderBy = OrderBy("id"),
+        limit: int = Query(100, gt=0, le=1000),
+        after: str | None = None
+) -> Response:
     try:
         transactions = await _get_transactions(
             db=db, transaction_type_id=transaction_type_id,
-            tag_id=tag_id, order_by=order_by
+            tag_id=tag_id, order_by=order_by, limit=limit, after=after
         )
     except HTTPException as exception:
         raise exception
 
-    return transactions
+    return ORJSONResponse(transactions)
+
+
+@router.get("/all/stream/")
+async def stream_transactions(
+        db: AsyncSession = Depends(get_db),
+        transaction_type_id: int | None = None,
+        tag_id: uuid.UUID | None = None,
+        order_by: OrderBy = OrderBy("id")
+) -> StreamingResponse:
+    transactions = _stream_transactions(
+        db=db, transaction_type_id=transaction_type_id,
+        tag_id=tag_id, order_by=order_by
+    )
+    # pull the first chunk here so filter validation errors still map to HTTP errors
+    try:
+        first_chunk = await anext(transactions, b"")
+    except HTTPException as exception:
+        raise exception
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first_chunk
+        async for chunk in transactions:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -1,11 +1,16 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-import requests
 
-from app.api.schemas.transfer import TransferCreate, CreatedTransferResponse
+from app.api.idempotency import run_idempotent, complete_idempotent, IdempotencyKeyHeader
+from app.api.schemas.transfer import TransferCreate, CreatedTransferResponse, TransferBatchCreate, \
+    CreatedTransfersBatchResponse
 from app.db.dals import TransactionDAL, AccountDAL, CurrencyDAL
 from app.db.session import get_db, TransactionTypeEnum
-from config import EXCHANGE_RATE_API_URL, EXCHANGE_RATE_API_KEY
+from app.exchange_rate import exchange_rate_client
+from app.money import to_money
+from app.transfer_engine import run_transfer
 
 
 router = APIRouter(
@@ -13,68 +18,151 @@ router = APIRouter(
 )
 
 
-async def _create_new_transfer(request_body: TransferCreate, db) -> CreatedTransferResponse | None:
+async def _get_transfer_currencies(request_body: TransferCreate, db) -> (str, str):
     async with db as session:
         async with session.begin():
             account_dal = AccountDAL(session)
             account_from = await account_dal.get_account_by_id(request_body.from_account_id)
             account_to = await account_dal.get_account_by_id(request_body.to_account_id)
 
-            if account_from.balance < request_body.amount_from:
-                raise HTTPException(
-                    status_code=422,
-                    detail="The account balance must not be less than the transfer amount!"
-                )
-
             currency_dal = CurrencyDAL(session)
             currency_from = await currency_dal.get_currency_by_id(account_from.currency_id)
             currency_to = await currency_dal.get_currency_by_id(account_to.currency_id)
 
-            response = requests.get(
-                EXCHANGE_RATE_API_URL +
-                f"?from={currency_from.name}"
-                f"&to={currency_to.name}"
-                f"&amount={request_body.amount_from}"
-            )
-
-            if response.status_code != 200:
-                raise HTTPException(status_code=500)
+            return currency_from.name, currency_to.name
 
-            amount_to = response.json().get("result")
 
-            transaction_dal = TransactionDAL(session)
-
-            checkpoint = session.begin_nested()
-            try:
-                transaction_from = await transaction_dal.create_transaction(
-                    transaction_type_id=TransactionTypeEnum.money_transfer_sender.value,
-                    amount=request_body.amount_from,
-                    account_id=request_body.from_account_id
-                )
+async def _create_new_transfer(request_body: TransferCreate, db) -> CreatedTransferResponse | None:
+    currency_from, currency_to = await _get_transfer_currencies(request_body, db)
+
+    # the exchange rate is resolved before the write transaction opens,
+    # so a slow rate provider never holds row locks or a pooled connection
+    amount_to = await exchange_rate_client.convert(
+        currency_from, currency_to, request_body.amount_from
+    )
+
+    async def write_transfer(session) -> CreatedTransferResponse:
+        transaction_dal = TransactionDAL(session)
+
+        transaction_from = await transaction_dal.create_transaction(
+            transaction_type_id=TransactionTypeEnum.money_transfer_sender.value,
+            amount=request_body.amount_from,
+            account_id=request_body.from_account_id,
+            non_negative=True
+        )
+
+        transaction_to = await transaction_dal.create_transaction(
+            transaction_type_id=TransactionTypeEnum.money_transfer_receiver.value,
+            amount=amount_to,
+            account_id=request_body.to_account_id,
+            created_at=transaction_from.created_at
+        )
+
+        created_transfer_response = CreatedTransferResponse(
+            created_from_transaction_id=transaction_from.id,
+            created_to_transaction_id=transaction_to.id
+        )
+        await complete_idempotent(session, created_transfer_response)
+        return created_transfer_response
+
+    return await run_transfer(
+        db,
+        account_ids={request_body.from_account_id, request_body.to_account_id},
+        work=write_transfer
+    )
+
+
+async def _get_batch_currencies(request_body: TransferBatchCreate, db) -> dict:
+    async with db as session:
+        async with session.begin():
+            account_ids = set()
+            for transfer in request_body.transfers:
+                account_ids.update((transfer.from_account_id, transfer.to_account_id))
 
-                transaction_to = await transaction_dal.create_transaction(
-                    transaction_type_id=TransactionTypeEnum.money_transfer_receiver.value,
-                    amount=amount_to,
-                    account_id=request_body.to_account_id,
-                    created_at=transaction_from.created_at
-                )
-            except Exception as exception:
-                checkpoint.rollback()
-                raise exception
+            accounts = await AccountDAL(session).get_accounts_by_ids(account_ids)
 
-            return CreatedTransferResponse(
-                created_from_transaction_id=transaction_from.id,
-                created_to_transaction_id=transaction_to.id
-            )
+            currency_dal = CurrencyDAL(session)
+            return {
+                account_id: (await currency_dal.get_currency_by_id(account.currency_id)).name
+                for account_id, account in accounts.items()
+            }
+
+
+async def _create_new_transfers_batch(
+        request_body: TransferBatchCreate, db
+) -> CreatedTransfersBatchResponse:
+    account_currencies = await _get_batch_currencies(request_body, db)
+
+    currency_pairs = list({
+        (account_currencies[transfer.from_account_id], account_currencies[transfer.to_account_id])
+        for transfer in request_body.transfers
+    })
+    rates = dict(zip(currency_pairs, await asyncio.gather(
+        *(exchange_rate_client.get_rate(*currency_pair) for currency_pair in currency_pairs)
+    )))
+
+    transactions = []
+    for transfer in request_body.transfers:
+        rate = rates[
+            (account_currencies[transfer.from_account_id], account_currencies[transfer.to_account_id])
+        ]
+        transactions.append({
+            "transaction_type_id": TransactionTypeEnum.money_transfer_sender.value,
+            "amount": transfer.amount_from,
+            "account_id": transfer.from_account_id,
+        })
+        transactions.append({
+            "transaction_type_id": TransactionTypeEnum.money_transfer_receiver.value,
+            "amount": to_money(transfer.amount_from * rate),
+            "account_id": transfer.to_account_id,
+        })
+
+    async def write_transfers(session) -> CreatedTransfersBatchResponse:
+        transaction_dal = TransactionDAL(session)
+        transaction_ids = await transaction_dal.create_transactions_bulk(
+            transactions=transactions,
+            non_negative=True
+        )
+
+        created_transfers_response = CreatedTransfersBatchResponse(transfers=[
+            CreatedTransferResponse(
+                created_from_transaction_id=transaction_ids[i],
+                created_to_transaction_id=transaction_ids[i + 1]
+            ) for i in range(0, len(transaction_ids), 2)
+        ])
+        await complete_idempotent(session, created_transfers_response)
+        return created_transfers_response
+
+    return await run_transfer(db, account_ids=set(account_currencies), work=write_transfers)
 
 
 @router.post("/")
 async def create_transfer(
-        request_body: TransferCreate, db: AsyncSession = Depends(get_db)
+        request_body: TransferCreate, db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = IdempotencyKeyHeader
 ) -> CreatedTransferResponse:
     try:
-        created_transfer_response = await _create_new_transfer(request_body, db)
+        created_transfer_response = await run_idempotent(
+            idempotency_key, "POST /api/transfer/", request_body, db,
+            lambda: _create_new_transfer(request_body, db)
+        )
     except HTTPException as exception:
         raise exception
 
     return created_transfer_response
+
+
+@router.post("/batch/")
+async def create_transfers_batch(
+        request_body: TransferBatchCreate, db: AsyncSession = Depends(get_db),
+        idempotency_key: str | None = IdempotencyKeyHeader
+) -> CreatedTransfersBatchResponse:
+    try:
+        created_transfers_response = await run_idempotent(
+            idempotency_key, "POST /api/transfer/batch/", request_body, db,
+            lambda: _create_new_transfers_batch(request_body, db)
+        )
+    except HTTPException as exception:
+        raise exception
+
+    return created_transfers_response
@@ -1,14 +1,16 @@
+import uuid
 from typing import Sequence
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.pagination import encode_id_cursor, decode_id_cursor
 from app.api.schemas.account import ShowAccount
-from app.api.schemas.credit import ShowCredit
-from app.api.schemas.currency import ShowCurrency
-from app.api.schemas.deposit import ShowDeposit
-from app.db.dals import UserDAL, CreditDAL
-from app.db.models import Deposit
+from app.api.schemas.credit import CreditsPage
+from app.api.schemas.deposit import DepositsPage
+from app.api.serialization import serialize_account, serialize_product, serialize_currency_total
+from app.db.dals import UserDAL, CreditDAL, DepositDAL
 from app.db.session import get_db
 
 router = APIRouter(
@@ -16,88 +18,105 @@ router = APIRouter(
 )
 
 
-async def _get_user_accounts(db) -> Sequence[ShowAccount]:
+async def _get_user_accounts(db) -> list[dict]:
     async with db as session:
         async with session.begin():
             account_dal = UserDAL(session)
 
             user_accounts = await account_dal.get_accounts()
 
-            return tuple(ShowAccount(
-                id=account.id,
-                balance=account.balance,
-                name=account.name,
-                currency=ShowCurrency(
-                    id=currency.id,
-                    name=currency.name
-                ),
-                created_at=account.created_at
-            ) for account, currency in user_accounts)
+            return [serialize_account(account, currency) for account, currency in user_accounts]
 
 
-async def _get_user_credits(db) -> Sequence[ShowCredit]:
+async def _get_user_credits(
+        db, is_open: bool | None = None, account_id: uuid.UUID | None = None,
+        currency_id: int | None = None, limit: int = 100, after: str | None = None
+) -> dict:
     async with db as session:
         async with session.begin():
             credit_dal = CreditDAL(session)
 
-            account_credits = await credit_dal.get_user_credits()
-
-            return tuple(ShowCredit(
-                id=credit.id,
-                name=credit.name,
-                amount=credit.amount,
-                account=ShowAccount(
-                    id=account.id,
-                    name=account.name,
-                    balance=account.balance,
-                    currency=ShowCurrency(
-                        id=currency.id,
-                        name=currency.name
-                    ),
-                    created_at=account.created_at
-                ),
-                is_open=credit.is_open
-            ) for account, credit, currency in account_credits)
-
-
-async def _get_user_deposits(db) -> Sequence[ShowDeposit]:
+            user_credits = await credit_dal.get_user_credits(
+                is_open=is_open, account_id=account_id, currency_id=currency_id, limit=limit,
+                after=decode_id_cursor(after) if after is not None else None
+            )
+            totals = await credit_dal.get_user_credit_totals(
+                is_open=is_open, account_id=account_id, currency_id=currency_id
+            )
+
+            return {
+                "credits": [
+                    serialize_product(credit, account, currency) for credit, account, currency in user_credits
+                ],
+                "totals": [serialize_currency_total(*total) for total in totals],
+                "next_cursor": encode_id_cursor(user_credits[-1][0].id) if len(user_credits) == limit else None,
+            }
+
+
+async def _get_user_deposits(
+        db, is_open: bool | None = None, account_id: uuid.UUID | None = None,
+        currency_id: int | None = None, limit: int = 100, after: str | None = None
+) -> dict:
     async with db as session:
         async with session.begin():
-            deposit_dal = Deposit(session)
-
-            account_deposits = await deposit_dal.get_user_deposits()
-
-            return tuple(ShowDeposit(
-                id=deposit.id,
-                name=deposit.name,
-                amount=deposit.amount,
-                account=ShowAccount(
-                    id=account.id,
-                    name=account.name,
-                    balance=account.balance,
-                    currency=ShowCurrency(
-                        id=currency.id,
-                        name=currency.name
-                    ),
-                    created_at=account.created_at
-                ),
-                is_open=deposit.is_open
-            ) for account, deposit, currency in account_deposits)
-
-
-@router.get("/accounts/")
-async def get_user_accounts(db: AsyncSession = Depends(get_db)) -> Sequence[ShowAccount]:
+            deposit_dal = DepositDAL(session)
+
+            user_deposits = await deposit_dal.get_user_deposits(
+                is_open=is_open, account_id=account_id, currency_id=currency_id, limit=limit,
+                after=decode_id_cursor(after) if after is not None else None
+            )
+            totals = await deposit_dal.get_user_deposit_totals(
+                is_open=is_open, account_id=account_id, currency_id=currency_id
+            )
+
+            return {
+                "deposits": [
+                    serialize_product(deposit, account, currency) for deposit, account, currency in user_deposits
+                ],
+                "totals": [serialize_currency_total(*total) for total in totals],
+                "next_cursor": encode_id_cursor(user_deposits[-1][0].id) if len(user_deposits) == limit else None,
+            }
+
+
+@router.get("/accounts/", response_model=Sequence[ShowAccount])
+async def get_user_accounts(db: AsyncSession = Depends(get_db)) -> Response:
     user_accounts = await _get_user_accounts(db=db)
-    return user_accounts
-
-
-@router.get("/credits/")
-async def get_user_credits(db: AsyncSession = Depends(get_db)) -> Sequence[ShowCredit]:
-    user_credits = await _get_user_credits(db=db)
-    return user_credits
-
-
-@router.get("/deposits/")
-async def get_user_deposits(db: AsyncSession = Depends(get_db)) -> Sequence[ShowDeposit]:
-    user_deposits = await _get_user_deposits(db=db)
-    return user_deposits
+    return ORJSONResponse(user_accounts)
+
+
+@router.get("/credits/", response_model=CreditsPage)
+async def get_user_credits(
+        db: AsyncSession = Depends(get_db),
+        is_open: bool | None = None,
+        account_id: uuid.UUID | None = None,
+        currency_id: int | None = None,
+        limit: int = Query(100, gt=0, le=1000),
+        after: str | None = None
+) -> Response:
+    try:
+        user_credits = await _get_user_credits(
+            db=db, is_open=is_open, account_id=account_id, currency_id=currency_id,
+            limit=limit, after=after
+        )
+    except HTTPException as exception:
+        raise exception
+    return ORJSONResponse(user_credits)
+
+
+@router.get("/deposits/", response_model=DepositsPage)
+async def get_user_deposits(
+        db: AsyncSession = Depends(get_db),
+        is_open: bool | None = None,
+        account_id: uuid.UUID | None = None,
+        currency_id: int | None = None,
+        limit: int = Query(100, gt=0, le=1000),
+        after: str | None = None
+) -> Response:
+    try:
+        user_deposits = await _get_user_deposits(
+            db=db, is_open=is_open, account_id=account_id, currency_id=currency_id,
+            limit=limit, after=after
+        )
+    except HTTPException as exception:
+        raise exception
+    return ORJSONResponse(user_deposits)
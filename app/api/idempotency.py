@@ -0,0 +1,122 @@
+import hashlib
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+from fastapi import Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.cache import idempotency_cache
+from app.db.dals import IdempotencyKeyDAL
+from app.exception import IdempotencyKeyInProgress, IdempotencyKeyReused
+from config import IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_LOCK_TIMEOUT
+
+
+IdempotencyKeyHeader = Header(None, alias="Idempotency-Key", max_length=255)
+
+
+class _PendingKey:
+    def __init__(self, key: str, fingerprint: str):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.response_body = None
+
+
+_pending_key: ContextVar[_PendingKey | None] = ContextVar("pending_idempotency_key", default=None)
+
+
+def _fingerprint(scope: str, request_body: BaseModel) -> str:
+    return hashlib.sha256(f"{scope}\n{request_body.json(sort_keys=True)}".encode()).hexdigest()
+
+
+def _replay(key: str, fingerprint: str, stored: tuple[str, int, object]) -> Response:
+    stored_fingerprint, status_code, response_body = stored
+    if stored_fingerprint != fingerprint:
+        raise IdempotencyKeyReused(key=key)
+    return JSONResponse(response_body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+async def complete_idempotent(session: AsyncSession, response: BaseModel) -> None:
+    """Store the response of the idempotent request being handled, if any, in `session`.
+
+    Handlers run through run_idempotent call this in the transaction that makes their
+    writes, right before it commits, so the writes and the completed key commit together.
+    """
+    pending = _pending_key.get()
+    if pending is None:
+        return
+
+    response_body = jsonable_encoder(response)
+    completed = await IdempotencyKeyDAL(session).complete_key(
+        key=pending.key, fingerprint=pending.fingerprint, status_code=200,
+        response_body=response_body, ttl=IDEMPOTENCY_KEY_TTL
+    )
+    if not completed:
+        # the lease expired and a retry of this request already committed its writes
+        raise IdempotencyKeyInProgress(key=pending.key)
+    pending.response_body = response_body
+
+
+async def run_idempotent(
+        key: str | None,
+        scope: str,
+        request_body: BaseModel,
+        db,
+        handler: Callable[[], Awaitable[BaseModel]]
+) -> BaseModel | Response:
+    # the key is reserved in its own transaction before the handler runs, so a retry
+    # racing the original request gets a 409 instead of a second write. The handler
+    # completes the key in its own write transaction (complete_idempotent); a handler
+    # that failed before that releases the key and the client may retry with the same key.
+    # The reservation is a lease of IDEMPOTENCY_LOCK_TIMEOUT, only a completed response
+    # is kept for IDEMPOTENCY_KEY_TTL
+    if key is None:
+        return await handler()
+
+    fingerprint = _fingerprint(scope, request_body)
+    cached = idempotency_cache.get(key)
+    if cached is not None:
+        return _replay(key, fingerprint, cached)
+
+    async with db as session:
+        async with session.begin():
+            idempotency_key_dal = IdempotencyKeyDAL(session)
+            reserved = await idempotency_key_dal.reserve_key(
+                key=key, fingerprint=fingerprint, lock_timeout=IDEMPOTENCY_LOCK_TIMEOUT
+            )
+            stored_key = await idempotency_key_dal.get_key(key) if not reserved else None
+
+    if not reserved:
+        if stored_key is not None and stored_key.fingerprint != fingerprint:
+            raise IdempotencyKeyReused(key=key)
+        if stored_key is None or stored_key.status_code is None:
+            raise IdempotencyKeyInProgress(key=key)
+
+        stored = (stored_key.fingerprint, stored_key.status_code, stored_key.response_body)
+        idempotency_cache.put(key, stored)
+        return _replay(key, fingerprint, stored)
+
+    pending = _PendingKey(key, fingerprint)
+    token = _pending_key.set(pending)
+    try:
+        response = await handler()
+    except BaseException as exception:
+        # BaseException also covers the CancelledError of a client that disconnected.
+        # Once the response is stored the handler's transaction may have committed, so the
+        # key is kept: a retry replays the response, or takes the key over once the lease
+        # expires if the commit did fail
+        if pending.response_body is None:
+            async with db as session:
+                async with session.begin():
+                    await IdempotencyKeyDAL(session).release_key(key=key)
+        raise exception
+    finally:
+        _pending_key.reset(token)
+
+    if pending.response_body is None:
+        raise RuntimeError(f"{scope} returned without calling complete_idempotent")
+    idempotency_cache.put(key, (fingerprint, 200, pending.response_body))
+
+    return response
@@ -0,0 +1,30 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from app.exception import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw_cursor = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw_cursor).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor=cursor)
+
+
+def encode_id_cursor(row_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode()
+
+
+def decode_id_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor=cursor)
@@ -1,5 +1,7 @@
+import enum
 import uuid
 from datetime import datetime
+from decimal import Decimal
 
 from pydantic import Field
 
@@ -10,7 +12,7 @@ from app.api.schemas.currency import ShowCurrency
 class ShowAccount(TunedModel):
     id: uuid.UUID
     name: str
-    balance: float
+    balance: Decimal
     currency: ShowCurrency
     created_at: datetime
 
@@ -18,7 +20,7 @@ class ShowAccount(TunedModel):
 class AccountCreate(BaseModel):
     id: uuid.UUID
     name: str
-    balance: float = Field(.0, ge=0, lt=10**10)
+    balance: Decimal = Field(Decimal(0), ge=0, lt=10**10, decimal_places=2)
     currency_id: int
     created_at: datetime
 
@@ -29,7 +31,7 @@ class CreatedAccountResponse(BaseModel):
 
 class UpdateAccountRequest(BaseModel):
     name: str | None
-    balance: float | None
+    balance: Decimal | None = Field(None, decimal_places=2)
     currency_id: int | None
 
 
@@ -39,3 +41,18 @@ class UpdatedAccountResponse(BaseModel):
 
 class DeletedAccountResponse(BaseModel):
     deleted_account_id: uuid.UUID
+
+
+class ReconciledAccountResponse(BaseModel):
+    account_id: uuid.UUID
+    balance: Decimal
+    expected_balance: Decimal
+    difference: Decimal
+    is_consistent: bool
+    checkpoint_at: datetime
+    scanned_transactions: int
+
+
+class StatementFormat(enum.Enum):
+    csv = "csv"
+    columnar = "columnar"
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from app.api.schemas import BaseModel, TunedModel
 
 
@@ -8,3 +10,9 @@ class ShowCurrency(TunedModel):
 
 class CurrencyCreate(BaseModel):
     name: str
+
+
+class ShowCurrencyTotal(BaseModel):
+    currency: ShowCurrency
+    count: int
+    amount: Decimal
@@ -1,24 +1,42 @@
 import uuid
+from datetime import datetime, date
+from decimal import Decimal
 
 from pydantic import Field
 
 from app.api.schemas import BaseModel, TunedModel
 from app.api.schemas.account import ShowAccount
+from app.api.schemas.currency import ShowCurrencyTotal
 
 
 class ShowDeposit(TunedModel):
     id: uuid.UUID
     name: str
-    amount: float
+    amount: Decimal
     account: ShowAccount
     is_open: bool
+    matures_at: datetime | None
+    interest_rate: Decimal
+    term_days: int | None
+    accrued_through: date
+
+
+class DepositsPage(BaseModel):
+    deposits: list[ShowDeposit]
+    totals: list[ShowCurrencyTotal]
+    next_cursor: str | None
 
 
 class CreateDepositRequest(BaseModel):
     name: str
-    amount: float = Field(1000, gt=0, lt=10**10)
+    amount: Decimal = Field(Decimal(1000), gt=0, lt=10**10, decimal_places=2)
     account_id: uuid.UUID
     tag_id: uuid.UUID | None
+    matures_at: datetime | None
+    # annual rate, 0.05 is 5%
+    interest_rate: Decimal = Field(Decimal(0), ge=0, lt=10, decimal_places=6)
+    # sets matures_at when it is not given
+    term_days: int | None = Field(None, gt=0)
 
 
 class CreatedDepositResponse(BaseModel):
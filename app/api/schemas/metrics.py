@@ -0,0 +1,76 @@
+from app.api.schemas import BaseModel
+
+
+class ShowPoolMetrics(BaseModel):
+    pid: int
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    waits: int
+    average_wait_ms: float
+    max_wait_ms: float
+
+
+class ShowCacheStats(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class ShowCacheMetrics(BaseModel):
+    pid: int
+    currency: ShowCacheStats
+    transaction_type: ShowCacheStats
+    tag: ShowCacheStats
+    idempotency: ShowCacheStats
+
+
+class ShowTransferMetrics(BaseModel):
+    pid: int
+    transfers: int
+    retries: int
+    retries_exhausted: int
+    lock_acquisitions: int
+    average_lock_wait_ms: float
+    max_lock_wait_ms: float
+
+
+class ShowJobStats(BaseModel):
+    name: str
+    workers: int
+    batch_size: int
+    batches: int
+    failed_batches: int
+    processed: int
+    failed: int
+    average_batch_ms: float
+    average_item_ms: float
+    max_item_ms: float
+    items_per_second: float
+
+
+class ShowJobMetrics(BaseModel):
+    pid: int
+    jobs: list[ShowJobStats]
+
+
+class ShowRouteQueryStats(BaseModel):
+    route: str
+    requests: int
+    queries: int
+    db_time_ms: float
+    average_queries: float
+    average_db_time_ms: float
+    queries_histogram: dict[str, int]
+    db_time_ms_histogram: dict[str, int]
+
+
+class ShowQueryMetrics(BaseModel):
+    pid: int
+    enabled: bool
+    slow_query_threshold_ms: float
+    slow_queries: int
+    routes: list[ShowRouteQueryStats]
@@ -0,0 +1,23 @@
+import enum
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from app.api.schemas import BaseModel
+
+
+class ReportPeriod(enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+    year = "year"
+
+
+class ShowReport(BaseModel):
+    period: ReportPeriod
+    bucket: list[datetime]
+    currency_id: list[int]
+    tag_id: list[uuid.UUID | None]
+    transaction_type_id: list[int]
+    total: list[Decimal]
+    count: list[int]
@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
+from decimal import Decimal
 
-from pydantic import Field
+from pydantic import Field, conlist
 
 from app.api.schemas import BaseModel, TunedModel, OrderBy
 from app.api.schemas.account import ShowAccount
@@ -20,15 +21,20 @@ class TransactionTypeCreate(BaseModel):
 class ShowTransaction(TunedModel):
     id: uuid.UUID
     transaction_type: ShowTransactionType
-    amount: float
+    amount: Decimal
     tag: ShowTag | None
     account: ShowAccount
     created_at: datetime
 
 
+class TransactionsPage(BaseModel):
+    transactions: list[ShowTransaction]
+    next_cursor: str | None
+
+
 class TransactionCreate(BaseModel):
     transaction_type_id: int
-    amount: float = Field(.0, ge=0, lt=10**10)
+    amount: Decimal = Field(Decimal(0), ge=0, lt=10**10, decimal_places=2)
     tag_id: uuid.UUID | None
     account_id: uuid.UUID
 
@@ -37,9 +43,17 @@ class CreatedTransactionResponse(BaseModel):
     created_transaction_id: uuid.UUID
 
 
+class TransactionBulkCreate(BaseModel):
+    transactions: conlist(TransactionCreate, min_items=1, max_items=100_000)
+
+
+class CreatedTransactionsBulkResponse(BaseModel):
+    created_transaction_ids: list[uuid.UUID]
+
+
 class UpdateTransactionRequest(BaseModel):
     transaction_type_id: int | None
-    amount: float | None
+    amount: Decimal | None = Field(None, ge=0, lt=10**10, decimal_places=2)
     tag_id: uuid.UUID | None
 
 
@@ -1,6 +1,7 @@
 import uuid
+from decimal import Decimal
 
-from pydantic import Field
+from pydantic import Field, conlist
 
 from app.api.schemas import BaseModel
 
@@ -8,9 +9,17 @@ from app.api.schemas import BaseModel
 class TransferCreate(BaseModel):
     from_account_id: uuid.UUID
     to_account_id: uuid.UUID
-    amount_from: float = Field(1000, gt=0, lt=10**10)
+    amount_from: Decimal = Field(Decimal(1000), gt=0, lt=10**10, decimal_places=2)
 
 
 class CreatedTransferResponse(BaseModel):
     created_from_transaction_id: uuid.UUID
     created_to_transaction_id: uuid.UUID
+
+
+class TransferBatchCreate(BaseModel):
+    transfers: conlist(TransferCreate, min_items=1, max_items=1000)
+
+
+class CreatedTransfersBatchResponse(BaseModel):
+    transfers: list[CreatedTransferResponse]
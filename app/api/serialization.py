@@ -0,0 +1,64 @@
+# Plain-dict builders for list endpoints. They mirror the Show* schemas field by field,
+# so the rows go straight to orjson without a pydantic validation and a jsonable_encoder
+# pass. Endpoints keep the schemas as response_model, which only drives the OpenAPI docs.
+# orjson has no Decimal support, money goes out as a JSON number like jsonable_encoder does.
+
+
+def serialize_currency(currency) -> dict:
+    return {
+        "id": currency.id,
+        "name": currency.name,
+    }
+
+
+def serialize_account(account, currency) -> dict:
+    return {
+        "id": account.id,
+        "name": account.name,
+        "balance": float(account.balance),
+        "currency": serialize_currency(currency),
+        "created_at": account.created_at,
+    }
+
+
+def serialize_transaction(transaction, account, tag, transaction_type, currency) -> dict:
+    return {
+        "id": transaction.id,
+        "transaction_type": {
+            "id": transaction_type.id,
+            "name": transaction_type.name,
+        },
+        "amount": float(transaction.amount),
+        "tag": {
+            "id": tag.id,
+            "name": tag.name,
+        } if tag is not None else None,
+        "account": serialize_account(account, currency),
+        "created_at": transaction.created_at,
+    }
+
+
+def serialize_product(product, account, currency) -> dict:
+    # ShowCredit and ShowDeposit share their fields
+    return {
+        "id": product.id,
+        "name": product.name,
+        "amount": float(product.amount),
+        "account": serialize_account(account, currency),
+        "is_open": product.is_open,
+        "matures_at": product.matures_at,
+        "interest_rate": float(product.interest_rate),
+        "term_days": product.term_days,
+        "accrued_through": product.accrued_through,
+    }
+
+
+def serialize_currency_total(currency_id, currency_name, count, amount) -> dict:
+    return {
+        "currency": {
+            "id": currency_id,
+            "name": currency_name,
+        },
+        "count": count,
+        "amount": float(amount),
+    }
@@ -0,0 +1,70 @@
+"""Switch account balance maintenance between the DAL and the transaction triggers.
+
+Both modes keep account.balance exact, but never both at once: stop the app, switch,
+then restart it with BALANCE_TRIGGERS set to match.
+
+    python -m app.db.balance_triggers status
+    python -m app.db.balance_triggers enable
+    python -m app.db.balance_triggers disable
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import engine
+from config import BALANCE_TRIGGERS
+
+
+BALANCE_TRIGGER_NAMES = (
+    "trg_transaction_balance_insert",
+    "trg_transaction_balance_update",
+    "trg_transaction_balance_delete",
+)
+
+
+async def balance_triggers_enabled(connection: AsyncConnection) -> bool:
+    # tgenabled is 'D' for disabled, 'O' (origin), 'A' (always) or 'R' (replica) otherwise
+    states = (await connection.execute(text(
+        "SELECT tgenabled FROM pg_trigger "
+        "WHERE tgrelid = 'transaction'::regclass AND tgname = ANY(:names)"
+    ), {"names": list(BALANCE_TRIGGER_NAMES)})).scalars().all()
+    return bool(states) and all(state != "D" for state in states)
+
+
+async def set_balance_triggers(connection: AsyncConnection, enabled: bool) -> None:
+    # the table lock waits out in-flight writers, so no write is counted twice or missed
+    action = "ENABLE" if enabled else "DISABLE"
+    await connection.execute(text("LOCK TABLE transaction IN SHARE ROW EXCLUSIVE MODE"))
+    for name in BALANCE_TRIGGER_NAMES:
+        await connection.execute(text(f"ALTER TABLE transaction {action} TRIGGER {name}"))
+
+
+async def check_balance_mode() -> None:
+    async with engine.connect() as connection:
+        enabled = await balance_triggers_enabled(connection)
+    if enabled != BALANCE_TRIGGERS:
+        raise RuntimeError(
+            f"BALANCE_TRIGGERS is {BALANCE_TRIGGERS} but the transaction balance triggers are "
+            f"{'enabled' if enabled else 'disabled'}: balances would be "
+            f"{'applied twice' if enabled else 'left unchanged'}, see app.db.balance_triggers"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=("status", "enable", "disable"))
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        if args.action != "status":
+            await set_balance_triggers(connection, enabled=args.action == "enable")
+        enabled = await balance_triggers_enabled(connection)
+    await engine.dispose()
+
+    print(f"balance triggers {'enabled' if enabled else 'disabled'}, BALANCE_TRIGGERS={BALANCE_TRIGGERS}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
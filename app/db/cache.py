@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import select
+
+from app.db.models import Currency, TransactionType as TrType
+from app.db.session import async_session
+from config import TAG_CACHE_SIZE, TAG_CACHE_TTL, IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_KEY_TTL
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else .0
+
+
+class ReferenceCache:
+    # unbounded, for tables that only change through migrations
+    def __init__(self):
+        self.stats = CacheStats()
+        self._items: dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return item
+
+    def put(self, key: Hashable, item: Any) -> None:
+        self._items[key] = item
+
+    def replace(self, items: dict[Hashable, Any]) -> None:
+        self._items = dict(items)
+
+
+class LRUCache:
+    # bounded, entries expire after `ttl` so other workers' writes are picked up eventually
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._items: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Any | None:
+        cached = self._items.get(key)
+        if cached is None or cached[1] < time.monotonic():
+            self._items.pop(key, None)
+            self.stats.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.stats.hits += 1
+        return cached[0]
+
+    def put(self, key: Hashable, item: Any) -> None:
+        self._items[key] = (item, time.monotonic() + self.ttl)
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+
+# cached rows are detached copies, never attached to a session
+currency_cache = ReferenceCache()
+transaction_type_cache = ReferenceCache()
+tag_cache = LRUCache(maxsize=TAG_CACHE_SIZE, ttl=TAG_CACHE_TTL)
+# completed idempotent responses: (fingerprint, status_code, response_body)
+idempotency_cache = LRUCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_KEY_TTL)
+
+
+async def load_reference_data() -> None:
+    async with async_session() as session:
+        currencies = await session.scalars(select(Currency))
+        currency_cache.replace({
+            currency.id: Currency(id=currency.id, name=currency.name) for currency in currencies
+        })
+
+        transaction_types = await session.scalars(select(TrType))
+        transaction_type_cache.replace({
+            transaction_type.id: TrType(id=transaction_type.id, name=transaction_type.name)
+            for transaction_type in transaction_types
+        })
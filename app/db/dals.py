@@ -1,27 +1,76 @@
 import uuid
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta, date
+from decimal import Decimal
 from typing import Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select, update, delete, Row, desc
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from sqlalchemy import select, update, delete, Row, desc, tuple_, Select, func, and_, literal_column, \
+    bindparam, cast, Date, any_, or_, event
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+from sqlalchemy.orm import joinedload
+
+from app.api.schemas.report import ReportPeriod
 from app.api.schemas.transaction import OrderBy
 from app.db.models import TransactionType as TrType, Transaction, \
-    Account, Currency, Tag, Deposit, Credit
+    Account, Currency, Tag, Deposit, Credit, BalanceSnapshot, IdempotencyKey
 
 
 # DAL - Data Access Layer
-from app.db.session import TransactionTypeEnum
+from app.db.cache import currency_cache, transaction_type_cache, tag_cache
+from app.db.session import TransactionTypeEnum, TRANSACTION_TYPE_SIGNS, RESERVED_TRANSACTION_TYPE_IDS
+from app.money import MONEY_SCALE, RATE_SCALE, accrue_interest
+from app.monitoring import instrument_dal
 from app.exception import AccountNotFound, TransactionTypeNotFound, TransactionNotFound, \
     TagNotFound, CurrencyNotFound, ReservedTransactionChange, ProjectBaseException, CreditNotFound, \
-    CreditAlreadyClosed, DepositNotFound, NotEnoughMoney
+    CreditAlreadyClosed, DepositNotFound, DepositAlreadyClosed, NotEnoughMoney
+from config import BALANCE_CHECKPOINT_LAG, METRICS_ENABLED, BALANCE_TRIGGERS
+
+
+
+def _filter_products(
+        query: Select,
+        product_model: type[Deposit] | type[Credit],
+        is_open: bool | None,
+        account_id: uuid.UUID | None,
+        currency_id: int | None
+) -> Select:
+    # expects Account joined in, the filters of the user level product listings and totals
+    if is_open is not None:
+        query = query.where(product_model.is_open == is_open)
+    if account_id is not None:
+        query = query.where(product_model.account_id == account_id)
+    if currency_id is not None:
+        query = query.where(Account.currency_id == currency_id)
+    return query
+
+
+FOREIGN_KEY_VIOLATION = "23503"
+
+# postgres default names, kept by the partitions of `transaction`
+TRANSACTION_ACCOUNT_FK = "transaction_account_id_fkey"
+TRANSACTION_TAG_FK = "transaction_tag_id_fkey"
+
+
+def _violated_foreign_key(exception: IntegrityError) -> str | None:
+    # the asyncpg error, which names the constraint, is the cause of the DBAPI one
+    if getattr(exception.orig, "sqlstate", None) != FOREIGN_KEY_VIOLATION:
+        return None
+    return getattr(exception.orig.__cause__, "constraint_name", None)
 
 
 class BaseDAL:
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if METRICS_ENABLED:
+            instrument_dal(cls)
+
 
 class UserDAL(BaseDAL):
     async def get_accounts(self) -> Sequence[Row]:
@@ -34,54 +83,166 @@ class TransactionDAL(BaseDAL):
     async def create_transaction(
             self,
             transaction_type_id: int,
-            amount: float,
+            amount: Decimal,
             account_id: uuid.UUID,
             tag_id: uuid.UUID | None = None,
-            created_at: datetime | None = None
+            created_at: datetime | None = None,
+            non_negative: bool = False
     ) -> Transaction:
 
         if tag_id is not None:
             tag_dal = TagDAL(self.db_session)
             await tag_dal.check_if_tag_exists(tag_id)
 
-        is_positive_transaction = TransactionTypeEnum(transaction_type_id).is_plus_sign
         # if it is income -> add, expense -> subtract
-        sign = 2*is_positive_transaction - 1
+        sign = TRANSACTION_TYPE_SIGNS.get(transaction_type_id)
+        if sign is None:
+            raise TransactionTypeNotFound(transaction_type_id=transaction_type_id)
 
         account_dal = AccountDAL(self.db_session)
         checkpoint = self.db_session.begin_nested()
         try:
-            await account_dal.add_to_balance(account_id, amount=amount*sign)
+            if not BALANCE_TRIGGERS:
+                await account_dal.add_to_balance(
+                    account_id, amount=amount*sign, non_negative=non_negative
+                )
+            elif non_negative:
+                # the insert trigger moves the balance, a debit only has to be checked first
+                await account_dal.check_balance({account_id: amount*sign})
 
             new_transaction = Transaction(
                 transaction_type_id=transaction_type_id,
                 amount=amount,
+                signed_amount=amount*sign,
                 account_id=account_id,
                 tag_id=tag_id,
                 created_at=datetime.utcnow() if created_at is None else created_at
             )
-        except AccountNotFound as exception:
+        except (AccountNotFound, NotEnoughMoney) as exception:
             raise exception
         except Exception as exception:
             await checkpoint.rollback()
             raise exception
 
         self.db_session.add(new_transaction)
-        await self.db_session.flush()
+        try:
+            await self.db_session.flush()
+        except IntegrityError as exception:
+            violated_foreign_key = _violated_foreign_key(exception)
+            # with triggers nothing touched the account before the insert
+            if violated_foreign_key == TRANSACTION_ACCOUNT_FK:
+                raise AccountNotFound(account_id=account_id)
+            # the tag was deleted after another worker's cache was filled
+            if violated_foreign_key == TRANSACTION_TAG_FK:
+                tag_cache.invalidate(tag_id)
+                raise TagNotFound(tag_id=tag_id)
+            raise exception
+
+        if created_at is not None:
+            await BalanceSnapshotDAL(self.db_session).add_to_snapshot(
+                account_id, amount=amount*sign, created_at=created_at
+            )
+
         return new_transaction
 
+    async def create_transactions_bulk(
+            self, transactions: Sequence[dict], non_negative: bool = False
+    ) -> Sequence[uuid.UUID]:
+        if len(transactions) == 0:
+            return ()
+
+        for transaction_type_id in {row["transaction_type_id"] for row in transactions}:
+            if transaction_type_id not in TRANSACTION_TYPE_SIGNS:
+                raise TransactionTypeNotFound(transaction_type_id=transaction_type_id)
+
+        tag_ids = {row["tag_id"] for row in transactions if row.get("tag_id") is not None}
+        if tag_ids:
+            await TagDAL(self.db_session).check_if_tags_exist(tag_ids)
+
+        signed_amounts = [
+            row["amount"] * TRANSACTION_TYPE_SIGNS[row["transaction_type_id"]] for row in transactions
+        ]
+
+        # non_negative holds for every transaction in batch order, as if each went through
+        # create_transaction: a debit is not covered by a credit later in the same batch
+        balance_deltas = defaultdict(Decimal)
+        low_points = defaultdict(Decimal)
+        for row, signed in zip(transactions, signed_amounts):
+            balance_deltas[row["account_id"]] += signed
+            low_points[row["account_id"]] = min(low_points[row["account_id"]], balance_deltas[row["account_id"]])
+
+        account_dal = AccountDAL(self.db_session)
+        if BALANCE_TRIGGERS:
+            # one round trip for all accounts, the insert trigger applies the deltas after the COPY;
+            # zero low points still lock and check existence but skip the non-negative check
+            await account_dal.check_balance(
+                low_points if non_negative else dict.fromkeys(balance_deltas, Decimal(0))
+            )
+        else:
+            # one UPDATE per distinct account, in a fixed order so parallel imports don't deadlock
+            for account_id in sorted(balance_deltas):
+                await account_dal.add_to_balance(
+                    account_id, amount=balance_deltas[account_id], non_negative=non_negative,
+                    low_point=low_points[account_id]
+                )
+
+        created_at = datetime.utcnow()
+        records = [(
+            uuid.uuid4(),
+            row["transaction_type_id"],
+            row["amount"],
+            signed,
+            row.get("tag_id"),
+            row["account_id"],
+            row.get("created_at") or created_at
+        ) for row, signed in zip(transactions, signed_amounts)]
+
+        connection = await self.db_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Transaction.__tablename__,
+            records=records,
+            columns=(
+                "id", "transaction_type_id", "amount", "signed_amount", "tag_id", "account_id", "created_at"
+            )
+        )
+
+        backdated_ids = [
+            record[0] for record, row in zip(records, transactions) if row.get("created_at") is not None
+        ]
+        if backdated_ids:
+            await BalanceSnapshotDAL(self.db_session).add_transactions_to_snapshots(backdated_ids)
+
+        return tuple(record[0] for record in records)
+
     async def get_transaction_by_id(self, transaction_id: uuid.UUID) -> Transaction:
         transaction = await self.db_session.get(Transaction, transaction_id)
         if transaction is None:
             raise TransactionNotFound(transaction_id=transaction_id)
         return transaction
 
+    async def get_transaction_details_by_id(self, transaction_id: uuid.UUID) -> Transaction:
+        query = select(Transaction)\
+            .options(
+                joinedload(Transaction.transaction_type),
+                joinedload(Transaction.tag),
+                joinedload(Transaction.account).joinedload(Account.currency)
+            )\
+            .where(Transaction.id == transaction_id)
+        transaction = await self.db_session.scalar(query)
+        if transaction is None:
+            raise TransactionNotFound(transaction_id=transaction_id)
+        return transaction
+
     async def update_transaction(self, transaction_id: uuid.UUID, **kwargs) -> Transaction:
         transaction = await self.get_transaction_by_id(transaction_id=transaction_id)
-        if TransactionTypeEnum(transaction.transaction_type_id).is_reserved_type:
+        if transaction.transaction_type_id in RESERVED_TRANSACTION_TYPE_IDS:
             raise ReservedTransactionChange
 
-        if TransactionTypeEnum(kwargs.get("transaction_type_id", 1)).is_reserved_type:
+        new_transaction_type_id = kwargs.get("transaction_type_id", transaction.transaction_type_id)
+        if new_transaction_type_id not in TRANSACTION_TYPE_SIGNS:
+            raise TransactionTypeNotFound(transaction_type_id=new_transaction_type_id)
+        if new_transaction_type_id in RESERVED_TRANSACTION_TYPE_IDS:
             raise ReservedTransactionChange
 
         if "amount" not in kwargs and "transaction_type_id" not in kwargs:
@@ -95,25 +256,23 @@ class TransactionDAL(BaseDAL):
 
             return update_transaction_id_row[0]
 
-        was_positive_transaction = TransactionTypeEnum(transaction.transaction_type_id).is_plus_sign
-        old_sign = 2 * was_positive_transaction - 1
-        old_amount = transaction.amount
-
-        new_transaction_type_id = kwargs.get("transaction_type_id", transaction.transaction_type_id)
-        is_positive_transaction = TransactionTypeEnum(new_transaction_type_id).is_plus_sign
-        new_sign = 2 * is_positive_transaction - 1
-        new_amount = kwargs.get("amount", old_amount)
+        new_amount = kwargs.get("amount", transaction.amount)
+        new_signed_amount = TRANSACTION_TYPE_SIGNS[new_transaction_type_id] * new_amount
 
-        diff_amount = -old_sign * old_amount + new_sign * new_amount
+        diff_amount = new_signed_amount - transaction.signed_amount
 
         account_dal = AccountDAL(self.db_session)
         checkpoint = self.db_session.begin_nested()
         try:
-            await account_dal.add_to_balance(transaction.account_id, diff_amount)
+            if not BALANCE_TRIGGERS:
+                await account_dal.add_to_balance(transaction.account_id, diff_amount)
+            await BalanceSnapshotDAL(self.db_session).add_to_snapshot(
+                transaction.account_id, amount=diff_amount, created_at=transaction.created_at
+            )
 
             query = update(Transaction)\
                 .where(Transaction.id == transaction_id)\
-                .values(**kwargs)\
+                .values(signed_amount=new_signed_amount, **kwargs)\
                 .returning(Transaction.id)
             query_result = await self.db_session.execute(query)
 
@@ -129,18 +288,21 @@ class TransactionDAL(BaseDAL):
 
     async def delete_transaction(self, transaction_id: uuid.UUID) -> uuid.UUID:
         transaction = await self.get_transaction_by_id(transaction_id=transaction_id)
-        if TransactionTypeEnum(transaction.transaction_type_id).is_reserved_type:
+        if transaction.transaction_type_id in RESERVED_TRANSACTION_TYPE_IDS:
             raise ReservedTransactionChange
 
-        is_positive_transaction = TransactionTypeEnum(transaction.transaction_type_id).is_plus_sign
-        sign = 2 * is_positive_transaction - 1
-
         account_dal = AccountDAL(self.db_session)
         checkpoint = self.db_session.begin_nested()
         try:
-            await account_dal.add_to_balance(
+            if not BALANCE_TRIGGERS:
+                await account_dal.add_to_balance(
+                    transaction.account_id,
+                    amount=-transaction.signed_amount
+                )
+            await BalanceSnapshotDAL(self.db_session).add_to_snapshot(
                 transaction.account_id,
-                amount=transaction.amount * -sign
+                amount=-transaction.signed_amount,
+                created_at=transaction.created_at
             )
 
             query = delete(Transaction)\
@@ -162,8 +324,40 @@ class TransactionDAL(BaseDAL):
             self, account_id: uuid.UUID | None = None,
             transaction_type_id: int | None = None,
             tag_id: uuid.UUID | None = None,
-            order_by: OrderBy = OrderBy("id")
+            order_by: OrderBy = OrderBy("id"),
+            limit: int | None = None,
+            after: tuple[datetime, uuid.UUID] | None = None
     ) -> Sequence[Row] | None:
+        query = await self._get_transactions_query(
+            account_id=account_id, transaction_type_id=transaction_type_id,
+            tag_id=tag_id, order_by=order_by, limit=limit, after=after
+        )
+
+        query_result = await self.db_session.execute(query)
+        return query_result.fetchall()
+
+    async def stream_transactions(
+            self, account_id: uuid.UUID | None = None,
+            transaction_type_id: int | None = None,
+            tag_id: uuid.UUID | None = None,
+            order_by: OrderBy = OrderBy("id"),
+            yield_per: int = 1000
+    ) -> AsyncResult:
+        query = await self._get_transactions_query(
+            account_id=account_id, transaction_type_id=transaction_type_id,
+            tag_id=tag_id, order_by=order_by
+        )
+
+        return await self.db_session.stream(query.execution_options(yield_per=yield_per))
+
+    async def _get_transactions_query(
+            self, account_id: uuid.UUID | None = None,
+            transaction_type_id: int | None = None,
+            tag_id: uuid.UUID | None = None,
+            order_by: OrderBy = OrderBy("id"),
+            limit: int | None = None,
+            after: tuple[datetime, uuid.UUID] | None = None
+    ) -> Select:
         query = select(Transaction, Account, Tag, TrType, Currency)
         if account_id is not None:
             account_dal = AccountDAL(self.db_session)
@@ -172,7 +366,7 @@ class TransactionDAL(BaseDAL):
             query = query.where(Transaction.account_id == account_id)
 
         if transaction_type_id is not None:
-            if transaction_type_id not in map(lambda x: x.value, TransactionTypeEnum):
+            if transaction_type_id not in TRANSACTION_TYPE_SIGNS:
                 raise TransactionTypeNotFound(transaction_type_id=transaction_type_id)
 
             query = query.filter(Transaction.transaction_type_id == transaction_type_id)
@@ -186,17 +380,86 @@ class TransactionDAL(BaseDAL):
             .join(TrType, Transaction.transaction_type_id == TrType.id, isouter=True)\
             .join(Currency, Account.currency_id == Currency.id, isouter=True)
 
-        if order_by == order_by.chronological:
-            query = query.order_by(Transaction.created_at)
-        elif order_by == order_by.reverse_chronological:
-            query = query.order_by(desc(Transaction.created_at))
+        if limit is None:
+            if order_by == order_by.chronological:
+                query = query.order_by(Transaction.created_at)
+            elif order_by == order_by.reverse_chronological:
+                query = query.order_by(desc(Transaction.created_at))
+            return query
+
+        # keyset pagination: (created_at, id) is unique, so pages never overlap or skip rows
+        keyset = tuple_(Transaction.created_at, Transaction.id)
+        if order_by == order_by.reverse_chronological:
+            if after is not None:
+                query = query.where(keyset < tuple_(*after))
+            query = query.order_by(desc(Transaction.created_at), desc(Transaction.id))
+        else:
+            if after is not None:
+                query = query.where(keyset > tuple_(*after))
+            query = query.order_by(Transaction.created_at, Transaction.id)
+
+        return query.limit(limit)
+
+
+class ReportDAL(BaseDAL):
+    async def get_report(
+            self,
+            period: ReportPeriod,
+            account_id: uuid.UUID | None = None,
+            tag_id: uuid.UUID | None = None,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None
+    ) -> Sequence[Row]:
+        if account_id is not None:
+            await AccountDAL(self.db_session).check_if_account_exists(account_id=account_id)
+
+        if tag_id is not None:
+            await TagDAL(self.db_session).check_if_tag_exists(tag_id=tag_id)
 
+        query = self._get_report_query(
+            period=period, account_id=account_id, tag_id=tag_id, date_from=date_from, date_to=date_to
+        )
         query_result = await self.db_session.execute(query)
         return query_result.fetchall()
 
+    def _get_report_query(
+            self,
+            period: ReportPeriod,
+            account_id: uuid.UUID | None = None,
+            tag_id: uuid.UUID | None = None,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None
+    ) -> Select:
+        # rendered inline: a bound parameter would differ between SELECT and GROUP BY
+        bucket = func.date_trunc(literal_column(f"'{period.value}'"), Transaction.created_at)\
+            .label("bucket")
+        query = select(
+            bucket,
+            Account.currency_id,
+            Transaction.tag_id,
+            Transaction.transaction_type_id,
+            func.sum(Transaction.signed_amount),
+            func.count()
+        ).join(Account, Transaction.account_id == Account.id)
+
+        if account_id is not None:
+            query = query.where(Transaction.account_id == account_id)
+
+        if tag_id is not None:
+            query = query.where(Transaction.tag_id == tag_id)
+
+        if date_from is not None:
+            query = query.where(Transaction.created_at >= date_from)
+
+        if date_to is not None:
+            query = query.where(Transaction.created_at < date_to)
+
+        return query.group_by(bucket, Account.currency_id, Transaction.tag_id, Transaction.transaction_type_id)\
+            .order_by(bucket)
+
 
 class AccountDAL(BaseDAL):
-    async def create_account(self, name: str, balance: float, currency_id: int) -> Account:
+    async def create_account(self, name: str, balance: Decimal, currency_id: int) -> Account:
         new_account = Account(
             name=name,
             balance=balance,
@@ -205,6 +468,11 @@ class AccountDAL(BaseDAL):
 
         self.db_session.add(new_account)
         await self.db_session.flush()
+
+        await BalanceSnapshotDAL(self.db_session).create_snapshot(
+            account_id=new_account.id, total=balance, checkpoint_at=new_account.created_at
+        )
+
         return new_account
 
     async def get_account_by_id(self, account_id: uuid.UUID) -> Account:
@@ -214,6 +482,17 @@ class AccountDAL(BaseDAL):
         return account
 
     async def update_account(self, account_id: uuid.UUID, **kwargs) -> Account:
+        if "balance" in kwargs:
+            # a manual balance edit is an adjustment the transaction history does not explain
+            adjustment = select(kwargs["balance"] - Account.balance)\
+                .where(Account.id == account_id)\
+                .scalar_subquery()
+            await self.db_session.execute(
+                update(BalanceSnapshot)
+                .where(BalanceSnapshot.account_id == account_id)
+                .values(total=BalanceSnapshot.total + adjustment)
+            )
+
         query = update(Account) \
             .filter(Account.id == account_id) \
             .values(**kwargs) \
@@ -236,16 +515,46 @@ class AccountDAL(BaseDAL):
             raise AccountNotFound(account_id=account_id)
         return delete_account_id_row[0]
 
-    async def add_to_balance(self, account_id: uuid.UUID, amount: float) -> None:
-        account = await self.get_account_by_id(account_id=account_id)
-
+    async def add_to_balance(
+            self, account_id: uuid.UUID, amount: Decimal, non_negative: bool = False,
+            low_point: Decimal | None = None
+    ) -> Decimal:
+        # single UPDATE ... SET balance = balance + :amount, no read-modify-write race;
+        # `low_point` is the lowest the balance gets on the way to +amount, if below it
         query = update(Account)\
             .where(Account.id == account_id)\
-            .values(
-                balance=account.balance+amount
-            )
+            .values(balance=Account.balance + amount)\
+            .returning(Account.balance)
 
-        await self.db_session.execute(query)
+        if non_negative:
+            query = query.where(Account.balance + (amount if low_point is None else low_point) >= 0)
+
+        query_result = await self.db_session.execute(query)
+        new_balance_row = query_result.fetchone()
+
+        if new_balance_row is None:
+            if non_negative:
+                await self.check_if_account_exists(account_id=account_id)
+                raise NotEnoughMoney
+            raise AccountNotFound(account_id=account_id)
+
+        return new_balance_row[0]
+
+    async def check_balance(self, deltas: dict[uuid.UUID, Decimal]) -> None:
+        # trigger mode counterpart of add_to_balance: locks the accounts in UUID order and
+        # applies the same existence and non-negative checks, the trigger does the write
+        query = select(Account.id, Account.balance)\
+            .where(Account.id.in_(deltas))\
+            .order_by(Account.id)\
+            .with_for_update()
+        query_result = await self.db_session.execute(query)
+        balances = dict(query_result.fetchall())
+
+        missing_account_ids = deltas.keys() - balances.keys()
+        if missing_account_ids:
+            raise AccountNotFound(account_id=next(iter(missing_account_ids)))
+        if any(balances[account_id] + delta < 0 for account_id, delta in deltas.items() if delta < 0):
+            raise NotEnoughMoney
 
     async def get_account_transactions(
             self,
@@ -260,11 +569,222 @@ class AccountDAL(BaseDAL):
             tag_id=tag_id, order_by=order_by
         )
 
+    async def get_balance_before(self, account_id: uuid.UUID, created_at: datetime | None = None) -> Decimal:
+        # walked back from account.balance rather than summed up from zero, so the opening
+        # balance and manual balance edits, which are not transactions, are included.
+        # The sum is covered by ix_transaction_account_id_created_at_id, no heap access needed
+        later_deltas = select(func.coalesce(func.sum(Transaction.signed_amount), 0))\
+            .where(Transaction.account_id == account_id)
+        if created_at is not None:
+            later_deltas = later_deltas.where(Transaction.created_at >= created_at)
+
+        query = select(Account.balance - later_deltas.scalar_subquery())\
+            .where(Account.id == account_id)
+        return await self.db_session.scalar(query)
+
+    async def stream_statement(
+            self,
+            account_id: uuid.UUID,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None,
+            yield_per: int = 10_000
+    ) -> AsyncResult:
+        query = self._get_statement_query(account_id, date_from=date_from, date_to=date_to)
+        return await self.db_session.stream(query.execution_options(yield_per=yield_per))
+
+    def _get_statement_query(
+            self,
+            account_id: uuid.UUID,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None
+    ) -> Select:
+        # plain columns instead of entities: rows are never hydrated into the identity map
+        query = select(
+            Transaction.id,
+            Transaction.created_at,
+            Transaction.transaction_type_id,
+            Transaction.tag_id,
+            Transaction.amount,
+            Transaction.signed_amount
+        ).where(Transaction.account_id == account_id)
+
+        if date_from is not None:
+            query = query.where(Transaction.created_at >= date_from)
+
+        if date_to is not None:
+            query = query.where(Transaction.created_at < date_to)
+
+        return query.order_by(Transaction.created_at, Transaction.id)
+
     async def check_if_account_exists(self, account_id: uuid.UUID) -> None:
         account = await self.db_session.get(Account, account_id)
         if account is None:
             raise AccountNotFound(account_id=account_id)
 
+    async def get_accounts_by_ids(self, account_ids: set[uuid.UUID]) -> dict[uuid.UUID, Account]:
+        query = select(Account).where(Account.id.in_(account_ids))
+        query_result = await self.db_session.execute(query)
+        accounts = {account.id: account for account in query_result.scalars()}
+
+        missing_account_ids = account_ids - accounts.keys()
+        if missing_account_ids:
+            raise AccountNotFound(account_id=next(iter(missing_account_ids)))
+        return accounts
+
+    async def lock_accounts(self, account_ids: set[uuid.UUID]) -> None:
+        # row locks are always taken in UUID order, so two writers touching
+        # the same accounts queue up behind each other instead of deadlocking
+        query = select(Account.id)\
+            .where(Account.id.in_(account_ids))\
+            .order_by(Account.id)\
+            .with_for_update()
+        query_result = await self.db_session.execute(query)
+
+        missing_account_ids = account_ids - set(query_result.scalars())
+        if missing_account_ids:
+            raise AccountNotFound(account_id=next(iter(missing_account_ids)))
+
+
+class BalanceSnapshotDAL(BaseDAL):
+    async def create_snapshot(
+            self, account_id: uuid.UUID, total: Decimal, checkpoint_at: datetime
+    ) -> BalanceSnapshot:
+        new_snapshot = BalanceSnapshot(
+            account_id=account_id,
+            total=total,
+            checkpoint_at=checkpoint_at
+        )
+        self.db_session.add(new_snapshot)
+        await self.db_session.flush()
+        return new_snapshot
+
+    async def add_to_snapshot(self, account_id: uuid.UUID, amount: Decimal, created_at: datetime) -> None:
+        # only history that is already behind the checkpoint is folded into the total
+        query = update(BalanceSnapshot)\
+            .where(BalanceSnapshot.account_id == account_id)\
+            .where(BalanceSnapshot.checkpoint_at >= created_at)\
+            .values(total=BalanceSnapshot.total + amount)
+
+        await self.db_session.execute(query)
+
+    async def add_transactions_to_snapshots(self, transaction_ids: Sequence[uuid.UUID]) -> None:
+        backdated_totals = select(func.sum(Transaction.signed_amount))\
+            .where(Transaction.id.in_(transaction_ids))\
+            .where(Transaction.account_id == BalanceSnapshot.account_id)\
+            .where(Transaction.created_at <= BalanceSnapshot.checkpoint_at)\
+            .scalar_subquery()
+
+        affected_accounts = select(Transaction.account_id)\
+            .where(Transaction.id.in_(transaction_ids))
+
+        query = update(BalanceSnapshot)\
+            .where(BalanceSnapshot.account_id.in_(affected_accounts))\
+            .values(total=BalanceSnapshot.total + func.coalesce(backdated_totals, 0))
+
+        await self.db_session.execute(query)
+
+    async def reconcile(self, account_id: uuid.UUID) -> (Decimal, Decimal, datetime, int):
+        snapshot = await self._get_snapshot_for_update(account_id=account_id)
+
+        # rows newer than the cutoff may still belong to in-flight transactions,
+        # so they are summed on every call but never folded into the checkpoint
+        cutoff = max(
+            datetime.utcnow() - timedelta(seconds=BALANCE_CHECKPOINT_LAG),
+            snapshot.checkpoint_at
+        )
+
+        query = select(
+            Account.balance,
+            func.coalesce(func.sum(Transaction.signed_amount).filter(Transaction.created_at <= cutoff), 0),
+            func.coalesce(func.sum(Transaction.signed_amount).filter(Transaction.created_at > cutoff), 0),
+            func.count(Transaction.id)
+        ).select_from(Account)\
+            .join(Transaction, and_(
+                Transaction.account_id == Account.id,
+                Transaction.created_at > snapshot.checkpoint_at
+            ), isouter=True)\
+            .where(Account.id == account_id)\
+            .group_by(Account.id)
+
+        query_result = await self.db_session.execute(query)
+        balance, checkpoint_delta, recent_delta, scanned_transactions = query_result.one()
+
+        snapshot.total += checkpoint_delta
+        snapshot.checkpoint_at = cutoff
+        await self.db_session.flush()
+
+        return balance, snapshot.total + recent_delta, cutoff, scanned_transactions
+
+    async def _get_snapshot_for_update(self, account_id: uuid.UUID) -> BalanceSnapshot:
+        query = select(BalanceSnapshot)\
+            .where(BalanceSnapshot.account_id == account_id)\
+            .with_for_update()
+        snapshot = await self.db_session.scalar(query)
+        if snapshot is not None:
+            return snapshot
+
+        # accounts loaded outside AccountDAL start from an empty history
+        await AccountDAL(self.db_session).check_if_account_exists(account_id=account_id)
+        await self.db_session.execute(
+            pg_insert(BalanceSnapshot)
+            .values(account_id=account_id, total=0, checkpoint_at=datetime.min)
+            .on_conflict_do_nothing()
+        )
+        return await self.db_session.scalar(query)
+
+
+class IdempotencyKeyDAL(BaseDAL):
+    async def get_key(self, key: str) -> IdempotencyKey | None:
+        query = select(IdempotencyKey)\
+            .where(IdempotencyKey.key == key)\
+            .where(IdempotencyKey.expires_at > datetime.utcnow())
+        return await self.db_session.scalar(query)
+
+    async def reserve_key(self, key: str, fingerprint: str, lock_timeout: float) -> bool:
+        # a pending key only holds a short lease, so a request whose worker died or whose
+        # handler was cancelled blocks retries for `lock_timeout` seconds at most
+        now = datetime.utcnow()
+        query = pg_insert(IdempotencyKey)\
+            .values(key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=lock_timeout))
+        # an expired key or lease is taken over as if it never existed
+        query = query.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                "fingerprint": query.excluded.fingerprint,
+                "status_code": None,
+                "response_body": None,
+                "expires_at": query.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= now
+        ).returning(IdempotencyKey.key)
+
+        query_result = await self.db_session.execute(query)
+        return query_result.fetchone() is not None
+
+    async def complete_key(
+            self, key: str, fingerprint: str, status_code: int, response_body, ttl: float
+    ) -> bool:
+        # only a pending key is completed: when an expired lease was taken over by a retry
+        # and both requests get here, the row lock lets one complete and the other fails
+        query = update(IdempotencyKey)\
+            .where(IdempotencyKey.key == key)\
+            .where(IdempotencyKey.status_code.is_(None))\
+            .values(
+                fingerprint=fingerprint,
+                status_code=status_code,
+                response_body=response_body,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            )\
+            .returning(IdempotencyKey.key)
+        query_result = await self.db_session.execute(query)
+        return query_result.fetchone() is not None
+
+    async def release_key(self, key: str) -> None:
+        query = delete(IdempotencyKey)\
+            .where(IdempotencyKey.key == key)\
+            .where(IdempotencyKey.status_code.is_(None))
+        await self.db_session.execute(query)
+
 
 class CurrencyDAL(BaseDAL):
     async def create_currency(self, name: uuid.UUID) -> Currency:
@@ -274,12 +794,34 @@ class CurrencyDAL(BaseDAL):
         return new_currency
 
     async def get_currency_by_id(self, currency_id: int) -> Currency:
+        cached_currency = currency_cache.get(currency_id)
+        if cached_currency is not None:
+            return cached_currency
+
         currency = await self.db_session.get(Currency, currency_id)
         if currency is None:
             raise CurrencyNotFound(currency_id=currency_id)
+
+        currency_cache.put(currency_id, Currency(id=currency.id, name=currency.name))
         return currency
 
 
+class TransactionTypeDAL(BaseDAL):
+    async def get_transaction_type_by_id(self, transaction_type_id: int) -> TrType:
+        cached_transaction_type = transaction_type_cache.get(transaction_type_id)
+        if cached_transaction_type is not None:
+            return cached_transaction_type
+
+        transaction_type = await self.db_session.get(TrType, transaction_type_id)
+        if transaction_type is None:
+            raise TransactionTypeNotFound(transaction_type_id=transaction_type_id)
+
+        transaction_type_cache.put(
+            transaction_type_id, TrType(id=transaction_type.id, name=transaction_type.name)
+        )
+        return transaction_type
+
+
 class TagDAL(BaseDAL):
     async def create_tag(self, name: str) -> Tag:
         new_tag = Tag(name=name)
@@ -288,22 +830,29 @@ class TagDAL(BaseDAL):
         return new_tag
 
     async def get_tag_by_id(self, tag_id: uuid.UUID) -> Tag:
+        cached_tag = tag_cache.get(tag_id)
+        if cached_tag is not None:
+            return cached_tag
+
         tag = await self.db_session.get(Tag, tag_id)
         if tag is None:
             raise TagNotFound(tag_id)
+
+        tag_cache.put(tag_id, Tag(id=tag.id, name=tag.name))
         return tag
 
     async def update_tag(self, tag_id: uuid.UUID, name: str) -> Tag:
         query = update(Tag) \
             .filter(Tag.id == tag_id) \
             .values(name=name) \
-            .returning(Transaction.id)
+            .returning(Tag.id)
         query_result = await self.db_session.execute(query)
         update_tag_id_row = query_result.fetchone()
 
         if update_tag_id_row is None:
             raise TagNotFound(tag_id=tag_id)
 
+        self._invalidate_after_commit(tag_id)
         return update_tag_id_row[0]
 
     async def delete_tag(self, tag_id: uuid.UUID) -> Tag:
@@ -313,12 +862,34 @@ class TagDAL(BaseDAL):
 
         if delete_tag_id_row is None:
             raise TagNotFound(tag_id=tag_id)
+
+        self._invalidate_after_commit(tag_id)
         return delete_tag_id_row[0]
 
+    def _invalidate_after_commit(self, tag_id: uuid.UUID) -> None:
+        # evicting before the commit would let a concurrent request load the old row
+        # again and cache it until the TTL runs out
+        event.listen(
+            self.db_session.sync_session, "after_commit",
+            lambda session: tag_cache.invalidate(tag_id), once=True
+        )
+
     async def check_if_tag_exists(self, tag_id: uuid.UUID) -> None:
-        tag = await self.db_session.get(Tag, tag_id)
-        if tag is None:
-            raise TagNotFound(tag_id)
+        await self.get_tag_by_id(tag_id)
+
+    async def check_if_tags_exist(self, tag_ids: set[uuid.UUID]) -> None:
+        uncached_tag_ids = {tag_id for tag_id in tag_ids if tag_cache.get(tag_id) is None}
+        if not uncached_tag_ids:
+            return
+
+        query = select(Tag).where(Tag.id.in_(uncached_tag_ids))
+        query_result = await self.db_session.execute(query)
+        for tag in query_result.scalars():
+            tag_cache.put(tag.id, Tag(id=tag.id, name=tag.name))
+            uncached_tag_ids.discard(tag.id)
+
+        if uncached_tag_ids:
+            raise TagNotFound(next(iter(uncached_tag_ids)))
 
     async def get_tags(self) -> Sequence[Tag]:
         query = select(Tag)
@@ -328,27 +899,31 @@ class TagDAL(BaseDAL):
 
 class DepositDAL(BaseDAL):
     async def create_deposit(
-            self, name: str, amount: float, account_id: uuid.UUID, tag_id: uuid.UUID | None = None
+            self, name: str, amount: Decimal, account_id: uuid.UUID, tag_id: uuid.UUID | None = None,
+            matures_at: datetime | None = None, interest_rate: Decimal = Decimal(0),
+            term_days: int | None = None
     ) -> (Deposit, Transaction):
+        if matures_at is None and term_days is not None:
+            matures_at = datetime.utcnow() + timedelta(days=term_days)
+
         transaction_dal = TransactionDAL(self.db_session)
         checkpoint = self.db_session.begin_nested()
-
-        account = await AccountDAL(self.db_session).get_account_by_id(account_id)
-        if account.balance < amount:
-            raise NotEnoughMoney
-
         try:
             new_transaction = await transaction_dal.create_transaction(
                 transaction_type_id=TransactionTypeEnum.deposit_open.value,
                 amount=amount,
                 account_id=account_id,
-                tag_id=tag_id
+                tag_id=tag_id,
+                non_negative=True
             )
 
             new_deposit = Deposit(
                 name=name,
                 amount=amount,
-                account_id=account_id
+                account_id=account_id,
+                matures_at=matures_at,
+                interest_rate=interest_rate,
+                term_days=term_days
             )
             self.db_session.add(new_deposit)
             await self.db_session.flush()
@@ -366,6 +941,15 @@ class DepositDAL(BaseDAL):
             raise DepositNotFound(deposit_id=deposit_id)
         return deposit
 
+    async def get_deposit_details_by_id(self, deposit_id: uuid.UUID) -> Deposit:
+        query = select(Deposit)\
+            .options(joinedload(Deposit.account).joinedload(Account.currency))\
+            .where(Deposit.id == deposit_id)
+        deposit = await self.db_session.scalar(query)
+        if deposit is None:
+            raise DepositNotFound(deposit_id=deposit_id)
+        return deposit
+
     async def update_deposit(self, deposit_id: uuid.UUID, **kwargs) -> Deposit:
         query = update(Deposit) \
             .where(Deposit.id == deposit_id) \
@@ -383,37 +967,97 @@ class DepositDAL(BaseDAL):
         await self.db_session.delete(query)
 
     async def get_account_deposits(self, account_id: uuid.UUID) -> Sequence[Row]:
-        query = select(Account, Deposit, Currency)\
+        query = self._get_account_deposits_query(account_id=account_id)
+        query_result = await self.db_session.execute(query)
+
+        return query_result.fetchall()
+
+    def _get_account_deposits_query(self, account_id: uuid.UUID) -> Select:
+        return select(Account, Deposit, Currency)\
             .filter(Account.id == account_id)\
             .join(Deposit, Deposit.account_id == Account.id, isouter=True)\
             .join(Currency, Account.currency_id == Currency.id, isouter=True)
 
-        query_result = await self.db_session.execute(query)
+    async def get_user_deposits(
+            self,
+            is_open: bool | None = None,
+            account_id: uuid.UUID | None = None,
+            currency_id: int | None = None,
+            limit: int = 100,
+            after: uuid.UUID | None = None
+    ) -> Sequence[Row]:
+        query = select(Deposit, Account, Currency)\
+            .join(Account, Deposit.account_id == Account.id)\
+            .join(Currency, Account.currency_id == Currency.id)
+        query = _filter_products(query, Deposit, is_open, account_id, currency_id)
+
+        if after is not None:
+            query = query.where(Deposit.id > after)
+        query = query.order_by(Deposit.id).limit(limit)
 
+        query_result = await self.db_session.execute(query)
         return query_result.fetchall()
 
-    async def get_user_deposits(self) -> Sequence[Row]:
-        query = select(Account, Deposit, Currency) \
-            .join(Deposit, Deposit.account_id == Account.id, isouter=True) \
-            .join(Currency, Account.currency_id == Currency.id, isouter=True)
+    async def get_user_deposit_totals(
+            self,
+            is_open: bool | None = None,
+            account_id: uuid.UUID | None = None,
+            currency_id: int | None = None
+    ) -> Sequence[Row]:
+        query = select(Currency.id, Currency.name, func.count(Deposit.id), func.sum(Deposit.amount))\
+            .select_from(Deposit)\
+            .join(Account, Deposit.account_id == Account.id)\
+            .join(Currency, Account.currency_id == Currency.id)
+        query = _filter_products(query, Deposit, is_open, account_id, currency_id)
+        query = query.group_by(Currency.id, Currency.name).order_by(Currency.id)
 
         query_result = await self.db_session.execute(query)
-
         return query_result.fetchall()
 
-    async def close_deposit(self, deposit_id: uuid.UUID) -> (uuid.UUID, Transaction):
-        transaction_dal = TransactionDAL(self.db_session)
+    async def claim_due_deposits(self, due_at: datetime, limit: int) -> Sequence[uuid.UUID]:
+        # rows locked by another worker are skipped, not waited for, so concurrent
+        # schedulers split the due deposits between them instead of closing one twice
+        query = select(Deposit.id)\
+            .where(Deposit.is_open)\
+            .where(Deposit.matures_at <= due_at)\
+            .where(or_(Deposit.next_attempt_at.is_(None), Deposit.next_attempt_at <= due_at))\
+            .order_by(Deposit.matures_at)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+        query_result = await self.db_session.execute(query)
+        return query_result.scalars().all()
 
-        deposit = await self.get_deposit_by_id(deposit_id=deposit_id)
+    async def defer_deposit(self, deposit_id: uuid.UUID, until: datetime) -> None:
+        # a deposit that failed to close is not claimed again before `until`,
+        # so it can't keep the head of the due queue
+        query = update(Deposit) \
+            .filter(Deposit.id == deposit_id) \
+            .values(next_attempt_at=until)
 
-        if not deposit.is_open:
-            raise DepositAlreadyClosed(deposit_id=deposit_id)
+        await self.db_session.execute(query)
 
+    async def close_deposit(self, deposit_id: uuid.UUID) -> (uuid.UUID, Transaction):
+        transaction_dal = TransactionDAL(self.db_session)
+
+        # checking is_open in the UPDATE itself makes the close atomic: when the closing job
+        # and the /close/ endpoint race, the second one waits for the row and updates nothing
         query = update(Deposit) \
             .filter(Deposit.id == deposit_id) \
-            .values(is_open=False)
+            .filter(Deposit.is_open) \
+            .values(is_open=False) \
+            .returning(
+                Deposit.id, Deposit.account_id, Deposit.amount, Deposit.interest_rate,
+                Deposit.accrued_through, Deposit.matures_at
+            )
 
-        await self.db_session.execute(query)
+        deposit = (await self.db_session.execute(query)).fetchone()
+        if deposit is None:
+            await self.get_deposit_by_id(deposit_id=deposit_id)
+            raise DepositAlreadyClosed(deposit_id=deposit_id)
+
+        await AccrualDAL(self.db_session).post_outstanding_interest(
+            Deposit, deposit, transaction_type_id=TransactionTypeEnum.deposit_interest.value
+        )
 
         transaction = await transaction_dal.create_transaction(
             transaction_type_id=TransactionTypeEnum.deposit_close.value,
@@ -426,8 +1070,13 @@ class DepositDAL(BaseDAL):
 
 class CreditDAL(BaseDAL):
     async def create_credit(
-            self, name: str, amount: float, account_id: uuid.UUID, tag_id: uuid.UUID | None = None
+            self, name: str, amount: Decimal, account_id: uuid.UUID, tag_id: uuid.UUID | None = None,
+            matures_at: datetime | None = None, interest_rate: Decimal = Decimal(0),
+            term_days: int | None = None
     ) -> (Credit, Transaction):
+        if matures_at is None and term_days is not None:
+            matures_at = datetime.utcnow() + timedelta(days=term_days)
+
         transaction_dal = TransactionDAL(self.db_session)
         checkpoint = self.db_session.begin_nested()
         try:
@@ -441,7 +1090,10 @@ class CreditDAL(BaseDAL):
             new_credit = Credit(
                 name=name,
                 amount=amount,
-                account_id=account_id
+                account_id=account_id,
+                matures_at=matures_at,
+                interest_rate=interest_rate,
+                term_days=term_days
             )
             self.db_session.add(new_credit)
             await self.db_session.flush()
@@ -459,6 +1111,15 @@ class CreditDAL(BaseDAL):
             raise CreditNotFound(credit_id=credit_id)
         return credit
 
+    async def get_credit_details_by_id(self, credit_id: uuid.UUID) -> Credit:
+        query = select(Credit)\
+            .options(joinedload(Credit.account).joinedload(Account.currency))\
+            .where(Credit.id == credit_id)
+        credit = await self.db_session.scalar(query)
+        if credit is None:
+            raise CreditNotFound(credit_id=credit_id)
+        return credit
+
     async def update_credit(self, credit_id: uuid.UUID, **kwargs) -> Credit:
         query = update(Credit) \
             .where(Credit.id == credit_id) \
@@ -476,46 +1137,219 @@ class CreditDAL(BaseDAL):
         await self.db_session.delete(query)
 
     async def get_account_credits(self, account_id: uuid.UUID) -> Sequence[Row]:
-        query = select(Account, Credit, Currency)\
+        query = self._get_account_credits_query(account_id=account_id)
+        query_result = await self.db_session.execute(query)
+
+        return query_result.fetchall()
+
+    def _get_account_credits_query(self, account_id: uuid.UUID) -> Select:
+        return select(Account, Credit, Currency)\
             .filter(Account.id == account_id)\
             .join(Credit, Credit.account_id == Account.id, isouter=True)\
             .join(Currency, Account.currency_id == Currency.id, isouter=True)
 
-        query_result = await self.db_session.execute(query)
+    async def get_user_credits(
+            self,
+            is_open: bool | None = None,
+            account_id: uuid.UUID | None = None,
+            currency_id: int | None = None,
+            limit: int = 100,
+            after: uuid.UUID | None = None
+    ) -> Sequence[Row]:
+        query = select(Credit, Account, Currency)\
+            .join(Account, Credit.account_id == Account.id)\
+            .join(Currency, Account.currency_id == Currency.id)
+        query = _filter_products(query, Credit, is_open, account_id, currency_id)
+
+        if after is not None:
+            query = query.where(Credit.id > after)
+        query = query.order_by(Credit.id).limit(limit)
 
+        query_result = await self.db_session.execute(query)
         return query_result.fetchall()
 
-    async def get_user_credits(self) -> Sequence[Row]:
-        query = select(Account, Credit, Currency) \
-            .join(Credit, Credit.account_id == Account.id, isouter=True) \
-            .join(Currency, Account.currency_id == Currency.id, isouter=True)
+    async def get_user_credit_totals(
+            self,
+            is_open: bool | None = None,
+            account_id: uuid.UUID | None = None,
+            currency_id: int | None = None
+    ) -> Sequence[Row]:
+        query = select(Currency.id, Currency.name, func.count(Credit.id), func.sum(Credit.amount))\
+            .select_from(Credit)\
+            .join(Account, Credit.account_id == Account.id)\
+            .join(Currency, Account.currency_id == Currency.id)
+        query = _filter_products(query, Credit, is_open, account_id, currency_id)
+        query = query.group_by(Currency.id, Currency.name).order_by(Currency.id)
 
         query_result = await self.db_session.execute(query)
-
         return query_result.fetchall()
 
-    async def close_credit(self, credit_id: uuid.UUID) -> (uuid.UUID, Transaction):
-        transaction_dal = TransactionDAL(self.db_session)
+    async def claim_due_credits(self, due_at: datetime, limit: int) -> Sequence[uuid.UUID]:
+        # rows locked by another worker are skipped, not waited for, so concurrent
+        # schedulers split the due credits between them instead of closing one twice
+        query = select(Credit.id)\
+            .where(Credit.is_open)\
+            .where(Credit.matures_at <= due_at)\
+            .where(or_(Credit.next_attempt_at.is_(None), Credit.next_attempt_at <= due_at))\
+            .order_by(Credit.matures_at)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+        query_result = await self.db_session.execute(query)
+        return query_result.scalars().all()
 
-        credit = await self.get_credit_by_id(credit_id=credit_id)
+    async def defer_credit(self, credit_id: uuid.UUID, until: datetime) -> None:
+        # a credit that failed to close is not claimed again before `until`,
+        # so it can't keep the head of the due queue
+        query = update(Credit) \
+            .filter(Credit.id == credit_id) \
+            .values(next_attempt_at=until)
 
-        if not credit.is_open:
-            raise CreditAlreadyClosed(credit_id=credit_id)
+        await self.db_session.execute(query)
 
-        account = await AccountDAL(self.db_session).get_account_by_id(credit.account_id)
-        if account.balance < credit.amount:
-            raise NotEnoughMoney
+    async def close_credit(self, credit_id: uuid.UUID) -> (uuid.UUID, Transaction):
+        transaction_dal = TransactionDAL(self.db_session)
 
+        # checking is_open in the UPDATE itself makes the close atomic: when the closing job
+        # and the /close/ endpoint race, the second one waits for the row and updates nothing
         query = update(Credit) \
             .filter(Credit.id == credit_id) \
-            .values(is_open=False)
+            .filter(Credit.is_open) \
+            .values(is_open=False) \
+            .returning(
+                Credit.id, Credit.account_id, Credit.amount, Credit.interest_rate,
+                Credit.accrued_through, Credit.matures_at
+            )
 
-        await self.db_session.execute(query)
+        credit = (await self.db_session.execute(query)).fetchone()
+        if credit is None:
+            await self.get_credit_by_id(credit_id=credit_id)
+            raise CreditAlreadyClosed(credit_id=credit_id)
+
+        await AccrualDAL(self.db_session).post_outstanding_interest(
+            Credit, credit, transaction_type_id=TransactionTypeEnum.credit_interest.value
+        )
 
         transaction = await transaction_dal.create_transaction(
             transaction_type_id=TransactionTypeEnum.credit_close.value,
             amount=credit.amount,
-            account_id=credit.account_id
+            account_id=credit.account_id,
+            non_negative=True
         )
 
         return credit_id, transaction
+
+
+class AccrualDAL(BaseDAL):
+    async def claim_due_accruals(
+            self, product_model: type[Deposit] | type[Credit], through: date, limit: int
+    ) -> Sequence[Row]:
+        # interest runs up to the day before maturity, matured products wait for the closing job
+        accrue_until = func.least(
+            through,
+            func.coalesce(cast(product_model.matures_at, Date) - 1, through)
+        ).label("accrue_until")
+
+        query = select(
+            product_model.id,
+            product_model.account_id,
+            product_model.amount,
+            product_model.interest_rate,
+            (accrue_until - product_model.accrued_through).label("days"),
+            accrue_until
+        ).where(product_model.is_open)\
+            .where(product_model.interest_rate > 0)\
+            .where(product_model.accrued_through < accrue_until)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)
+
+        query_result = await self.db_session.execute(query)
+        return query_result.fetchall()
+
+    async def post_accruals(
+            self,
+            product_model: type[Deposit] | type[Credit],
+            transaction_type_id: int,
+            product_ids: Sequence[uuid.UUID],
+            account_ids: Sequence[uuid.UUID],
+            interests: Sequence[Decimal],
+            accrued_through: Sequence[date]
+    ) -> None:
+        sign = TRANSACTION_TYPE_SIGNS[transaction_type_id]
+
+        balance_deltas = defaultdict(Decimal)
+        for account_id, interest in zip(account_ids, interests):
+            balance_deltas[account_id] += interest * sign
+
+        if not BALANCE_TRIGGERS:
+            await self._apply_balance_deltas(balance_deltas)
+
+        created_at = datetime.utcnow()
+        records = [
+            (uuid.uuid4(), transaction_type_id, interest, interest * sign, account_id, created_at)
+            for account_id, interest in zip(account_ids, interests) if interest > 0
+        ]
+        connection = await self.db_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Transaction.__tablename__,
+            records=records,
+            columns=("id", "transaction_type_id", "amount", "signed_amount", "account_id", "created_at")
+        )
+
+        accruals = select(
+            func.unnest(bindparam("product_ids", type_=ARRAY(UUID(as_uuid=True)))).label("id"),
+            func.unnest(bindparam("accrued_through", type_=ARRAY(Date))).label("accrued_through")
+        ).subquery()
+        await self.db_session.execute(
+            update(product_model)
+            .where(product_model.id == accruals.c.id)
+            .values(accrued_through=accruals.c.accrued_through),
+            {"product_ids": list(product_ids), "accrued_through": list(accrued_through)}
+        )
+
+    async def post_outstanding_interest(
+            self, product_model: type[Deposit] | type[Credit], product: Row, transaction_type_id: int
+    ) -> None:
+        # interest the accrual job hasn't posted yet, through the same day it would have stopped at
+        accrue_until = datetime.utcnow().date() - timedelta(days=1)
+        if product.matures_at is not None:
+            accrue_until = min(accrue_until, product.matures_at.date() - timedelta(days=1))
+        days = (accrue_until - product.accrued_through).days
+        if days <= 0 or product.interest_rate <= 0:
+            return
+
+        interest, = accrue_interest(
+            [int(product.amount.scaleb(MONEY_SCALE))], [int(product.interest_rate.scaleb(RATE_SCALE))], [days]
+        )
+        await self.post_accruals(
+            product_model,
+            transaction_type_id=transaction_type_id,
+            product_ids=[product.id],
+            account_ids=[product.account_id],
+            interests=[Decimal(interest).scaleb(-MONEY_SCALE)],
+            accrued_through=[accrue_until]
+        )
+
+    async def _apply_balance_deltas(self, balance_deltas: dict[uuid.UUID, Decimal]) -> None:
+        # same UUID lock order as transfers, then every balance in one UPDATE from arrays
+        delta_account_ids = sorted(balance_deltas)
+        await self.db_session.execute(
+            select(Account.id)
+            .where(Account.id == any_(bindparam("account_ids", type_=ARRAY(UUID(as_uuid=True)))))
+            .order_by(Account.id)
+            .with_for_update(),
+            {"account_ids": delta_account_ids}
+        )
+        deltas = select(
+            func.unnest(bindparam("delta_account_ids", type_=ARRAY(UUID(as_uuid=True)))).label("account_id"),
+            func.unnest(bindparam("deltas", type_=ARRAY(Account.balance.type))).label("delta")
+        ).subquery()
+        await self.db_session.execute(
+            update(Account)
+            .where(Account.id == deltas.c.account_id)
+            .values(balance=Account.balance + deltas.c.delta),
+            {
+                "delta_account_ids": delta_account_ids,
+                "deltas": [balance_deltas[account_id] for account_id in delta_account_ids]
+            }
+        )
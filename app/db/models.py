@@ -1,13 +1,23 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, date
 
-from sqlalchemy import Column, String, Float, TIMESTAMP, ForeignKey, Integer, Boolean
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, String, Numeric, TIMESTAMP, ForeignKey, Integer, Boolean, Index, \
+    CheckConstraint, text, Date
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import declarative_base, relationship
+
+from app.money import MONEY_PRECISION, MONEY_SCALE, RATE_PRECISION, RATE_SCALE
 
 
 Base = declarative_base()
 
+Money = Numeric(MONEY_PRECISION, MONEY_SCALE)
+Rate = Numeric(RATE_PRECISION, RATE_SCALE)
+
+
+def _utc_today() -> date:
+    return datetime.utcnow().date()
+
 
 class Tag(Base):
     __tablename__ = "tag"
@@ -28,29 +38,68 @@ class Account(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    balance = Column(Float, nullable=False, default=.0)
+    balance = Column(Money, nullable=False, default=0)
     currency_id = Column(Integer, ForeignKey("currency.id"), nullable=False)
     created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
 
+    # relationships never lazy load: under asyncio they have to be loaded explicitly
+    currency = relationship("Currency", lazy="raise")
+
 
 class Credit(Base):
     __tablename__ = "credit"
+    __table_args__ = (
+        Index("ix_credit_account_id", "account_id"),
+        # only open products are ever due, closed ones drop out of the index
+        Index("ix_credit_matures_at", "matures_at", postgresql_where=text("is_open")),
+        Index(
+            "ix_credit_accrued_through", "accrued_through",
+            postgresql_where=text("is_open AND interest_rate > 0")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    amount = Column(Float, nullable=False, default=1000)
+    amount = Column(Money, nullable=False, default=1000)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.id"), nullable=False)
     is_open = Column(Boolean, nullable=False, default=True)
+    matures_at = Column(TIMESTAMP, nullable=True, default=None)
+    # set after a failed close, the job doesn't claim the row again before it
+    next_attempt_at = Column(TIMESTAMP, nullable=True, default=None)
+    # annual rate, 0.05 is 5%; interest is posted daily for every day after accrued_through
+    interest_rate = Column(Rate, nullable=False, default=0)
+    term_days = Column(Integer, nullable=True, default=None)
+    accrued_through = Column(Date, nullable=False, default=_utc_today)
+
+    account = relationship("Account", lazy="raise")
 
 
 class Deposit(Base):
     __tablename__ = "deposit"
+    __table_args__ = (
+        Index("ix_deposit_account_id", "account_id"),
+        # only open products are ever due, closed ones drop out of the index
+        Index("ix_deposit_matures_at", "matures_at", postgresql_where=text("is_open")),
+        Index(
+            "ix_deposit_accrued_through", "accrued_through",
+            postgresql_where=text("is_open AND interest_rate > 0")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    amount = Column(Float, nullable=False, default=1000)
+    amount = Column(Money, nullable=False, default=1000)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.id"), nullable=False)
     is_open = Column(Boolean, nullable=False, default=True)
+    matures_at = Column(TIMESTAMP, nullable=True, default=None)
+    # set after a failed close, the job doesn't claim the row again before it
+    next_attempt_at = Column(TIMESTAMP, nullable=True, default=None)
+    # annual rate, 0.05 is 5%; interest is posted daily for every day after accrued_through
+    interest_rate = Column(Rate, nullable=False, default=0)
+    term_days = Column(Integer, nullable=True, default=None)
+    accrued_through = Column(Date, nullable=False, default=_utc_today)
+
+    account = relationship("Account", lazy="raise")
 
 
 class TransactionType(Base):
@@ -62,10 +111,56 @@ class TransactionType(Base):
 
 class Transaction(Base):
     __tablename__ = "transaction"
+    __table_args__ = (
+        # (created_at, id) is the keyset of TransactionDAL.get_transactions,
+        # every listing filter gets its own prefix in front of it
+        Index("ix_transaction_created_at_id", "created_at", "id"),
+        # signed_amount is carried in the leaf pages, per-account sums are index-only scans
+        Index(
+            "ix_transaction_account_id_created_at_id", "account_id", "created_at", "id",
+            postgresql_include=["signed_amount"]
+        ),
+        Index("ix_transaction_tag_id_created_at_id", "tag_id", "created_at", "id"),
+        Index(
+            "ix_transaction_transaction_type_id_created_at_id",
+            "transaction_type_id", "created_at", "id"
+        ),
+        CheckConstraint("abs(signed_amount) = amount", name="ck_transaction_signed_amount"),
+        # monthly partitions, see app.db.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     transaction_type_id = Column(Integer, ForeignKey("transaction_type.id"), nullable=False)
-    amount = Column(Float, nullable=False, default=1000)
+    amount = Column(Money, nullable=False, default=1000)
+    # income -> +amount, expense -> -amount, written together with amount
+    signed_amount = Column(Money, nullable=False)
     tag_id = Column(UUID(as_uuid=True), ForeignKey("tag.id"), nullable=True, default=None)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.id"), nullable=False)
-    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    # the partition key has to be in the table's primary key
+    created_at = Column(TIMESTAMP, primary_key=True, default=datetime.utcnow)
+
+    transaction_type = relationship("TransactionType", lazy="raise")
+    tag = relationship("Tag", lazy="raise")
+    account = relationship("Account", lazy="raise")
+
+    # ids alone identify a transaction in the ORM, so session.get() takes just the id
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class BalanceSnapshot(Base):
+    __tablename__ = "balance_snapshot"
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey("account.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Money, nullable=False, default=0)
+    checkpoint_at = Column(TIMESTAMP, nullable=False)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True, default=None)
+    response_body = Column(JSONB, nullable=True, default=None)
+    expires_at = Column(TIMESTAMP, nullable=False)
@@ -0,0 +1,170 @@
+"""Maintain the monthly range partitions of `transaction`.
+
+    python -m app.db.partitions list
+    python -m app.db.partitions create --ahead 3
+    python -m app.db.partitions create --since 2023-01
+    python -m app.db.partitions detach --before 2024-01 --archive-schema archive
+
+`create` adds every missing month from --since (default: this month) up to --ahead months
+from now. Rows that already landed in transaction_default for such a month are moved into
+the new partition in the same transaction. `detach` removes whole months before --before
+from the table, leaving them as plain tables, optionally moved to another schema or dropped.
+Account balances and balance snapshots are not touched by detaching.
+"""
+import argparse
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import engine
+from config import TRANSACTION_PARTITIONS_AHEAD
+
+
+DEFAULT_PARTITION = "transaction_default"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transaction_y{month.year}m{month.month:02d}"
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+async def get_partitions(connection: AsyncConnection) -> dict[str, tuple[date, date] | None]:
+    """Partition name -> [from, to) months, None for the default partition."""
+    rows = (await connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'transaction'::regclass ORDER BY c.relname"
+    ))).fetchall()
+
+    partitions = {}
+    for name, bound in rows:
+        if bound == "DEFAULT":
+            partitions[name] = None
+        else:
+            # FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')
+            lower, upper = (part.split("'")[1] for part in bound.split(" TO "))
+            partitions[name] = (datetime.fromisoformat(lower).date(), datetime.fromisoformat(upper).date())
+    return partitions
+
+
+async def create_partition(connection: AsyncConnection, month: date) -> bool:
+    name = partition_name(month)
+    bounds = {"from": month, "to": add_months(month, 1)}
+    if name in await get_partitions(connection):
+        return False
+
+    stray_rows = await connection.scalar(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :from AND created_at < :to)"
+    ), bounds)
+
+    if not stray_rows:
+        await connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF transaction "
+            f"FOR VALUES FROM ('{bounds['from']}') TO ('{bounds['to']}')"
+        ))
+        return True
+
+    # a new partition can't overlap rows in the default one: take the default out, move the
+    # month over and put it back. Both tables are written directly, so the statement-level
+    # balance triggers on `transaction` don't see the move.
+    await connection.execute(text(f"ALTER TABLE transaction DETACH PARTITION {DEFAULT_PARTITION}"))
+    await connection.execute(text(
+        f"CREATE TABLE {name} PARTITION OF transaction "
+        f"FOR VALUES FROM ('{bounds['from']}') TO ('{bounds['to']}')"
+    ))
+    await connection.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :from AND created_at < :to RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    await connection.execute(text(f"ALTER TABLE transaction ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return True
+
+
+async def create_partitions(connection: AsyncConnection, since: date, until: date) -> list[str]:
+    created = []
+    month = month_start(since)
+    while month <= until:
+        if await create_partition(connection, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+async def create_partitions_for_default_rows(connection: AsyncConnection) -> list[str]:
+    # e.g. after a backdated import or seeding history older than the first partition
+    months = (await connection.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION} ORDER BY 1"
+    ))).scalars().all()
+    return [partition_name(month) for month in months if await create_partition(connection, month)]
+
+
+async def detach_partitions(
+        connection: AsyncConnection, before: date, archive_schema: str | None = None, drop: bool = False
+) -> list[str]:
+    detached = []
+    for name, bounds in (await get_partitions(connection)).items():
+        if bounds is None or bounds[1] > before:
+            continue
+        await connection.execute(text(f"ALTER TABLE transaction DETACH PARTITION {name}"))
+        if drop:
+            await connection.execute(text(f"DROP TABLE {name}"))
+        elif archive_schema is not None:
+            await connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+            await connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+        detached.append(name)
+    return detached
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list")
+    create_parser = subparsers.add_parser("create")
+    create_parser.add_argument("--since", type=parse_month)
+    create_parser.add_argument("--ahead", type=int, default=TRANSACTION_PARTITIONS_AHEAD)
+    create_parser.add_argument("--from-default", action="store_true",
+                               help="also split every month found in the default partition")
+    detach_parser = subparsers.add_parser("detach")
+    detach_parser.add_argument("--before", type=parse_month, required=True)
+    detach_target = detach_parser.add_mutually_exclusive_group()
+    detach_target.add_argument("--archive-schema")
+    detach_target.add_argument("--drop", action="store_true")
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        if args.command == "create":
+            this_month = month_start(datetime.utcnow().date())
+            changed = await create_partitions(
+                connection, since=args.since or this_month, until=add_months(this_month, args.ahead)
+            )
+            if args.from_default:
+                changed += await create_partitions_for_default_rows(connection)
+            print(f"created {len(changed)} partitions: {', '.join(changed)}")
+        elif args.command == "detach":
+            changed = await detach_partitions(
+                connection, before=args.before, archive_schema=args.archive_schema, drop=args.drop
+            )
+            print(f"detached {len(changed)} partitions: {', '.join(changed)}")
+        else:
+            for name, bounds in (await get_partitions(connection)).items():
+                print(f"{name:24} {'DEFAULT' if bounds is None else f'{bounds[0]} .. {bounds[1]}'}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
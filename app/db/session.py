@@ -1,13 +1,24 @@
 import enum
+import logging
+import time
+from bisect import bisect_left
 from collections.abc import Generator
+from contextvars import ContextVar
 
 from fastapi import Depends
 from sqlalchemy.exc import ProgrammingError
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker, create_session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from app.monitoring import POOL_WAIT, POOL_CHECKOUTS, observe_pool
+from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, DB_ECHO, DB_POOL_SIZE, \
+    DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, \
+    QUERY_INSTRUMENTATION, SLOW_QUERY_THRESHOLD_MS, METRICS_ENABLED
+
+
+logger = logging.getLogger(__name__)
 
 
 @enum.unique
@@ -20,23 +31,195 @@ class TransactionTypeEnum(enum.IntEnum):
     credit_close = 6
     deposit_open = 7
     deposit_close = 8
+    deposit_interest = 9
+    credit_interest = 10
 
     @property
     def is_plus_sign(self) -> bool:
-        return self.name in ("income", "money_transfer_receiver", "credit_open", "deposit_close")
+        return self.name in (
+            "income", "money_transfer_receiver", "credit_open", "deposit_close", "deposit_interest"
+        )
 
     @property
     def is_reserved_type(self) -> bool:
         return self.name not in ("income", "expense")
 
+    @property
+    def sign(self) -> int:
+        return TRANSACTION_TYPE_SIGNS[self.value]
+
+
+# per type id lookups for hot paths, no enum construction or name matching per row
+TRANSACTION_TYPE_SIGNS = {
+    transaction_type.value: 2*transaction_type.is_plus_sign - 1 for transaction_type in TransactionTypeEnum
+}
+RESERVED_TRANSACTION_TYPE_IDS = frozenset(
+    transaction_type.value for transaction_type in TransactionTypeEnum if transaction_type.is_reserved_type
+)
+
 
 CURRENCY_DATA = (
     {"id": 1, "name": "uah"},
     {"id": 2, "name": "usd"},
 )
 
-db_url = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-engine = create_async_engine(db_url, future=True, echo=True)
+class PoolMetrics:
+    def __init__(self):
+        self.waits = 0
+        self.wait_time = .0
+        self.max_wait_time = .0
+
+    def observe_wait(self, wait_time: float) -> None:
+        self.waits += 1
+        self.wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeasuredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - started_at
+            pool_metrics.observe_wait(wait_time)
+            if METRICS_ENABLED:
+                POOL_WAIT.observe(wait_time)
+
+
+QUERY_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # the last slot counts values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = .0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> dict[str, int]:
+        total = 0
+        cumulative = {}
+        for bucket, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            cumulative[bucket] = total
+        return cumulative
+
+
+class QueryStats:
+    # one per HTTP request, filled in by the cursor events below
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = .0
+
+    @property
+    def route(self) -> str:
+        return route_name(self.scope) if self.scope is not None else "-"
+
+    def server_timing(self, total_time: float) -> str:
+        return f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", total;dur={total_time * 1000:.2f}'
+
+
+class RouteQueryStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time_ms = Histogram(DB_TIME_BUCKETS_MS)
+
+
+class QueryMetrics:
+    def __init__(self):
+        self.slow_queries = 0
+        self.routes: dict[str, RouteQueryStats] = {}
+
+    def observe_request(self, stats: QueryStats) -> None:
+        route_stats = self.routes.get(stats.route)
+        if route_stats is None:
+            route_stats = self.routes[stats.route] = RouteQueryStats()
+        route_stats.requests += 1
+        route_stats.queries.observe(stats.queries)
+        route_stats.db_time_ms.observe(stats.db_time * 1000)
+
+
+query_metrics = QueryMetrics()
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def route_name(scope: dict) -> str:
+    # route templates rather than raw paths, so ids don't blow up the number of series
+    route = scope.get("route")
+    return f"{scope['method']} {route.path}" if route is not None else "unmatched"
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    connection.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    query_time = time.perf_counter() - connection.info["query_started_at"].pop()
+
+    # SQLAlchemy runs the driver in a greenlet that shares the request's context
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += query_time
+
+    if query_time * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        query_metrics.slow_queries += 1
+        logger.warning(
+            "slow query %.1f ms on %s: %s", query_time * 1000,
+            stats.route if stats is not None else "-", statement
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def create_engine_from_settings() -> AsyncEngine:
+    return create_async_engine(
+        db_url,
+        echo=DB_ECHO,
+        poolclass=MeasuredQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    )
+
+
+db_url = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}" \
+         f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}"
+engine = create_engine_from_settings()
+# no listeners at all when disabled, so the cursor path stays untouched
+if QUERY_INSTRUMENTATION:
+    instrument_engine(engine)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    POOL_CHECKOUTS.inc()
+    observe_pool(engine.pool)
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    observe_pool(engine.pool)
+
+
+if METRICS_ENABLED:
+    event.listen(engine.sync_engine.pool, "checkout", _on_checkout)
+    event.listen(engine.sync_engine.pool, "checkin", _on_checkin)
 
 async_session = sessionmaker(
     engine,
@@ -77,6 +77,16 @@ class DepositNotFound(ProjectBaseException):
         )
 
 
+class DepositAlreadyClosed(ProjectBaseException):
+    def __init__(self, deposit_id: uuid.UUID, *args, **kwargs):
+        super(DepositAlreadyClosed, self).__init__(
+            status_code=422,
+            detail=f"Deposit with id '{deposit_id}' is already closed!",
+            *args,
+            **kwargs
+        )
+
+
 class CreditAlreadyClosed(ProjectBaseException):
     def __init__(self, credit_id: uuid.UUID, *args, **kwargs):
         super(CreditAlreadyClosed, self).__init__(
@@ -106,3 +116,43 @@ class NotEnoughMoney(ProjectBaseException):
             *args,
             **kwargs
         )
+
+
+class InvalidCursor(ProjectBaseException):
+    def __init__(self, cursor: str, *args, **kwargs):
+        super(InvalidCursor, self).__init__(
+            status_code=422,
+            detail=f"Cursor '{cursor}' is invalid!",
+            *args,
+            **kwargs
+        )
+
+
+class ExchangeRateUnavailable(ProjectBaseException):
+    def __init__(self, currency_from: str, currency_to: str, *args, **kwargs):
+        super(ExchangeRateUnavailable, self).__init__(
+            status_code=503,
+            detail=f"Exchange rate '{currency_from}' -> '{currency_to}' is unavailable!",
+            *args,
+            **kwargs
+        )
+
+
+class IdempotencyKeyInProgress(ProjectBaseException):
+    def __init__(self, key: str, *args, **kwargs):
+        super(IdempotencyKeyInProgress, self).__init__(
+            status_code=409,
+            detail=f"Request with idempotency key '{key}' is still in progress!",
+            *args,
+            **kwargs
+        )
+
+
+class IdempotencyKeyReused(ProjectBaseException):
+    def __init__(self, key: str, *args, **kwargs):
+        super(IdempotencyKeyReused, self).__init__(
+            status_code=422,
+            detail=f"Idempotency key '{key}' was already used for a different request!",
+            *args,
+            **kwargs
+        )
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from decimal import Decimal
+
+import httpx
+
+from app.exception import ExchangeRateUnavailable
+from app.money import to_money
+from app.monitoring import EXCHANGE_RATE_LATENCY
+from config import EXCHANGE_RATE_API_URL, EXCHANGE_RATE_API_KEY, EXCHANGE_RATE_TTL, \
+    EXCHANGE_RATE_TIMEOUT, EXCHANGE_RATE_MAX_CONNECTIONS
+
+
+class ExchangeRateClient:
+    def __init__(
+            self,
+            api_url: str,
+            api_key: str | None = None,
+            ttl: float = 60,
+            timeout: float = 5,
+            max_connections: int = 20
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self._client: httpx.AsyncClient | None = None
+        self._rates: dict[tuple[str, str], tuple[Decimal, float]] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # created lazily so the pool is bound to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def get_rate(self, currency_from: str, currency_to: str) -> Decimal:
+        if currency_from == currency_to:
+            return Decimal(1)
+
+        pair = (currency_from, currency_to)
+        cached_rate = self._get_cached_rate(pair)
+        if cached_rate is not None:
+            return cached_rate
+
+        # one request per pair even when many transfers miss the cache at once
+        async with self._locks.setdefault(pair, asyncio.Lock()):
+            cached_rate = self._get_cached_rate(pair)
+            if cached_rate is not None:
+                return cached_rate
+
+            rate = await self._fetch_rate(currency_from, currency_to)
+            self._rates[pair] = (rate, time.monotonic() + self.ttl)
+            return rate
+
+    async def convert(self, currency_from: str, currency_to: str, amount: Decimal) -> Decimal:
+        return to_money(amount * await self.get_rate(currency_from, currency_to))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_cached_rate(self, pair: tuple[str, str]) -> Decimal | None:
+        cached = self._rates.get(pair)
+        if cached is None or cached[1] < time.monotonic():
+            return None
+        return cached[0]
+
+    async def _fetch_rate(self, currency_from: str, currency_to: str) -> Decimal:
+        params = {"from": currency_from, "to": currency_to, "amount": 1}
+        if self.api_key:
+            params["access_key"] = self.api_key
+
+        started_at = time.perf_counter()
+        try:
+            response = await self.client.get(self.api_url, params=params)
+        except httpx.HTTPError:
+            EXCHANGE_RATE_LATENCY.labels("error").observe(time.perf_counter() - started_at)
+            raise ExchangeRateUnavailable(currency_from=currency_from, currency_to=currency_to)
+        EXCHANGE_RATE_LATENCY.labels(str(response.status_code)).observe(time.perf_counter() - started_at)
+
+        if response.status_code != 200:
+            raise ExchangeRateUnavailable(currency_from=currency_from, currency_to=currency_to)
+
+        # parsed straight into Decimal, the rate never goes through a float
+        result = response.json(parse_float=Decimal).get("result")
+        if result is None:
+            raise ExchangeRateUnavailable(currency_from=currency_from, currency_to=currency_to)
+
+        return Decimal(result)
+
+
+exchange_rate_client = ExchangeRateClient(
+    api_url=EXCHANGE_RATE_API_URL,
+    api_key=EXCHANGE_RATE_API_KEY,
+    ttl=EXCHANGE_RATE_TTL,
+    timeout=EXCHANGE_RATE_TIMEOUT,
+    max_connections=EXCHANGE_RATE_MAX_CONNECTIONS
+)
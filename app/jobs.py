@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.accrual import claim_deposit_accruals, post_deposit_interest, claim_credit_accruals, \
+    post_credit_interest
+from app.db.dals import CreditDAL, DepositDAL
+from app.db.session import async_session
+from app.exception import ProjectBaseException
+from config import JOBS_ENABLED, JOB_INTERVAL, JOB_BATCH_SIZE, JOB_WORKERS, JOB_RETRY_DELAY, \
+    ACCRUAL_BATCH_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+Claim = Callable[[AsyncSession, datetime, int], Awaitable[Sequence]]
+Process = Callable[[AsyncSession, uuid.UUID], Awaitable[None]]
+ProcessBatch = Callable[[AsyncSession, Sequence], Awaitable[None]]
+Defer = Callable[[AsyncSession, uuid.UUID, datetime], Awaitable[None]]
+
+
+class JobStats:
+    def __init__(self):
+        self.batches = 0
+        self.failed_batches = 0
+        self.processed = 0
+        self.failed = 0
+        self.batch_time = .0
+        self.item_time = .0
+        self.max_item_time = .0
+
+    def observe_item(self, item_time: float) -> None:
+        self.item_time += item_time
+        self.max_item_time = max(self.max_item_time, item_time)
+
+
+class Job:
+    def __init__(
+            self, name: str, claim: Claim, process: Process | None,
+            interval: float, batch_size: int, workers: int,
+            process_batch: ProcessBatch | None = None,
+            defer: Defer | None = None, retry_delay: float = JOB_RETRY_DELAY
+    ):
+        self.name = name
+        self.claim = claim
+        self.process = process
+        self.process_batch = process_batch
+        self.defer = defer
+        self.retry_delay = retry_delay
+        self.interval = interval
+        self.batch_size = batch_size
+        self.workers = workers
+        self.stats = JobStats()
+
+
+class JobScheduler:
+    def __init__(self, session_factory=async_session, enabled: bool = True):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add_job(
+            self, name: str, claim: Claim, process: Process | None = None,
+            interval: float = JOB_INTERVAL,
+            batch_size: int = JOB_BATCH_SIZE,
+            workers: int = JOB_WORKERS,
+            process_batch: ProcessBatch | None = None,
+            defer: Defer | None = None,
+            retry_delay: float = JOB_RETRY_DELAY
+    ) -> Job:
+        # `process` handles one claimed id in its own savepoint,
+        # `process_batch` handles the whole claimed batch at once;
+        # `defer` keeps an id that failed to process from being claimed for `retry_delay` seconds
+        job = Job(
+            name, claim, process, interval=interval, batch_size=batch_size, workers=workers,
+            process_batch=process_batch, defer=defer, retry_delay=retry_delay
+        )
+        self.jobs[name] = job
+        return job
+
+    async def run_batch(self, job: Job) -> int:
+        # claimed rows stay locked until the batch commits, so every gunicorn worker
+        # and node can run the same jobs without processing an item twice.
+        # Returns the number of items processed, failed ones are not counted
+        started_at = time.perf_counter()
+        async with self.session_factory() as session:
+            async with session.begin():
+                items = await job.claim(session, datetime.utcnow(), job.batch_size)
+                if job.process_batch is not None:
+                    processed = len(items)
+                    if items:
+                        await job.process_batch(session, items)
+                        job.stats.processed += len(items)
+                        job.stats.observe_item((time.perf_counter() - started_at) / len(items))
+                else:
+                    processed = await self._process_items(job, session, items)
+
+        job.stats.batches += 1
+        job.stats.batch_time += time.perf_counter() - started_at
+        return processed
+
+    async def _process_items(self, job: Job, session: AsyncSession, item_ids: Sequence[uuid.UUID]) -> int:
+        processed = 0
+        for item_id in item_ids:
+            item_started_at = time.perf_counter()
+            try:
+                async with session.begin_nested():
+                    await job.process(session, item_id)
+                job.stats.processed += 1
+                processed += 1
+            except ProjectBaseException as exception:
+                # e.g. not enough money to close a credit: the item stays due, but is pushed
+                # back so it doesn't take a slot in every batch until it can be processed
+                job.stats.failed += 1
+                logger.warning("%s: item %s skipped: %s", job.name, item_id, exception.detail)
+                if job.defer is not None:
+                    await job.defer(session, item_id, datetime.utcnow() + timedelta(seconds=job.retry_delay))
+            job.stats.observe_item(time.perf_counter() - item_started_at)
+        return processed
+
+    async def _run_worker(self, job: Job) -> None:
+        while True:
+            try:
+                processed = await self.run_batch(job)
+            except Exception:
+                job.stats.failed_batches += 1
+                logger.exception("%s: batch failed", job.name)
+                processed = 0
+
+            # a fully processed batch means there is a backlog, keep draining it without sleeping;
+            # failed items don't count, they would otherwise keep a worker spinning on them
+            if processed < job.batch_size:
+                await asyncio.sleep(job.interval)
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        for job in self.jobs.values():
+            for _ in range(job.workers):
+                self._tasks.append(asyncio.create_task(self._run_worker(job)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+async def _claim_due_deposits(session: AsyncSession, due_at: datetime, limit: int) -> Sequence[uuid.UUID]:
+    return await DepositDAL(session).claim_due_deposits(due_at=due_at, limit=limit)
+
+
+async def _close_deposit(session: AsyncSession, deposit_id: uuid.UUID) -> None:
+    await DepositDAL(session).close_deposit(deposit_id=deposit_id)
+
+
+async def _defer_deposit(session: AsyncSession, deposit_id: uuid.UUID, until: datetime) -> None:
+    await DepositDAL(session).defer_deposit(deposit_id=deposit_id, until=until)
+
+
+async def _claim_due_credits(session: AsyncSession, due_at: datetime, limit: int) -> Sequence[uuid.UUID]:
+    return await CreditDAL(session).claim_due_credits(due_at=due_at, limit=limit)
+
+
+async def _close_credit(session: AsyncSession, credit_id: uuid.UUID) -> None:
+    await CreditDAL(session).close_credit(credit_id=credit_id)
+
+
+async def _defer_credit(session: AsyncSession, credit_id: uuid.UUID, until: datetime) -> None:
+    await CreditDAL(session).defer_credit(credit_id=credit_id, until=until)
+
+
+job_scheduler = JobScheduler(enabled=JOBS_ENABLED)
+job_scheduler.add_job(
+    "close_matured_deposits", claim=_claim_due_deposits, process=_close_deposit, defer=_defer_deposit
+)
+job_scheduler.add_job(
+    "close_matured_credits", claim=_claim_due_credits, process=_close_credit, defer=_defer_credit
+)
+job_scheduler.add_job(
+    "accrue_deposit_interest", claim=claim_deposit_accruals, process_batch=post_deposit_interest,
+    batch_size=ACCRUAL_BATCH_SIZE
+)
+job_scheduler.add_job(
+    "accrue_credit_interest", claim=claim_credit_accruals, process_batch=post_credit_interest,
+    batch_size=ACCRUAL_BATCH_SIZE
+)
@@ -0,0 +1,35 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Sequence
+
+
+# money is stored as NUMERIC(MONEY_PRECISION, MONEY_SCALE) and handled as Decimal,
+# which is backed by libmpdec on CPython, so sums are exact and no tolerance is needed
+MONEY_PRECISION = 18
+MONEY_SCALE = 2
+
+# interest rates are stored as NUMERIC(RATE_PRECISION, RATE_SCALE), e.g. 0.052500
+RATE_PRECISION = 9
+RATE_SCALE = 6
+
+CENT = Decimal(1).scaleb(-MONEY_SCALE)
+
+DAYS_IN_YEAR = 365
+
+# interest = principal * rate * days / 365 in integer minor units: principals are cents,
+# rates are millionths, so one rounding at the end is the only inexact step
+_DENOMINATOR = DAYS_IN_YEAR * 10**RATE_SCALE
+
+
+def to_money(value: Decimal | int | float | str) -> Decimal:
+    if isinstance(value, float):
+        # repr is the shortest decimal that round-trips, Decimal(float) is the full binary expansion
+        value = repr(value)
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def accrue_interest(principals: Sequence[int], rates: Sequence[int], days: Sequence[int]) -> list[int]:
+    """Simple interest in minor units for whole columns, rounded half up."""
+    return [
+        (2 * principal * rate * days_ + _DENOMINATOR) // (2 * _DENOMINATOR)
+        for principal, rate, days_ in zip(principals, rates, days)
+    ]
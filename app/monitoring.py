@@ -0,0 +1,81 @@
+import functools
+import inspect
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.routing import Route
+
+from config import PROMETHEUS_MULTIPROC_DIR
+
+
+# values live in PROMETHEUS_MULTIPROC_DIR files when it is set (see gunicorn.conf.py),
+# so whichever worker serves /metrics reports the sum over all of them
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ("router", "route", "status")
+)
+DAL_LATENCY = Histogram(
+    "dal_method_duration_seconds", "DAL method latency, including the queries it runs",
+    ("dal", "method"),
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, float("inf"))
+)
+EXCHANGE_RATE_LATENCY = Histogram(
+    "exchange_rate_request_duration_seconds", "Exchange rate API request latency",
+    ("outcome",)
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(.0001, .001, .005, .01, .05, .1, .5, 1, 5, float("inf"))
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections in use", multiprocess_mode="livesum"
+)
+POOL_IDLE = Gauge(
+    "db_pool_idle_connections", "Open connections waiting in the pool", multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Connections open above pool_size", multiprocess_mode="livesum"
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connection checkouts")
+
+
+def router_name(route: Route) -> str:
+    # every handler module owns one APIRouter, so the endpoint's module names the router:
+    # "/api/transaction/all/" -> "transaction", "/api/accounts/" -> "user"
+    return route.endpoint.__module__.rsplit(".", 1)[-1]
+
+
+def observe_pool(pool) -> None:
+    POOL_CHECKED_OUT.set(pool.checkedout())
+    POOL_IDLE.set(pool.checkedin())
+    POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+def instrument_dal(cls: type) -> None:
+    """Time every coroutine method of a DAL class, labelled with the class and method name."""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _timed(method, DAL_LATENCY.labels(cls.__name__, name)))
+
+
+def _timed(method, histogram):
+    @functools.wraps(method)
+    async def timed(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started_at)
+
+    return timed
+
+
+def generate_metrics() -> bytes:
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,73 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dals import AccountDAL
+from config import TRANSFER_MAX_RETRIES, TRANSFER_RETRY_BACKOFF
+
+
+T = TypeVar("T")
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = ("40001", "40P01")
+
+
+class TransferStats:
+    def __init__(self):
+        self.transfers = 0
+        self.retries = 0
+        self.retries_exhausted = 0
+        self.lock_acquisitions = 0
+        self.lock_wait_time = .0
+        self.max_lock_wait_time = .0
+
+
+transfer_stats = TransferStats()
+
+
+def _is_retryable(exception: DBAPIError) -> bool:
+    return getattr(exception.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def lock_transfer_accounts(session: AsyncSession, account_ids: set[uuid.UUID]) -> None:
+    started_at = time.perf_counter()
+    await AccountDAL(session).lock_accounts(account_ids)
+    lock_wait_time = time.perf_counter() - started_at
+
+    transfer_stats.lock_acquisitions += 1
+    transfer_stats.lock_wait_time += lock_wait_time
+    transfer_stats.max_lock_wait_time = max(transfer_stats.max_lock_wait_time, lock_wait_time)
+
+
+async def run_transfer(
+        db,
+        account_ids: set[uuid.UUID],
+        work: Callable[[AsyncSession], Awaitable[T]],
+        max_retries: int = TRANSFER_MAX_RETRIES,
+        backoff: float = TRANSFER_RETRY_BACKOFF
+) -> T:
+    # every attempt is a fresh DB transaction: accounts are locked in UUID order
+    # first, then `work` runs; deadlocks and serialization failures are retried
+    for attempt in range(max_retries + 1):
+        try:
+            async with db as session:
+                async with session.begin():
+                    await lock_transfer_accounts(session, account_ids)
+                    result = await work(session)
+
+            transfer_stats.transfers += 1
+            return result
+        except DBAPIError as exception:
+            if not _is_retryable(exception):
+                raise exception
+            if attempt == max_retries:
+                transfer_stats.retries_exhausted += 1
+                raise exception
+
+            transfer_stats.retries += 1
+            await asyncio.sleep(backoff * 2 ** attempt * random.uniform(.5, 1))
@@ -0,0 +1,140 @@
+"""Check the interest kernel against the per-row reference and time a nightly accrual run.
+
+Without a database only the kernel is checked, on random principals, rates and terms:
+
+    python -m benchmarks.accrual --rows 1000000
+
+With --db, deposits and credits are seeded (see benchmarks.seed) with random rates and
+a few days of pending interest, then the accrual jobs run until nothing is due. Posted
+interest totals must match the per-row reference exactly:
+
+    alembic upgrade head && python -m benchmarks.accrual --db --products 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.accrual import accrue_interest, accrue_interest_reference, claim_deposit_accruals, \
+    post_deposit_interest, claim_credit_accruals, post_credit_interest
+from app.db.session import async_session, engine, TransactionTypeEnum
+from app.jobs import JobScheduler
+from app.money import MONEY_SCALE, RATE_SCALE
+from benchmarks.seed import seed, SEED_NAME
+
+
+def check_kernel(rows: int) -> None:
+    principals = [random.randrange(1, 10**12) for _ in range(rows)]
+    rates = [random.randrange(0, 10**6) for _ in range(rows)]
+    days = [random.randrange(1, 400) for _ in range(rows)]
+
+    started_at = time.perf_counter()
+    interests = accrue_interest(principals, rates, days)
+    kernel_elapsed = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    references = [
+        accrue_interest_reference(
+            Decimal(principal).scaleb(-MONEY_SCALE), Decimal(rate).scaleb(-RATE_SCALE), days_
+        ) for principal, rate, days_ in zip(principals, rates, days)
+    ]
+    reference_elapsed = time.perf_counter() - started_at
+
+    mismatches = sum(
+        1 for interest, reference in zip(interests, references)
+        if Decimal(interest).scaleb(-MONEY_SCALE) != reference
+    )
+    print(f"kernel    {rows / kernel_elapsed:,.0f} rows/s")
+    print(f"reference {rows / reference_elapsed:,.0f} rows/s")
+    if mismatches:
+        raise SystemExit(f"{mismatches} of {rows} interests differ from the reference")
+
+
+async def _posted_interest(connection) -> dict[str, Decimal]:
+    return {
+        table: await connection.scalar(text(
+            "SELECT coalesce(sum(amount), 0) FROM transaction WHERE transaction_type_id = :transaction_type_id"
+        ), {"transaction_type_id": transaction_type.value})
+        for table, transaction_type in (
+            ("deposit", TransactionTypeEnum.deposit_interest),
+            ("credit", TransactionTypeEnum.credit_interest),
+        )
+    }
+
+
+async def run_accrual(products: int, batch_size: int, workers: int, pending_days: int) -> None:
+    async with engine.begin() as connection:
+        await seed(connection, accounts=10_000, tags=10, transactions=0, products=products)
+        for table in ("deposit", "credit"):
+            await connection.execute(text(
+                f"UPDATE {table} SET interest_rate = round((random() * 0.2)::numeric, 6), "
+                f"accrued_through = (now() at time zone 'utc')::date - 1 - :pending_days, "
+                f"matures_at = NULL "
+                f"WHERE name = :name AND is_open"
+            ), {"name": SEED_NAME, "pending_days": pending_days})
+        expected = {
+            table: (await connection.execute(text(
+                f"SELECT amount, interest_rate FROM {table} WHERE name = :name AND is_open"
+            ), {"name": SEED_NAME})).fetchall()
+            for table in ("deposit", "credit")
+        }
+        posted_before = await _posted_interest(connection)
+
+    scheduler = JobScheduler(session_factory=async_session)
+    jobs = (
+        scheduler.add_job(
+            "accrue_deposit_interest", claim=claim_deposit_accruals, process_batch=post_deposit_interest,
+            batch_size=batch_size, workers=workers
+        ),
+        scheduler.add_job(
+            "accrue_credit_interest", claim=claim_credit_accruals, process_batch=post_credit_interest,
+            batch_size=batch_size, workers=workers
+        ),
+    )
+
+    async def worker(job) -> None:
+        while await scheduler.run_batch(job) == job.batch_size:
+            pass
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(job) for job in jobs for _ in range(job.workers)))
+    elapsed = time.perf_counter() - started_at
+
+    accrued = sum(job.stats.processed for job in jobs)
+    print(f"{accrued} products accrued in {elapsed:.2f}s: {accrued / elapsed:,.0f} products/s")
+
+    async with engine.connect() as connection:
+        posted_after = await _posted_interest(connection)
+    await engine.dispose()
+
+    for table in ("deposit", "credit"):
+        reference_total = sum(
+            accrue_interest_reference(amount, interest_rate, pending_days)
+            for amount, interest_rate in expected[table]
+        )
+        posted_total = posted_after[table] - posted_before[table]
+        print(f"{table:8} posted {posted_total}, reference {reference_total}")
+        if posted_total != reference_total:
+            raise SystemExit(f"{table} interest differs from the reference")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", action="store_true")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--pending-days", type=int, default=3)
+    args = parser.parse_args()
+
+    check_kernel(args.rows)
+    if args.db:
+        asyncio.run(run_accrual(args.products, args.batch_size, args.workers, args.pending_days))
+
+
+if __name__ == "__main__":
+    main()
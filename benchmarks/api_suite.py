@@ -0,0 +1,224 @@
+"""Load-test the real ASGI app in-process and report latency, throughput and DB queries as JSON.
+
+Seeds the configured Postgres (see benchmarks.seed) unless --skip-seed is given, then drives
+create_app() through httpx with --concurrency async clients per scenario. Transfers convert
+through benchmarks.fx_stub mounted in-process, so no network or API key is needed.
+Scenarios run one after another, so the DB query count of a scenario is exactly its own:
+
+    alembic upgrade head && python -m benchmarks.api_suite --transactions 1000000 --output before.json
+    python -m benchmarks.api_suite --skip-seed --output after.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable
+
+import httpx
+from sqlalchemy import event, select, text
+
+from app import create_app
+from app.db.models import Account, Tag, Transaction
+from app.db.session import async_session, engine, CURRENCY_DATA, TransactionTypeEnum
+from app.exchange_rate import exchange_rate_client
+from app.jobs import job_scheduler
+from benchmarks.common import QueryCounter, percentiles
+from benchmarks.fx_stub import create_stub_app
+from benchmarks.seed import seed, SEED_NAME
+
+
+Request = tuple[str, str, dict]
+
+
+async def _load_ids(samples: int) -> tuple[list, list, list]:
+    async with async_session() as session:
+        account_ids = (await session.scalars(
+            select(Account.id).where(Account.name == SEED_NAME).limit(samples)
+        )).all()
+        tag_ids = (await session.scalars(select(Tag.id).where(Tag.name == SEED_NAME).limit(samples))).all()
+        transaction_ids = (await session.scalars(
+            select(Transaction.id).where(Transaction.account_id.in_(account_ids)).limit(samples)
+        )).all()
+    return list(account_ids), list(tag_ids), list(transaction_ids)
+
+
+async def _create_funded_accounts(client: httpx.AsyncClient, count: int) -> list[tuple[str, int]]:
+    # writes go to fresh accounts so expenses and transfers are never short of money
+    accounts = []
+    for i in range(count):
+        currency_id = CURRENCY_DATA[i % len(CURRENCY_DATA)]["id"]
+        response = await client.post("/api/account/", json={
+            "id": str(uuid.uuid4()),
+            "name": SEED_NAME,
+            "balance": "1000000000",
+            "currency_id": currency_id,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+        response.raise_for_status()
+        accounts.append((response.json()["created_account_id"], currency_id))
+    return accounts
+
+
+def _scenarios(account_ids: list, tag_ids: list, transaction_ids: list,
+               funded_accounts: list) -> dict[str, Callable[[], Request]]:
+    funded_ids = [account_id for account_id, _ in funded_accounts]
+
+    def create_transaction() -> Request:
+        return "POST", "/api/transaction/", {"json": {
+            "transaction_type_id": random.choice(
+                (TransactionTypeEnum.income.value, TransactionTypeEnum.expense.value)
+            ),
+            "amount": f"{random.randint(1, 10000) / 100:.2f}",
+            "tag_id": str(random.choice(tag_ids)),
+            "account_id": random.choice(funded_ids),
+        }}
+
+    def transfer() -> Request:
+        # about half of the pairs cross currencies and convert through the FX stub
+        from_account_id, to_account_id = random.sample(funded_ids, 2)
+        return "POST", "/api/transfer/", {"json": {
+            "from_account_id": from_account_id,
+            "to_account_id": to_account_id,
+            "amount_from": f"{random.randint(1, 10000) / 100:.2f}",
+        }}
+
+    def list_account_transactions() -> Request:
+        return "GET", "/api/account/transactions/", {"params": {"account_id": str(random.choice(account_ids))}}
+
+    def list_transactions() -> Request:
+        return "GET", "/api/transaction/all/", {"params": {"limit": 100, "tag_id": str(random.choice(tag_ids))}}
+
+    def list_user_deposits() -> Request:
+        return "GET", "/api/deposits/", {"params": {"limit": 100, "is_open": True}}
+
+    def get_account() -> Request:
+        return "GET", "/api/account/", {"params": {"account_id": str(random.choice(account_ids))}}
+
+    def get_transaction() -> Request:
+        return "GET", "/api/transaction/", {"params": {"transaction_id": str(random.choice(transaction_ids))}}
+
+    return {
+        "create_transaction": create_transaction,
+        "transfer": transfer,
+        "list_account_transactions": list_account_transactions,
+        "list_transactions": list_transactions,
+        "list_user_deposits": list_user_deposits,
+        "get_account": get_account,
+        "get_transaction": get_transaction,
+    }
+
+
+async def run_scenario(
+        client: httpx.AsyncClient, make_request: Callable[[], Request],
+        requests: int, concurrency: int, query_counter: QueryCounter
+) -> dict:
+    latencies = []
+    statuses = Counter()
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request()
+            started_at = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started_at)
+            statuses[response.status_code] += 1
+
+    queries_before = query_counter.queries
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    queries = query_counter.queries - queries_before
+
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1),
+        **{f"{point}_ms": round(value * 1000, 2) for point, value in percentiles(latencies).items()},
+        "queries_per_request": round(queries / requests, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--funded-accounts", type=int, default=20)
+    parser.add_argument("--fx-latency-ms", type=float, default=0.0)
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    started_at = datetime.utcnow()
+
+    if not args.skip_seed:
+        async with engine.begin() as connection:
+            await seed(
+                connection, accounts=args.accounts, tags=args.tags,
+                transactions=args.transactions, products=args.products
+            )
+    account_ids, tag_ids, transaction_ids = await _load_ids(samples=1000)
+
+    # the scheduler would add its own queries to whatever scenario is running
+    job_scheduler.enabled = False
+    app = create_app()
+    fx_stub = create_stub_app(args.fx_latency_ms / 1000)
+    exchange_rate_client.api_url = "http://fx-stub/convert"
+    exchange_rate_client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fx_stub), base_url="http://fx-stub"
+    )
+
+    query_counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", query_counter)
+
+    # httpx does not send lifespan events, so startup and shutdown are run by hand
+    await app.router.startup()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+        funded_accounts = await _create_funded_accounts(client, args.funded_accounts)
+        scenarios = _scenarios(account_ids, tag_ids, transaction_ids, funded_accounts)
+        results = {}
+        for name, make_request in scenarios.items():
+            if args.scenario and name not in args.scenario:
+                continue
+            results[name] = await run_scenario(
+                client, make_request, args.requests, args.concurrency, query_counter
+            )
+    await app.router.shutdown()
+
+    async with engine.connect() as connection:
+        server_version = await connection.scalar(text("SHOW server_version"))
+    await engine.dispose()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "postgres": server_version,
+        "config": {
+            "accounts": args.accounts, "tags": args.tags, "transactions": args.transactions,
+            "products": args.products, "seeded": not args.skip_seed, "requests": args.requests,
+            "concurrency": args.concurrency, "fx_latency_ms": args.fx_latency_ms,
+        },
+        "fx_stub_requests": fx_stub.state.requests,
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""Compare DAL-maintained and trigger-maintained balances for single and bulk writes.
+
+Runs the same workload in both modes against fresh accounts, switching the transaction
+balance triggers and the DAL together, and checks every balance against its history:
+
+    alembic upgrade head && python -m benchmarks.balance_triggers --single 5000 --bulk-batches 20
+
+The trigger state found at start is restored at the end.
+"""
+import argparse
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy import event, text
+
+import app.db.dals
+from app.api.handlers.transaction import _create_new_transaction
+from app.api.schemas.transaction import TransactionCreate
+from app.db.balance_triggers import balance_triggers_enabled, set_balance_triggers
+from app.db.dals import AccountDAL, TransactionDAL
+from app.db.session import async_session, engine, TransactionTypeEnum
+from benchmarks.common import QueryCounter
+from benchmarks.seed import seed_reference_data, SEED_NAME
+
+
+INITIAL_BALANCE = Decimal(10**6)
+
+
+async def _create_accounts(count: int) -> list:
+    async with async_session() as session:
+        async with session.begin():
+            await seed_reference_data(await session.connection())
+            account_dal = AccountDAL(session)
+            return [
+                (await account_dal.create_account(name=SEED_NAME, balance=INITIAL_BALANCE, currency_id=1)).id
+                for _ in range(count)
+            ]
+
+
+def _random_transaction(account_ids: list) -> dict:
+    return {
+        "transaction_type_id": random.choice(
+            (TransactionTypeEnum.income.value, TransactionTypeEnum.expense.value)
+        ),
+        "amount": Decimal(random.randint(1, 10000)).scaleb(-2),
+        "tag_id": None,
+        "account_id": random.choice(account_ids),
+    }
+
+
+async def _single_writes(account_ids: list, count: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def write() -> None:
+        async with semaphore:
+            await _create_new_transaction(TransactionCreate(**_random_transaction(account_ids)), async_session())
+
+    await asyncio.gather(*(write() for _ in range(count)))
+
+
+async def _bulk_writes(account_ids: list, batches: int, batch_size: int) -> None:
+    for _ in range(batches):
+        transactions = [_random_transaction(account_ids) for _ in range(batch_size)]
+        async with async_session() as session:
+            async with session.begin():
+                await TransactionDAL(session).create_transactions_bulk(transactions)
+
+
+async def _inconsistent_accounts(account_ids: list) -> int:
+    async with engine.connect() as connection:
+        return await connection.scalar(text(
+            "SELECT count(*) FROM account "
+            "WHERE id = ANY(:account_ids) AND balance <> :initial_balance + "
+            "(SELECT coalesce(sum(signed_amount), 0) FROM transaction WHERE account_id = account.id)"
+        ), {"account_ids": account_ids, "initial_balance": INITIAL_BALANCE})
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--single", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bulk-batches", type=int, default=20)
+    parser.add_argument("--bulk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    async with engine.connect() as connection:
+        triggers_were_enabled = await balance_triggers_enabled(connection)
+
+    query_counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", query_counter)
+
+    failed = False
+    try:
+        for triggers in (False, True):
+            async with engine.begin() as connection:
+                await set_balance_triggers(connection, enabled=triggers)
+            # the DAL reads the flag at call time, so flipping the module global switches it
+            app.db.dals.BALANCE_TRIGGERS = triggers
+            mode = "trigger" if triggers else "application"
+            account_ids = await _create_accounts(args.accounts)
+
+            queries_before = query_counter.queries
+            started_at = time.perf_counter()
+            await _single_writes(account_ids, args.single, args.concurrency)
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"{mode:11} single {args.single / elapsed:8,.0f} writes/s, "
+                f"{(query_counter.queries - queries_before) / args.single:.1f} statements/write"
+            )
+
+            rows = args.bulk_batches * args.bulk_size
+            queries_before = query_counter.queries
+            started_at = time.perf_counter()
+            await _bulk_writes(account_ids, args.bulk_batches, args.bulk_size)
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"{mode:11} bulk   {rows / elapsed:8,.0f} rows/s, "
+                f"{(query_counter.queries - queries_before) / args.bulk_batches:.1f} statements/batch"
+            )
+
+            inconsistent = await _inconsistent_accounts(account_ids)
+            if inconsistent:
+                print(f"{mode:11} {inconsistent} of {args.accounts} balances differ from their history")
+                failed = True
+    finally:
+        async with engine.begin() as connection:
+            await set_balance_triggers(connection, enabled=triggers_were_enabled)
+        await engine.dispose()
+
+    if failed:
+        raise SystemExit("balances drifted from the transaction history")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
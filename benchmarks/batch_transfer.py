@@ -0,0 +1,86 @@
+"""Throughput of POST /api/transfer/batch/ vs one POST /api/transfer/ per item.
+
+Start the FX stub and point the API at it first:
+
+    python -m benchmarks.fx_stub --port 8001 --latency-ms 50
+    EXCHANGE_RATE_API_URL=http://localhost:8001/convert python main.py
+    python -m benchmarks.batch_transfer --base-url http://localhost:80 --fx-url http://localhost:8001
+
+Afterwards it checks that a batch overdrawing an account part-way through is rejected,
+even though a later transfer in the same batch would cover the debit.
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.common import create_account, get_balance
+
+
+def _fx_requests(http: requests.Session, fx_url: str | None) -> int | None:
+    if fx_url is None:
+        return None
+    return http.get(f"{fx_url}/stats").json()["requests"]
+
+
+def check_overdraw_rejected(http: requests.Session, base_url: str) -> None:
+    empty_id = create_account(http, base_url, 0.0, currency_id=1)
+    funded_id = create_account(http, base_url, 100.0, currency_id=1)
+    # nets to zero for both accounts, but the first transfer spends money empty_id doesn't have yet
+    response = http.post(f"{base_url}/api/transfer/batch/", json={"transfers": [
+        {"from_account_id": empty_id, "to_account_id": funded_id, "amount_from": 10.0},
+        {"from_account_id": funded_id, "to_account_id": empty_id, "amount_from": 10.0},
+    ]})
+    if response.status_code != 422:
+        raise SystemExit(f"overdrawing batch answered {response.status_code}, expected 422")
+    if get_balance(http, base_url, empty_id) != 0 or get_balance(http, base_url, funded_id) != 100:
+        raise SystemExit("rejected batch changed the balances")
+    print("overdrawing batch rejected")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("--fx-url", default=None)
+    parser.add_argument("--transfers", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--receivers", type=int, default=50)
+    args = parser.parse_args()
+
+    http = requests.Session()
+    sender_id = create_account(http, args.base_url, 10.0 * args.transfers * 2, currency_id=1)
+    receiver_ids = [
+        create_account(http, args.base_url, 0.0, currency_id=1 + i % 2) for i in range(args.receivers)
+    ]
+    transfers = [{
+        "from_account_id": sender_id,
+        "to_account_id": receiver_ids[i % args.receivers],
+        "amount_from": 10.0,
+    } for i in range(args.transfers)]
+
+    fx_before = _fx_requests(http, args.fx_url)
+    started_at = time.perf_counter()
+    for transfer in transfers:
+        http.post(f"{args.base_url}/api/transfer/", json=transfer).raise_for_status()
+    single_elapsed = time.perf_counter() - started_at
+    fx_single = _fx_requests(http, args.fx_url)
+
+    started_at = time.perf_counter()
+    for offset in range(0, args.transfers, args.batch_size):
+        http.post(
+            f"{args.base_url}/api/transfer/batch/",
+            json={"transfers": transfers[offset:offset + args.batch_size]}
+        ).raise_for_status()
+    batch_elapsed = time.perf_counter() - started_at
+    fx_batch = _fx_requests(http, args.fx_url)
+
+    print(f"single: {args.transfers / single_elapsed:.0f} transfers/s")
+    print(f"batch:  {args.transfers / batch_elapsed:.0f} transfers/s (batch size {args.batch_size})")
+    if fx_before is not None:
+        print(f"FX requests: single {fx_single - fx_before}, batch {fx_batch - fx_single}")
+
+    check_overdraw_rejected(http, args.base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measure ``POST /api/transaction/bulk/`` ingestion throughput in rows per second.
+
+    python -m benchmarks.bulk_ingest --base-url http://localhost:80 --rows 100000 --batch-size 20000
+"""
+import argparse
+import random
+import time
+
+import requests
+
+from app.db.session import TransactionTypeEnum
+from benchmarks.common import create_account, get_balance
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--accounts", type=int, default=10)
+    args = parser.parse_args()
+
+    http = requests.Session()
+    account_ids = [create_account(http, args.base_url, 0.0) for _ in range(args.accounts)]
+    expected_balances = dict.fromkeys(account_ids, 0.0)
+
+    elapsed = 0.0
+    for offset in range(0, args.rows, args.batch_size):
+        batch = []
+        for _ in range(min(args.batch_size, args.rows - offset)):
+            account_id = random.choice(account_ids)
+            batch.append({
+                "transaction_type_id": TransactionTypeEnum.income.value,
+                "amount": 1.0,
+                "account_id": account_id,
+            })
+            expected_balances[account_id] += 1.0
+
+        started_at = time.perf_counter()
+        response = http.post(f"{args.base_url}/api/transaction/bulk/", json={"transactions": batch})
+        elapsed += time.perf_counter() - started_at
+        response.raise_for_status()
+
+    print(f"{args.rows} rows in {elapsed:.2f}s: {args.rows / elapsed:.0f} rows/s")
+
+    for account_id, expected_balance in expected_balances.items():
+        if get_balance(http, args.base_url, account_id) != expected_balance:
+            raise SystemExit(f"balance mismatch for account {account_id}")
+
+
+if __name__ == "__main__":
+    main()
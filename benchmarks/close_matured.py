@@ -0,0 +1,79 @@
+"""Drain matured deposits with several schedulers at once and check nothing closes twice.
+
+Seeds deposits (see benchmarks.seed), marks every open one as matured, then runs
+--schedulers independent JobSchedulers, each with --workers workers, until no deposit
+is due. Every scheduler stands in for one gunicorn worker or node.
+
+    alembic upgrade head && python -m benchmarks.close_matured --products 20000 --schedulers 4
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.session import async_session, engine, TransactionTypeEnum
+from app.jobs import JobScheduler, _claim_due_deposits, _close_deposit
+from benchmarks.seed import seed, SEED_NAME
+
+
+async def _drain(scheduler: JobScheduler) -> None:
+    job = scheduler.jobs["close_matured_deposits"]
+
+    async def worker() -> None:
+        while await scheduler.run_batch(job) == job.batch_size:
+            pass
+
+    await asyncio.gather(*(worker() for _ in range(job.workers)))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--schedulers", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        await seed(connection, accounts=1000, tags=10, transactions=0, products=args.products)
+        matured = await connection.execute(text(
+            "UPDATE deposit SET matures_at = now() at time zone 'utc' - interval '1 day' "
+            "WHERE name = :name AND is_open"
+        ), {"name": SEED_NAME})
+        closes_before = await connection.scalar(text(
+            "SELECT count(*) FROM transaction WHERE transaction_type_id = :deposit_close"
+        ), {"deposit_close": TransactionTypeEnum.deposit_close.value})
+
+    schedulers = []
+    for _ in range(args.schedulers):
+        scheduler = JobScheduler(session_factory=async_session)
+        scheduler.add_job(
+            "close_matured_deposits", claim=_claim_due_deposits, process=_close_deposit,
+            batch_size=args.batch_size, workers=args.workers
+        )
+        schedulers.append(scheduler)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(_drain(scheduler) for scheduler in schedulers))
+    elapsed = time.perf_counter() - started_at
+
+    for i, scheduler in enumerate(schedulers):
+        stats = scheduler.jobs["close_matured_deposits"].stats
+        items = stats.processed + stats.failed
+        print(f"scheduler #{i + 1}: {stats.processed} closed, {stats.failed} failed, "
+              f"{stats.batches} batches, {stats.item_time / items * 1000 if items else 0:.2f} ms/item")
+
+    async with engine.connect() as connection:
+        closes = await connection.scalar(text(
+            "SELECT count(*) FROM transaction WHERE transaction_type_id = :deposit_close"
+        ), {"deposit_close": TransactionTypeEnum.deposit_close.value}) - closes_before
+    print(f"{matured.rowcount} matured, {closes} closed in {elapsed:.2f}s: {closes / elapsed:.0f} items/s")
+
+    await engine.dispose()
+    if closes != matured.rowcount:
+        raise SystemExit("every matured deposit must be closed exactly once")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+
+import requests
+
+
+def create_account(http: requests.Session, base_url: str, balance: float, currency_id: int = 1) -> str:
+    response = http.post(f"{base_url}/api/account/", json={
+        "id": str(uuid.uuid4()),
+        "name": "benchmark",
+        "balance": balance,
+        "currency_id": currency_id,
+        "created_at": datetime.utcnow().isoformat(),
+    })
+    response.raise_for_status()
+    return response.json()["created_account_id"]
+
+
+def get_balance(http: requests.Session, base_url: str, account_id: str) -> float:
+    response = http.get(f"{base_url}/api/account/", params={"account_id": account_id})
+    response.raise_for_status()
+    return response.json()["balance"]
+
+
+class QueryCounter:
+    # listener for before_cursor_execute; COPY through the raw asyncpg connection is not seen
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, *args) -> None:
+        self.queries += 1
+
+
+def percentiles(samples: list[float], points: tuple[int, ...] = (50, 95, 99)) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        f"p{point}": ordered[min(len(ordered) - 1, len(ordered) * point // 100)] if ordered else .0
+        for point in points
+    }
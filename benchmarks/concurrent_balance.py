@@ -0,0 +1,58 @@
+"""Fire N parallel ``POST /api/transaction/`` calls at one account and check the final balance.
+
+Run against a started API (``python main.py`` or the docker-compose stack):
+
+    python -m benchmarks.concurrent_balance --base-url http://localhost:80 -n 1000 -c 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.db.session import TransactionTypeEnum
+from benchmarks.common import create_account, get_balance
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    http = requests.Session()
+    http.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    initial_balance = 10.0 * args.requests
+    account_id = create_account(http, args.base_url, initial_balance)
+
+    # income on even requests, expense on odd ones: both signs go through add_to_balance
+    def post_transaction(i: int) -> float:
+        transaction_type = TransactionTypeEnum.income if i % 2 == 0 else TransactionTypeEnum.expense
+        response = http.post(f"{args.base_url}/api/transaction/", json={
+            "transaction_type_id": transaction_type.value,
+            "amount": 3.0,
+            "account_id": account_id,
+        })
+        response.raise_for_status()
+        return 3.0 * transaction_type.sign
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        expected_delta = sum(executor.map(post_transaction, range(args.requests)))
+    elapsed = time.perf_counter() - started_at
+
+    final_balance = get_balance(http, args.base_url, account_id)
+    expected_balance = initial_balance + expected_delta
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: "
+          f"{elapsed:.2f}s, {args.requests / elapsed:.0f} req/s")
+    print(f"final balance {final_balance}, expected {expected_balance}")
+
+    if final_balance != expected_balance:
+        raise SystemExit("balance mismatch: lost updates detected")
+
+
+if __name__ == "__main__":
+    main()
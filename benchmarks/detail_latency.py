@@ -0,0 +1,68 @@
+"""Compare detail lookups: four sequential queries vs one joined SELECT.
+
+Both paths run against the configured Postgres under the same concurrency,
+each request in its own session, like the real handlers:
+
+    python -m benchmarks.detail_latency --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.db.dals import TransactionDAL, AccountDAL
+from app.db.models import Transaction, Tag, Currency
+from app.db.session import async_session, engine
+from benchmarks.common import percentiles
+
+
+async def _sequential_lookup(session, transaction_id) -> None:
+    # the pre-relationship path of _get_transaction_by_id, without the reference-data caches
+    transaction = await TransactionDAL(session).get_transaction_by_id(transaction_id)
+    await session.get(Tag, transaction.tag_id)
+    account = await AccountDAL(session).get_account_by_id(transaction.account_id)
+    await session.get(Currency, account.currency_id)
+
+
+async def _joined_lookup(session, transaction_id) -> None:
+    await TransactionDAL(session).get_transaction_details_by_id(transaction_id)
+
+
+async def _run(lookup, transaction_ids, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(transaction_id) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            async with async_session() as session:
+                async with session.begin():
+                    await lookup(session, transaction_id)
+            latencies.append(time.perf_counter() - started_at)
+
+    await asyncio.gather(*(one(transaction_id) for transaction_id in transaction_ids))
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async with async_session() as session:
+        transaction_ids = (await session.scalars(
+            select(Transaction.id).where(Transaction.tag_id.is_not(None)).limit(args.requests)
+        )).all()
+
+    for name, lookup in (("sequential", _sequential_lookup), ("joined", _joined_lookup)):
+        latencies = await _run(lookup, transaction_ids, args.concurrency)
+        stats = {key: f"{value * 1000:.2f}ms" for key, value in percentiles(latencies, (50, 99)).items()}
+        print(f"{name:10} {len(latencies)} requests {stats}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: ClauseElement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kwargs)
+
+
+def walk_plan(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from walk_plan(child)
+
+
+def is_relation(name: str | None, relation: str) -> bool:
+    # monthly partitions of transaction are named transaction_y2026m10 and transaction_default
+    return name == relation or name is not None and (
+        name.startswith(f"{relation}_y") or name == f"{relation}_default"
+    )
+
+
+def scan_types(plan: dict, relation: str) -> set[str]:
+    return {
+        node["Node Type"] for node in walk_plan(plan)
+        if is_relation(node.get("Relation Name"), relation)
+    }
+
+
+def scanned_partitions(plan: dict, relation: str) -> set[str]:
+    return {
+        node["Relation Name"] for node in walk_plan(plan)
+        if node.get("Relation Name") != relation and is_relation(node.get("Relation Name"), relation)
+    }
@@ -0,0 +1,80 @@
+"""Check that the listing queries use index scans on a seeded dataset.
+
+Seeds 1M transactions unless --skip-seed is given (see benchmarks.seed), then runs
+EXPLAIN on the queries built by the DALs and fails if any of them scans
+`transaction`, `credit` or `deposit` sequentially.
+
+    alembic upgrade head && python -m benchmarks.explain_indexes
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.api.schemas import OrderBy
+from app.db.dals import TransactionDAL, CreditDAL, DepositDAL
+from app.db.models import Account, Tag
+from app.db.session import async_session, engine, TransactionTypeEnum
+from benchmarks.explain import Explain, scan_types
+from benchmarks.seed import seed, SEED_NAME
+
+
+async def _listing_queries(session) -> dict:
+    account_id = await session.scalar(select(Account.id).where(Account.name == SEED_NAME).limit(1))
+    tag_id = await session.scalar(select(Tag.id).where(Tag.name == SEED_NAME).limit(1))
+
+    transaction_dal = TransactionDAL(session)
+    return {
+        "transaction /all/ page": (
+            "transaction",
+            await transaction_dal._get_transactions_query(limit=100)
+        ),
+        "transaction /all/ by type": (
+            "transaction",
+            await transaction_dal._get_transactions_query(
+                transaction_type_id=TransactionTypeEnum.expense.value,
+                order_by=OrderBy.reverse_chronological, limit=100
+            )
+        ),
+        "transaction /all/ by tag": (
+            "transaction",
+            await transaction_dal._get_transactions_query(tag_id=tag_id, limit=100)
+        ),
+        "account /transactions/": (
+            "transaction",
+            await transaction_dal._get_transactions_query(
+                account_id=account_id, order_by=OrderBy.reverse_chronological
+            )
+        ),
+        "credit /all/": ("credit", CreditDAL(session)._get_account_credits_query(account_id)),
+        "deposit /all/": ("deposit", DepositDAL(session)._get_account_deposits_query(account_id)),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        async with engine.begin() as connection:
+            await seed(connection, transactions=args.transactions, products=args.transactions // 100)
+
+    failures = []
+    async with async_session() as session:
+        async with session.begin():
+            for name, (relation, query) in (await _listing_queries(session)).items():
+                plan = (await session.execute(Explain(query))).scalar()[0]["Plan"]
+                scans = scan_types(plan, relation)
+                print(f"{name:32} {relation:12} {', '.join(sorted(scans))}")
+                if not scans or "Seq Scan" in scans:
+                    failures.append(name)
+
+    await engine.dispose()
+    if failures:
+        raise SystemExit(f"sequential scans in: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Check that time-bounded transaction queries prune the monthly partitions.
+
+Seeds --years of history unless --skip-seed is given (see benchmarks.seed), splits every
+seeded month out of the default partition (app.db.partitions), then runs EXPLAIN on the
+statement and report queries built by the DALs for one month and for a quarter. Each must
+scan exactly the partitions of its range, and never transaction_default:
+
+    alembic upgrade head && python -m benchmarks.explain_partitions --years 3
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.api.schemas.report import ReportPeriod
+from app.db.dals import AccountDAL, ReportDAL
+from app.db.models import Account
+from app.db.partitions import add_months, create_partitions_for_default_rows, month_start, partition_name
+from app.db.session import async_session, engine
+from benchmarks.explain import Explain, scanned_partitions
+from benchmarks.seed import seed, SEED_NAME
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--transactions", type=int, default=3_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        async with engine.begin() as connection:
+            await seed(connection, transactions=args.transactions, days=args.years * 365)
+    async with engine.begin() as connection:
+        created = await create_partitions_for_default_rows(connection)
+    print(f"split {len(created)} months out of the default partition")
+
+    # a month in the middle of the seeded history, clear of both ends
+    month = add_months(month_start(datetime.utcnow().date()), -args.years * 6)
+    ranges = {
+        "month": (month, add_months(month, 1)),
+        "quarter": (month, add_months(month, 3)),
+    }
+
+    failures = []
+    async with async_session() as session:
+        async with session.begin():
+            account_id = await session.scalar(select(Account.id).where(Account.name == SEED_NAME).limit(1))
+            account_dal = AccountDAL(session)
+            report_dal = ReportDAL(session)
+
+            for range_name, (date_from, date_to) in ranges.items():
+                date_from = datetime.combine(date_from, datetime.min.time())
+                date_to = datetime.combine(date_to, datetime.min.time())
+                expected = set()
+                expected_month = date_from.date()
+                while expected_month < date_to.date():
+                    expected.add(partition_name(expected_month))
+                    expected_month = add_months(expected_month, 1)
+
+                queries = {
+                    "statement": account_dal._get_statement_query(
+                        account_id, date_from=date_from, date_to=date_to
+                    ),
+                    "report": report_dal._get_report_query(
+                        ReportPeriod.day, date_from=date_from, date_to=date_to
+                    ),
+                }
+                for query_name, query in queries.items():
+                    plan = (await session.execute(Explain(query))).scalar()[0]["Plan"]
+                    scanned = scanned_partitions(plan, "transaction")
+                    name = f"{query_name} per {range_name}"
+                    print(f"{name:22} {len(scanned)} partitions: {', '.join(sorted(scanned))}")
+                    if scanned != expected:
+                        failures.append(name)
+
+            unbounded = (await session.execute(Explain(
+                account_dal._get_statement_query(account_id)
+            ))).scalar()[0]["Plan"]
+            print(f"{'statement unbounded':22} {len(scanned_partitions(unbounded, 'transaction'))} partitions")
+
+    await engine.dispose()
+    if failures:
+        raise SystemExit(f"partitions not pruned in: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Local stand-in for EXCHANGE_RATE_API_URL.
+
+Answers ``GET /convert?from=..&to=..&amount=..`` like exchangerate.host with fixed rates,
+optionally after an artificial delay:
+
+    python -m benchmarks.fx_stub --port 8001 --latency-ms 50
+    EXCHANGE_RATE_API_URL=http://localhost:8001/convert python main.py
+"""
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query
+
+
+RATES_TO_USD = {
+    "usd": 1.0,
+    "uah": 0.027,
+}
+
+
+def create_stub_app(latency: float = 0.0) -> FastAPI:
+    app = FastAPI(title="ExchangeRateStub")
+    app.state.requests = 0
+
+    @app.get("/convert")
+    async def convert(
+            currency_from: str = Query(alias="from"),
+            currency_to: str = Query(alias="to"),
+            amount: float = 1.0
+    ) -> dict:
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+        if currency_from not in RATES_TO_USD or currency_to not in RATES_TO_USD:
+            raise HTTPException(status_code=404)
+
+        rate = RATES_TO_USD[currency_from] / RATES_TO_USD[currency_to]
+        return {"success": True, "info": {"rate": rate}, "result": amount * rate}
+
+    @app.get("/stats")
+    async def stats() -> dict:
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_stub_app(args.latency_ms / 1000), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Cost per transaction of the money representation: float, Decimal and integer cents.
+
+Each path parses the amounts of a bulk request body, validates them, applies the
+transaction sign and folds them into per-account balance deltas, which is the
+work TransactionDAL.create_transactions_bulk does before touching the database.
+No database needed:
+
+    python -m benchmarks.money --rows 100000
+
+With --db the same amounts are also COPYed into a temporary table with a
+double precision, a numeric(18, 2) and a bigint column and summed back:
+
+    python -m benchmarks.money --rows 1000000 --db
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from app.api.schemas.transaction import TransactionCreate
+from app.money import to_money, MONEY_SCALE
+
+
+def _make_body(rows: int, accounts: int) -> bytes:
+    return json.dumps({"transactions": [{
+        "transaction_type_id": random.choice((1, 2)),
+        "amount": round(random.uniform(0, 1000), MONEY_SCALE),
+        "account_id": random.randrange(accounts),
+    } for _ in range(rows)]}).encode()
+
+
+def _float_path(body: bytes) -> dict:
+    balance_deltas = defaultdict(float)
+    for row in json.loads(body)["transactions"]:
+        sign = 1 if row["transaction_type_id"] == 1 else -1
+        balance_deltas[row["account_id"]] += row["amount"] * sign
+    return balance_deltas
+
+
+def _decimal_path(body: bytes) -> dict:
+    balance_deltas = defaultdict(Decimal)
+    for row in json.loads(body, parse_float=Decimal)["transactions"]:
+        sign = 1 if row["transaction_type_id"] == 1 else -1
+        balance_deltas[row["account_id"]] += to_money(row["amount"]) * sign
+    return balance_deltas
+
+
+def _cents_path(body: bytes) -> dict:
+    balance_deltas = defaultdict(int)
+    for row in json.loads(body)["transactions"]:
+        sign = 1 if row["transaction_type_id"] == 1 else -1
+        balance_deltas[row["account_id"]] += round(row["amount"] * 10**MONEY_SCALE) * sign
+    return balance_deltas
+
+
+def _pydantic_decimal_path(body: bytes) -> dict:
+    # the schema validation the endpoints run on top of the plain Decimal path
+    balance_deltas = defaultdict(Decimal)
+    for row in json.loads(body)["transactions"]:
+        row["account_id"] = f"00000000-0000-0000-0000-{row['account_id']:012}"
+        transaction = TransactionCreate(**row)
+        sign = 1 if transaction.transaction_type_id == 1 else -1
+        balance_deltas[transaction.account_id] += transaction.amount * sign
+    return balance_deltas
+
+
+def _time(path, body: bytes, rows: int) -> tuple[dict, float]:
+    started_at = time.perf_counter()
+    result = path(body)
+    return result, (time.perf_counter() - started_at) / rows * 10**6
+
+
+async def _database_paths(body: bytes, rows: int) -> None:
+    from app.db.session import engine
+
+    amounts = [row["amount"] for row in json.loads(body, parse_float=Decimal)["transactions"]]
+    columns = {
+        "double precision": [float(amount) for amount in amounts],
+        "numeric(18, 2)": amounts,
+        "bigint": [int(amount * 10**MONEY_SCALE) for amount in amounts],
+    }
+
+    async with engine.connect() as connection:
+        raw_connection = (await connection.get_raw_connection()).driver_connection
+        for column_type, values in columns.items():
+            await raw_connection.execute(f"CREATE TEMPORARY TABLE money_benchmark (amount {column_type})")
+
+            started_at = time.perf_counter()
+            await raw_connection.copy_records_to_table(
+                "money_benchmark", records=((value,) for value in values), columns=("amount",)
+            )
+            copy_elapsed = time.perf_counter() - started_at
+
+            started_at = time.perf_counter()
+            total = await raw_connection.fetchval("SELECT sum(amount) FROM money_benchmark")
+            sum_elapsed = time.perf_counter() - started_at
+
+            await raw_connection.execute("DROP TABLE money_benchmark")
+            print(
+                f"{column_type:16} COPY {copy_elapsed / rows * 10**6:.2f} us/row, "
+                f"SUM {sum_elapsed * 1000:.0f} ms, total {total}"
+            )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--db", action="store_true")
+    args = parser.parse_args()
+
+    body = _make_body(args.rows, args.accounts)
+
+    results = {}
+    for name, path in (
+            ("float", _float_path),
+            ("decimal", _decimal_path),
+            ("cents", _cents_path),
+            ("pydantic", _pydantic_decimal_path),
+    ):
+        results[name], per_row = _time(path, body, args.rows)
+        print(f"{name:9} {per_row:.2f} us/transaction")
+
+    exact = results["decimal"]
+    drifted = sum(
+        1 for account_id, delta in results["float"].items()
+        if Decimal(repr(delta)) != exact[account_id]
+    )
+    print(f"float deltas off the exact total: {drifted} of {len(exact)} accounts")
+
+    if any(Decimal(cents).scaleb(-MONEY_SCALE) != exact[account_id]
+           for account_id, cents in results["cents"].items()):
+        raise SystemExit("integer cents disagree with Decimal")
+
+    if args.db:
+        asyncio.run(_database_paths(body, args.rows))
+
+
+if __name__ == "__main__":
+    main()
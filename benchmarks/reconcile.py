@@ -0,0 +1,48 @@
+"""Time BalanceSnapshotDAL.reconcile on one account with a large history.
+
+The first call folds the whole seeded history into the snapshot, later calls
+only scan transactions written after the checkpoint.
+
+    python -m benchmarks.reconcile --transactions 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.db.dals import BalanceSnapshotDAL
+from app.db.models import Account
+from app.db.session import async_session, engine
+from benchmarks.seed import seed, SEED_NAME
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        await seed(connection, accounts=1, tags=10, transactions=args.transactions)
+
+    async with async_session() as session:
+        account_id = await session.scalar(
+            select(Account.id).where(Account.name == SEED_NAME).order_by(Account.created_at.desc()).limit(1)
+        )
+
+    for attempt in range(args.repeat):
+        async with async_session() as session:
+            async with session.begin():
+                started_at = time.perf_counter()
+                balance, expected_balance, _, scanned = await BalanceSnapshotDAL(session).reconcile(account_id)
+                elapsed = time.perf_counter() - started_at
+
+        print(f"reconcile #{attempt + 1}: {elapsed * 1000:.1f} ms, {scanned} transactions scanned, "
+              f"difference {balance - expected_balance:.6f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Seed the configured Postgres with synthetic data entirely on the server side.
+
+    python -m benchmarks.seed --accounts 1000 --tags 50 --transactions 1000000
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import engine, TransactionTypeEnum, CURRENCY_DATA
+
+
+SEED_NAME = "benchmark-seed"
+
+
+async def seed_reference_data(connection: AsyncConnection) -> None:
+    for currency in CURRENCY_DATA:
+        await connection.execute(
+            text("INSERT INTO currency (id, name) VALUES (:id, :name) ON CONFLICT DO NOTHING"),
+            currency
+        )
+    for transaction_type in TransactionTypeEnum:
+        await connection.execute(
+            text("INSERT INTO transaction_type (id, name) VALUES (:id, :name) ON CONFLICT DO NOTHING"),
+            {"id": transaction_type.value, "name": transaction_type.name}
+        )
+
+
+async def seed(
+        connection: AsyncConnection,
+        accounts: int = 1000,
+        tags: int = 50,
+        transactions: int = 1_000_000,
+        products: int = 0,
+        days: int = 365
+) -> None:
+    await seed_reference_data(connection)
+
+    await connection.execute(text(
+        "INSERT INTO tag (id, name) "
+        "SELECT gen_random_uuid(), :name FROM generate_series(1, :tags)"
+    ), {"name": SEED_NAME, "tags": tags})
+    await connection.execute(text(
+        "INSERT INTO account (id, name, balance, currency_id, created_at) "
+        "SELECT gen_random_uuid(), :name, 0, 1 + i % :currencies, now() at time zone 'utc' "
+        "FROM generate_series(1, :accounts) AS i"
+    ), {"name": SEED_NAME, "accounts": accounts, "currencies": len(CURRENCY_DATA)})
+
+    # income/expense only, spread evenly over accounts, tags and the last `days` days
+    await connection.execute(text(
+        "WITH a AS (SELECT array_agg(id) AS ids FROM account WHERE name = :name), "
+        "t AS (SELECT array_agg(id) AS ids FROM tag WHERE name = :name) "
+        "INSERT INTO transaction "
+        "(id, transaction_type_id, amount, signed_amount, tag_id, account_id, created_at) "
+        "SELECT gen_random_uuid(), s.transaction_type_id, s.amount, "
+        "CASE WHEN s.transaction_type_id = 1 THEN s.amount ELSE -s.amount END, "
+        "t.ids[1 + s.i % :tags], a.ids[1 + s.i % :accounts], "
+        "now() at time zone 'utc' - random() * make_interval(days => :days) "
+        "FROM (SELECT i, 1 + i % 2 AS transaction_type_id, round((random() * 1000)::numeric, 2) AS amount "
+        "FROM generate_series(1, :transactions) AS i) AS s, a, t"
+    ), {
+        "name": SEED_NAME, "tags": tags, "accounts": accounts,
+        "transactions": transactions, "days": days,
+    })
+
+    for table in ("credit", "deposit"):
+        await connection.execute(text(
+            f"WITH a AS (SELECT array_agg(id) AS ids FROM account WHERE name = :name) "
+            f"INSERT INTO {table} (id, name, amount, account_id, is_open) "
+            f"SELECT gen_random_uuid(), :name, 1000, a.ids[1 + i % :accounts], i % 3 <> 0 "
+            f"FROM generate_series(1, :products) AS i, a"
+        ), {"name": SEED_NAME, "accounts": accounts, "products": products})
+
+    # keep account.balance consistent with the seeded history
+    await connection.execute(text(
+        "UPDATE account SET balance = s.balance "
+        "FROM (SELECT account_id, sum(signed_amount) AS balance FROM transaction GROUP BY account_id) AS s "
+        "WHERE account.id = s.account_id AND account.name = :name"
+    ), {"name": SEED_NAME})
+
+    # accounts from an earlier run already have a snapshot, the history just seeded may be older
+    # than its checkpoint, so it is reset to the epoch instead of kept
+    await connection.execute(text(
+        "INSERT INTO balance_snapshot (account_id, total, checkpoint_at) "
+        "SELECT id, 0, '1970-01-01' FROM account WHERE name = :name "
+        "ON CONFLICT (account_id) DO UPDATE SET total = 0, checkpoint_at = '1970-01-01'"
+    ), {"name": SEED_NAME})
+
+    await connection.execute(text("ANALYZE"))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        await seed(
+            connection, accounts=args.accounts, tags=args.tags,
+            transactions=args.transactions, products=args.products, days=args.days
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""Micro-benchmark of list serialization: pydantic + jsonable_encoder vs plain dicts + orjson.
+
+No database needed, rows are built in memory:
+
+    python -m benchmarks.serialization --rows 100000
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+
+from app.api.schemas.account import ShowAccount
+from app.api.schemas.currency import ShowCurrency
+from app.api.schemas.tag import ShowTag
+from app.api.schemas.transaction import ShowTransaction, ShowTransactionType
+from app.api.serialization import serialize_transaction
+
+
+def _make_rows(count: int) -> list[tuple]:
+    currency = SimpleNamespace(id=1, name="uah")
+    account = SimpleNamespace(id=uuid.uuid4(), name="main", balance=Decimal("1000.50"), created_at=datetime.utcnow())
+    tag = SimpleNamespace(id=uuid.uuid4(), name="food")
+    transaction_type = SimpleNamespace(id=2, name="expense")
+    return [(
+        SimpleNamespace(id=uuid.uuid4(), amount=Decimal("12.34"), created_at=datetime.utcnow()),
+        account, tag, transaction_type, currency
+    ) for _ in range(count)]
+
+
+def _pydantic_path(rows: list[tuple]) -> bytes:
+    # what the endpoints did before: build models, then FastAPI validates and encodes them again
+    transactions = tuple(ShowTransaction(
+        id=transaction.id,
+        transaction_type=ShowTransactionType(id=transaction_type.id, name=transaction_type.name),
+        amount=transaction.amount,
+        tag=ShowTag(id=tag.id, name=tag.name),
+        account=ShowAccount(
+            id=account.id, name=account.name, balance=account.balance,
+            currency=ShowCurrency(id=currency.id, name=currency.name),
+            created_at=account.created_at
+        ),
+        created_at=transaction.created_at
+    ) for transaction, account, tag, transaction_type, currency in rows)
+    validated = parse_obj_as(list[ShowTransaction], transactions)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def _fast_path(rows: list[tuple]) -> bytes:
+    return orjson.dumps([serialize_transaction(*row) for row in rows])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = _make_rows(args.rows)
+    results = {}
+    for name, path in (("pydantic", _pydantic_path), ("orjson", _fast_path)):
+        started_at = time.perf_counter()
+        body = path(rows)
+        elapsed = time.perf_counter() - started_at
+        results[name] = orjson.loads(body)
+        print(f"{name:8} {args.rows} rows: {elapsed * 1000:.0f} ms, {len(body) / 2**20:.1f} MiB")
+
+    if results["pydantic"] != results["orjson"]:
+        raise SystemExit("payloads differ")
+
+
+if __name__ == "__main__":
+    main()
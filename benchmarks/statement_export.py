@@ -0,0 +1,61 @@
+"""Measure account statement export throughput in rows per second and peak memory.
+
+Seeds one account with 5M transactions unless --skip-seed is given (see benchmarks.seed),
+then drives the export generator behind GET /api/account/statement/ in-process for
+every format. Peak RSS should stay flat however many rows are exported.
+
+    alembic upgrade head && python -m benchmarks.statement_export --transactions 5000000
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+from sqlalchemy import select
+
+from app.api.handlers.account import _stream_statement
+from app.api.schemas.account import StatementFormat
+from app.db.models import Account
+from app.db.session import async_session, engine
+from benchmarks.seed import seed, SEED_NAME
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=5_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        async with engine.begin() as connection:
+            await seed(connection, accounts=1, tags=10, transactions=args.transactions)
+
+    async with async_session() as session:
+        account_id = await session.scalar(
+            select(Account.id).where(Account.name == SEED_NAME).order_by(Account.created_at.desc()).limit(1)
+        )
+
+    for statement_format in StatementFormat:
+        rss_before = _peak_rss_mib()
+        exported_bytes = 0
+        started_at = time.perf_counter()
+        async for chunk in _stream_statement(account_id, async_session(), statement_format):
+            exported_bytes += len(chunk)
+        elapsed = time.perf_counter() - started_at
+
+        print(
+            f"{statement_format.value:9} {args.transactions / elapsed:,.0f} rows/s, "
+            f"{exported_bytes / 2**20:.0f} MiB in {elapsed:.1f}s, "
+            f"peak RSS {_peak_rss_mib():.0f} MiB (+{_peak_rss_mib() - rss_before:.0f})"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
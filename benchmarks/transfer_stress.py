@@ -0,0 +1,96 @@
+"""Run thousands of random concurrent transfers and check money is conserved per currency.
+
+Transfers go through the real handler code (_create_new_transfer) with a session per
+transfer. Pairs are drawn within one currency, so no FX call is needed and the
+per-currency totals must stay exactly equal.
+
+    python -m benchmarks.transfer_stress --accounts 20 --transfers 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app.api.handlers.transfer import _create_new_transfer
+from app.api.schemas.transfer import TransferCreate
+from app.db.dals import AccountDAL
+from app.db.models import Account
+from app.db.session import async_session, engine, CURRENCY_DATA
+from app.exception import NotEnoughMoney
+from app.transfer_engine import transfer_stats
+from benchmarks.seed import seed_reference_data
+
+
+async def _create_accounts(count: int) -> dict[int, list]:
+    accounts = defaultdict(list)
+    async with async_session() as session:
+        async with session.begin():
+            await seed_reference_data(await session.connection())
+            account_dal = AccountDAL(session)
+            for i in range(count):
+                currency_id = CURRENCY_DATA[i % len(CURRENCY_DATA)]["id"]
+                account = await account_dal.create_account(
+                    name="transfer-stress", balance=1000.0, currency_id=currency_id
+                )
+                accounts[currency_id].append(account.id)
+    return accounts
+
+
+async def _totals(account_ids: list) -> tuple[float, float]:
+    async with async_session() as session:
+        balances = (await session.scalars(select(Account.balance).where(Account.id.in_(account_ids)))).all()
+    return sum(balances), min(balances)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    accounts = await _create_accounts(args.accounts)
+    initial_totals = {currency_id: await _totals(ids) for currency_id, ids in accounts.items()}
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rejected = 0
+
+    async def transfer() -> None:
+        nonlocal rejected
+        account_ids = random.choice(list(accounts.values()))
+        from_account_id, to_account_id = random.sample(account_ids, 2)
+        request_body = TransferCreate(
+            from_account_id=from_account_id,
+            to_account_id=to_account_id,
+            amount_from=random.randint(1, 300)
+        )
+        async with semaphore:
+            try:
+                await _create_new_transfer(request_body, async_session())
+            except NotEnoughMoney:
+                rejected += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(transfer() for _ in range(args.transfers)))
+    elapsed = time.perf_counter() - started_at
+
+    print(f"{args.transfers} transfers in {elapsed:.2f}s, {rejected} rejected for insufficient funds")
+    print(f"retries {transfer_stats.retries}, exhausted {transfer_stats.retries_exhausted}, "
+          f"max lock wait {transfer_stats.max_lock_wait_time * 1000:.1f} ms")
+
+    failed = False
+    for currency_id, account_ids in accounts.items():
+        total, lowest = await _totals(account_ids)
+        print(f"currency {currency_id}: total {initial_totals[currency_id][0]} -> {total}, lowest {lowest}")
+        failed |= total != initial_totals[currency_id][0] or lowest < 0
+
+    await engine.dispose()
+    if failed:
+        raise SystemExit("money was created, destroyed or overdrawn")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
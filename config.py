@@ -10,5 +10,46 @@ DB_NAME = os.environ.get("DB_NAME")
 DB_USER = os.environ.get("DB_USER")
 DB_PASS = os.environ.get("DB_PASS")
 
+DB_ECHO = os.environ.get("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+
+QUERY_INSTRUMENTATION = os.environ.get("QUERY_INSTRUMENTATION", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+BALANCE_CHECKPOINT_LAG = float(os.environ.get("BALANCE_CHECKPOINT_LAG", 60))
+# account.balance maintained by the transaction triggers instead of the DAL,
+# switch together with `python -m app.db.balance_triggers enable|disable`
+BALANCE_TRIGGERS = os.environ.get("BALANCE_TRIGGERS", "false").lower() == "true"
+
+TRANSACTION_PARTITIONS_AHEAD = int(os.environ.get("TRANSACTION_PARTITIONS_AHEAD", 3))
+
+TRANSFER_MAX_RETRIES = int(os.environ.get("TRANSFER_MAX_RETRIES", 5))
+TRANSFER_RETRY_BACKOFF = float(os.environ.get("TRANSFER_RETRY_BACKOFF", .05))
+
+TAG_CACHE_SIZE = int(os.environ.get("TAG_CACHE_SIZE", 10000))
+TAG_CACHE_TTL = float(os.environ.get("TAG_CACHE_TTL", 30))
+
+JOBS_ENABLED = os.environ.get("JOBS_ENABLED", "true").lower() == "true"
+JOB_INTERVAL = float(os.environ.get("JOB_INTERVAL", 60))
+JOB_BATCH_SIZE = int(os.environ.get("JOB_BATCH_SIZE", 100))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_RETRY_DELAY = float(os.environ.get("JOB_RETRY_DELAY", 60 * 60))
+ACCRUAL_BATCH_SIZE = int(os.environ.get("ACCRUAL_BATCH_SIZE", 10000))
+
+IDEMPOTENCY_KEY_TTL = float(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+
 EXCHANGE_RATE_API_URL = os.environ.get("EXCHANGE_RATE_API_URL")
 EXCHANGE_RATE_API_KEY = os.environ.get("EXCHANGE_RATE_API_KEY")
+EXCHANGE_RATE_TTL = float(os.environ.get("EXCHANGE_RATE_TTL", 60))
+EXCHANGE_RATE_TIMEOUT = float(os.environ.get("EXCHANGE_RATE_TIMEOUT", 5))
+EXCHANGE_RATE_MAX_CONNECTIONS = int(os.environ.get("EXCHANGE_RATE_MAX_CONNECTIONS", 20))
@@ -1,3 +1,4 @@
+import re
 import sys
 from logging.config import fileConfig
 from pathlib import Path
@@ -43,6 +44,15 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+# monthly partitions of transaction are created by app.db.partitions, not by migrations,
+# autogenerate would otherwise emit a drop_table for every one of them
+TRANSACTION_PARTITION = re.compile(r"transaction_(y\d{4}m\d{2}|default)")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and TRANSACTION_PARTITION.fullmatch(name or ""))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -59,6 +69,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -82,7 +93,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,26 @@
+"""add product next attempt
+
+Revision ID: 3f7a2d8c1b64
+Revises: 9a4c7e2b6d13
+Create Date: 2026-10-18 21:12:37.482915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7a2d8c1b64'
+down_revision = '9a4c7e2b6d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('credit', 'deposit'):
+        op.add_column(table, sa.Column('next_attempt_at', sa.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('credit', 'deposit'):
+        op.drop_column(table, 'next_attempt_at')
@@ -0,0 +1,43 @@
+"""add listing indexes
+
+Revision ID: 3f9c2a1d8b47
+Revises: 757619e46fec
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a1d8b47'
+down_revision = '757619e46fec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_credit_account_id', 'credit', ['account_id'], unique=False)
+    op.create_index('ix_deposit_account_id', 'deposit', ['account_id'], unique=False)
+    op.create_index('ix_transaction_created_at_id', 'transaction', ['created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_transaction_account_id_created_at_id', 'transaction',
+        ['account_id', 'created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_transaction_tag_id_created_at_id', 'transaction',
+        ['tag_id', 'created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_transaction_transaction_type_id_created_at_id', 'transaction',
+        ['transaction_type_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_transaction_type_id_created_at_id', table_name='transaction')
+    op.drop_index('ix_transaction_tag_id_created_at_id', table_name='transaction')
+    op.drop_index('ix_transaction_account_id_created_at_id', table_name='transaction')
+    op.drop_index('ix_transaction_created_at_id', table_name='transaction')
+    op.drop_index('ix_deposit_account_id', table_name='deposit')
+    op.drop_index('ix_credit_account_id', table_name='credit')
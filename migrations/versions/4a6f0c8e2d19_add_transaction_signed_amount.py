@@ -0,0 +1,48 @@
+"""add transaction signed amount
+
+Revision ID: 4a6f0c8e2d19
+Revises: e1b7d4a92c36
+Create Date: 2026-10-18 15:03:44.902617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a6f0c8e2d19'
+down_revision = 'e1b7d4a92c36'
+branch_labels = None
+depends_on = None
+
+
+# income, money_transfer_receiver, credit_open, deposit_close
+PLUS_SIGN_TRANSACTION_TYPE_IDS = (1, 4, 5, 8)
+
+
+def upgrade() -> None:
+    op.add_column('transaction', sa.Column('signed_amount', sa.Numeric(18, 2), nullable=True))
+    op.execute(
+        "UPDATE transaction SET signed_amount = CASE WHEN transaction_type_id IN "
+        f"({', '.join(map(str, PLUS_SIGN_TRANSACTION_TYPE_IDS))}) THEN amount ELSE -amount END"
+    )
+    op.alter_column('transaction', 'signed_amount', existing_type=sa.Numeric(18, 2), nullable=False)
+    op.create_check_constraint(
+        'ck_transaction_signed_amount', 'transaction', 'abs(signed_amount) = amount'
+    )
+
+    op.drop_index('ix_transaction_account_id_created_at_id', table_name='transaction')
+    op.create_index(
+        'ix_transaction_account_id_created_at_id', 'transaction',
+        ['account_id', 'created_at', 'id'], unique=False, postgresql_include=['signed_amount']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_account_id_created_at_id', table_name='transaction')
+    op.create_index(
+        'ix_transaction_account_id_created_at_id', 'transaction',
+        ['account_id', 'created_at', 'id'], unique=False
+    )
+    op.drop_constraint('ck_transaction_signed_amount', 'transaction', type_='check')
+    op.drop_column('transaction', 'signed_amount')
@@ -0,0 +1,72 @@
+"""add transaction balance triggers
+
+Revision ID: 5d8e3a1c9f24
+Revises: b93d1f6a0e57
+Create Date: 2026-10-18 18:12:37.218804
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e3a1c9f24'
+down_revision = 'b93d1f6a0e57'
+branch_labels = None
+depends_on = None
+
+
+# statement level with transition tables: a COPY of 100k rows costs one UPDATE per
+# account, not one per row. signed_amount already carries the sign of the type.
+# Accounts are locked in id order first, like AccountDAL.lock_accounts, so concurrent
+# statements touching the same accounts can't deadlock.
+APPLY_BALANCE_DELTAS = """
+    PERFORM 1 FROM account
+        WHERE id IN (SELECT account_id FROM ({deltas}) AS changes)
+        ORDER BY id
+        FOR UPDATE;
+    UPDATE account SET balance = account.balance + d.delta
+        FROM (
+            SELECT account_id, sum(delta) AS delta FROM ({deltas}) AS changes GROUP BY account_id
+        ) AS d
+        WHERE account.id = d.account_id AND d.delta <> 0;
+"""
+
+TRIGGER_FUNCTIONS = {
+    'insert': (
+        "REFERENCING NEW TABLE AS new_rows",
+        "SELECT account_id, signed_amount AS delta FROM new_rows"
+    ),
+    'update': (
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        "SELECT account_id, signed_amount AS delta FROM new_rows "
+        "UNION ALL SELECT account_id, -signed_amount FROM old_rows"
+    ),
+    'delete': (
+        "REFERENCING OLD TABLE AS old_rows",
+        "SELECT account_id, -signed_amount AS delta FROM old_rows"
+    ),
+}
+
+
+def upgrade() -> None:
+    for event, (referencing, deltas) in TRIGGER_FUNCTIONS.items():
+        op.execute(f"""
+            CREATE FUNCTION transaction_balance_{event}() RETURNS trigger AS $$
+            BEGIN
+                {APPLY_BALANCE_DELTAS.format(deltas=deltas)}
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(
+            f"CREATE TRIGGER trg_transaction_balance_{event} AFTER {event.upper()} ON transaction "
+            f"{referencing} FOR EACH STATEMENT EXECUTE FUNCTION transaction_balance_{event}()"
+        )
+        # opt-in: installed disabled, see app.db.balance_triggers
+        op.execute(f"ALTER TABLE transaction DISABLE TRIGGER trg_transaction_balance_{event}")
+
+
+def downgrade() -> None:
+    for event in TRIGGER_FUNCTIONS:
+        op.execute(f"DROP TRIGGER trg_transaction_balance_{event} ON transaction")
+        op.execute(f"DROP FUNCTION transaction_balance_{event}()")
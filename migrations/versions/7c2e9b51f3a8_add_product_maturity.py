@@ -0,0 +1,31 @@
+"""add product maturity
+
+Revision ID: 7c2e9b51f3a8
+Revises: 4a6f0c8e2d19
+Create Date: 2026-10-18 15:48:26.117390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9b51f3a8'
+down_revision = '4a6f0c8e2d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('credit', 'deposit'):
+        op.add_column(table, sa.Column('matures_at', sa.TIMESTAMP(), nullable=True))
+        op.create_index(
+            f'ix_{table}_matures_at', table, ['matures_at'], unique=False,
+            postgresql_where=sa.text('is_open')
+        )
+
+
+def downgrade() -> None:
+    for table in ('credit', 'deposit'):
+        op.drop_index(f'ix_{table}_matures_at', table_name=table)
+        op.drop_column(table, 'matures_at')
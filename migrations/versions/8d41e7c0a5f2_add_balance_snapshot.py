@@ -0,0 +1,35 @@
+"""add balance snapshot
+
+Revision ID: 8d41e7c0a5f2
+Revises: 3f9c2a1d8b47
+Create Date: 2026-10-18 11:02:17.402931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41e7c0a5f2'
+down_revision = '3f9c2a1d8b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('balance_snapshot',
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('checkpoint_at', sa.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+    # existing balances are trusted as of the migration, history is checked from here on
+    op.execute(
+        "INSERT INTO balance_snapshot (account_id, total, checkpoint_at) "
+        "SELECT id, balance, now() at time zone 'utc' FROM account"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('balance_snapshot')
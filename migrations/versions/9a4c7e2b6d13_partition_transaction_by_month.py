@@ -0,0 +1,132 @@
+"""partition transaction by month
+
+Revision ID: 9a4c7e2b6d13
+Revises: 5d8e3a1c9f24
+Create Date: 2026-10-18 19:40:52.630177
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c7e2b6d13'
+down_revision = '5d8e3a1c9f24'
+branch_labels = None
+depends_on = None
+
+
+# months created past the current one, later ones come from `python -m app.db.partitions create`
+PARTITIONS_AHEAD = 3
+
+COLUMNS = "id, transaction_type_id, amount, tag_id, account_id, created_at, signed_amount"
+
+INDEXES = (
+    ('ix_transaction_created_at_id', ['created_at', 'id'], None),
+    ('ix_transaction_account_id_created_at_id', ['account_id', 'created_at', 'id'], ['signed_amount']),
+    ('ix_transaction_tag_id_created_at_id', ['tag_id', 'created_at', 'id'], None),
+    ('ix_transaction_transaction_type_id_created_at_id', ['transaction_type_id', 'created_at', 'id'], None),
+)
+
+BALANCE_TRIGGERS = {
+    'insert': "REFERENCING NEW TABLE AS new_rows",
+    'update': "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    'delete': "REFERENCING OLD TABLE AS old_rows",
+}
+
+TABLE_DEFINITION = """
+    id uuid NOT NULL,
+    transaction_type_id integer NOT NULL REFERENCES transaction_type (id),
+    amount numeric(18, 2) NOT NULL,
+    tag_id uuid REFERENCES tag (id),
+    account_id uuid NOT NULL REFERENCES account (id),
+    created_at timestamp without time zone NOT NULL,
+    signed_amount numeric(18, 2) NOT NULL,
+    CONSTRAINT ck_transaction_signed_amount CHECK (abs(signed_amount) = amount),
+"""
+
+
+def _add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def _balance_triggers_enabled() -> bool:
+    return bool(op.get_bind().scalar(sa.text(
+        "SELECT bool_and(tgenabled <> 'D') FROM pg_trigger "
+        "WHERE tgrelid = 'transaction'::regclass AND tgname LIKE 'trg_transaction_balance_%'"
+    )))
+
+
+def _create_indexes_and_triggers(triggers_enabled: bool) -> None:
+    for name, columns, include in INDEXES:
+        op.create_index(name, 'transaction', columns, unique=False, postgresql_include=include or [])
+
+    # the functions from 5d8e3a1c9f24 are reused, only the triggers belong to the table
+    for event, referencing in BALANCE_TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER trg_transaction_balance_{event} AFTER {event.upper()} ON transaction "
+            f"{referencing} FOR EACH STATEMENT EXECUTE FUNCTION transaction_balance_{event}()"
+        )
+        if not triggers_enabled:
+            op.execute(f"ALTER TABLE transaction DISABLE TRIGGER trg_transaction_balance_{event}")
+
+
+def upgrade() -> None:
+    triggers_enabled = _balance_triggers_enabled()
+    first_month = op.get_bind().scalar(sa.text(
+        "SELECT date_trunc('month', min(created_at))::date FROM transaction"
+    ))
+    this_month = datetime.utcnow().date().replace(day=1)
+
+    # indexes go before the copy and are rebuilt once per partition afterwards
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name='transaction')
+    op.execute("ALTER TABLE transaction RENAME TO transaction_unpartitioned")
+    op.execute("ALTER INDEX transaction_pkey RENAME TO transaction_unpartitioned_pkey")
+
+    # the partition key has to be part of the primary key, ids stay unique as random UUIDs
+    op.execute(
+        f"CREATE TABLE transaction ({TABLE_DEFINITION} "
+        f"CONSTRAINT transaction_pkey PRIMARY KEY (id, created_at)"
+        f") PARTITION BY RANGE (created_at)"
+    )
+    # catches rows outside every month, e.g. backdated imports older than the first partition
+    op.execute("CREATE TABLE transaction_default PARTITION OF transaction DEFAULT")
+
+    month = min(first_month or this_month, this_month)
+    while month <= _add_months(this_month, PARTITIONS_AHEAD):
+        op.execute(
+            f"CREATE TABLE transaction_y{month.year}m{month.month:02d} PARTITION OF transaction "
+            f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+        )
+        month = _add_months(month, 1)
+
+    # NULL created_at is no longer allowed, such rows are filed under the epoch
+    op.execute(
+        f"INSERT INTO transaction ({COLUMNS}) "
+        f"SELECT id, transaction_type_id, amount, tag_id, account_id, "
+        f"coalesce(created_at, '1970-01-01'), signed_amount FROM transaction_unpartitioned"
+    )
+    op.drop_table('transaction_unpartitioned')
+
+    _create_indexes_and_triggers(triggers_enabled)
+    op.execute("ANALYZE transaction")
+
+
+def downgrade() -> None:
+    triggers_enabled = _balance_triggers_enabled()
+
+    op.execute("ALTER TABLE transaction RENAME TO transaction_partitioned")
+    op.execute("ALTER INDEX transaction_pkey RENAME TO transaction_partitioned_pkey")
+    for name, _, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name.replace('ix_transaction', 'ix_transaction_partitioned')}")
+
+    op.execute(f"CREATE TABLE transaction ({TABLE_DEFINITION} CONSTRAINT transaction_pkey PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO transaction ({COLUMNS}) SELECT {COLUMNS} FROM transaction_partitioned")
+    # drops every partition with it
+    op.execute("DROP TABLE transaction_partitioned")
+
+    _create_indexes_and_triggers(triggers_enabled)
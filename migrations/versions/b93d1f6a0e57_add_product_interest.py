@@ -0,0 +1,49 @@
+"""add product interest
+
+Revision ID: b93d1f6a0e57
+Revises: 7c2e9b51f3a8
+Create Date: 2026-10-18 16:31:09.554210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b93d1f6a0e57'
+down_revision = '7c2e9b51f3a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('credit', 'deposit'):
+        op.add_column(table, sa.Column(
+            'interest_rate', sa.Numeric(9, 6), nullable=False, server_default='0'
+        ))
+        op.add_column(table, sa.Column('term_days', sa.Integer(), nullable=True))
+        # existing products start accruing from the day after the migration
+        op.add_column(table, sa.Column(
+            'accrued_through', sa.Date(), nullable=False,
+            server_default=sa.text("(now() at time zone 'utc')::date")
+        ))
+        op.alter_column(table, 'interest_rate', server_default=None)
+        op.alter_column(table, 'accrued_through', server_default=None)
+        op.create_index(
+            f'ix_{table}_accrued_through', table, ['accrued_through'], unique=False,
+            postgresql_where=sa.text('is_open AND interest_rate > 0')
+        )
+
+    op.execute(
+        "INSERT INTO transaction_type (id, name) "
+        "VALUES (9, 'deposit_interest'), (10, 'credit_interest') ON CONFLICT DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM transaction_type WHERE id IN (9, 10)")
+    for table in ('credit', 'deposit'):
+        op.drop_index(f'ix_{table}_accrued_through', table_name=table)
+        op.drop_column(table, 'accrued_through')
+        op.drop_column(table, 'term_days')
+        op.drop_column(table, 'interest_rate')
@@ -0,0 +1,51 @@
+"""money as numeric
+
+Revision ID: e1b7d4a92c36
+Revises: c5a93e2f71d0
+Create Date: 2026-10-18 14:27:05.318644
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b7d4a92c36'
+down_revision = 'c5a93e2f71d0'
+branch_labels = None
+depends_on = None
+
+
+MONEY_COLUMNS = (
+    ('account', 'balance'),
+    ('credit', 'amount'),
+    ('deposit', 'amount'),
+    ('transaction', 'amount'),
+    ('balance_snapshot', 'total'),
+)
+
+
+def upgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Float(),
+            type_=sa.Numeric(18, 2),
+            existing_nullable=False,
+            postgresql_using=f'round({column}::numeric, 2)'
+        )
+    # balances and amounts were rounded separately, the rounded balances are trusted from here on
+    op.execute(
+        "UPDATE balance_snapshot SET total = account.balance, checkpoint_at = now() at time zone 'utc' "
+        "FROM account WHERE account.id = balance_snapshot.account_id"
+    )
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Numeric(18, 2),
+            type_=sa.Float(),
+            existing_nullable=False
+        )